@@ -0,0 +1,47 @@
+"""
+Compares the memory and update cost of a large numeric series stored as a list node and as an array node.
+
+Run from the repository root with `python -m benchmarks.bench_array_node`.
+"""
+
+import time
+import tracemalloc
+from perci import reactive, watch
+from perci.list_node import ReactiveListNode
+from perci.array_node import ReactiveArrayNode
+
+
+def measure(build) -> tuple[float, object]:
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def main(count: int = 1_000_000):
+    samples = [i * 0.001 for i in range(count)]
+
+    print(f"{count} float samples")
+    print(f"{'node':>6} {'MB':>8} {'slice write ms':>15} {'json ms':>8}")
+    for name, build in [("list", ReactiveListNode.build_list), ("array", ReactiveArrayNode.build_array)]:
+        size, node = measure(lambda: build("samples", samples))
+
+        root = reactive({})
+        root.add_child(node)
+        changes = []
+        watch(root, changes.append)
+
+        start = time.perf_counter()
+        node[1000:101000] = [1.0] * 100000
+        write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        root.json()
+        encode = time.perf_counter() - start
+
+        print(f"{name:>6} {size / 1e6:>8.1f} {write * 1e3:>15.1f} {encode * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures the round trip of a change stream through the binary encoder, compared to JSON and pickle.
+
+Run from the repository root with `python -m benchmarks.bench_binary_encoding`.
+"""
+
+import json
+import pickle
+import time
+from perci.binary import ChangeEncoder, ChangeDecoder
+from perci.changes import Change, ChangeType, AddChange, RemoveChange, UpdateChange, ListInsertChange, ListDeleteChange
+
+_CLASSES = {
+    ChangeType.ADD: AddChange,
+    ChangeType.REMOVE: RemoveChange,
+    ChangeType.UPDATE: UpdateChange,
+    ChangeType.LIST_INSERT: ListInsertChange,
+    ListDeleteChange.change_type: ListDeleteChange,
+}
+
+
+def make_changes(count: int) -> list[Change]:
+    changes = []
+    for i in range(count):
+        sensor = f"sensor{i % 50}"
+        kind = i % 10
+        if kind < 6:
+            changes.append(UpdateChange(path=("root", "sensors", sensor, "value"), value=i * 0.25))
+        elif kind < 8:
+            changes.append(UpdateChange(path=("root", "sensors", sensor, "status"), value="ok" if i % 3 else "warning"))
+        elif kind == 8:
+            changes.append(ListInsertChange(path=("root", "log"), index=i, values=[{"sensor": sensor, "level": i % 4}]))
+        else:
+            changes.append(AddChange(path=("root", "sensors", sensor), key="meta", repr="dict", value={"id": i, "active": True}))
+            changes.append(RemoveChange(path=("root", "sensors", sensor), key="meta"))
+            changes.append(ListDeleteChange(path=("root", "log"), index=0, count=1))
+    return changes
+
+
+def to_json(changes: list[Change]) -> bytes:
+    records = []
+    for change in changes:
+        record = {field: getattr(change, field) for field in change.__dataclass_fields__ if field != "change_type"}
+        record["type"] = change.change_type.value
+        records.append(record)
+    return json.dumps(records).encode()
+
+
+def from_json(data: bytes) -> list[Change]:
+    changes = []
+    for record in json.loads(data):
+        change_type = ChangeType(record.pop("type"))
+        changes.append(_CLASSES[change_type](**record))
+    return changes
+
+
+def timed(function) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    changes = make_changes(100000)
+
+    candidates = {
+        "binary": (lambda: ChangeEncoder().encode_all(changes), lambda data: ChangeDecoder().decode(data)),
+        "json": (lambda: to_json(changes), from_json),
+        "pickle": (lambda: pickle.dumps(changes, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+    }
+
+    print(f"{len(changes)} changes")
+    print(f"{'format':>8} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for name, (encode, decode) in candidates.items():
+        encode_time, data = timed(encode)
+        decode_time, decoded = timed(lambda: decode(data))
+        assert decoded == changes
+        print(f"{name:>8} {len(data):>10} {encode_time * 1e3:>10.1f} {decode_time * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
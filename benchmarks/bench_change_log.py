@@ -0,0 +1,60 @@
+"""
+Measures the mutation overhead of a change log and shows that restoring a tree only depends on the changes made since the latest
+checkpoint, not on the total history.
+
+Run from the repository root with `python -m benchmarks.bench_change_log`.
+"""
+
+import tempfile
+import time
+from perci import reactive, restore, create_change_log
+
+
+def mutate(root, count: int):
+    sensors = root["sensors"]
+    for i in range(count):
+        sensors[f"sensor{i % 100}"]["value"] = i * 0.5
+
+
+def make_tree():
+    return reactive({"sensors": {f"sensor{i}": {"value": 0.0, "unit": "C"} for i in range(100)}})
+
+
+def main():
+    count = 200000
+
+    root = make_tree()
+    start = time.perf_counter()
+    mutate(root, count)
+    baseline = time.perf_counter() - start
+    print(f"{count} updates without log: {baseline * 1e3:.1f} ms")
+
+    root = make_tree()
+    with tempfile.TemporaryDirectory() as directory:
+        create_change_log(root, directory, checkpoint_interval=count * 2)
+        start = time.perf_counter()
+        mutate(root, count)
+        logged = time.perf_counter() - start
+        root.get_namespace().detach_change_log()
+        print(f"{count} updates with log:    {logged * 1e3:.1f} ms")
+
+    print(f"{'history':>10} {'interval':>10} {'restore ms':>12}")
+    for history in (20000, 100000, 200000):
+        for interval in (history * 2, 10000):
+            root = make_tree()
+            with tempfile.TemporaryDirectory() as directory:
+                create_change_log(root, directory, checkpoint_interval=interval, flush_interval=0.001)
+                mutate(root, history)
+                root.get_namespace().detach_change_log()
+
+                start = time.perf_counter()
+                restored = restore(directory)
+                elapsed = time.perf_counter() - start
+                assert restored.json() == root.json()
+
+            label = "none" if interval > history else str(interval)
+            print(f"{history:>10} {label:>10} {elapsed * 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
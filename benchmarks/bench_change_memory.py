@@ -0,0 +1,39 @@
+"""
+Measures the memory and time needed to queue one million changes in a QueueWatcher.
+
+Run from the repository root with `python -m benchmarks.bench_change_memory`.
+"""
+
+import time
+import tracemalloc
+from perci import reactive, create_queue_watcher
+
+
+def fill(count: int):
+    state = reactive({"sensor": {"value": 0}})
+    watcher = create_queue_watcher(state)
+    sensor = state["sensor"]
+
+    for i in range(1, count + 1):
+        sensor["value"] = i
+
+    return watcher
+
+
+def main(count: int = 1_000_000):
+    start = time.perf_counter()
+    watcher = fill(count)
+    elapsed = time.perf_counter() - start
+    assert len(watcher.get_changes()) == count
+
+    tracemalloc.start()
+    watcher = fill(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"queued {count} changes in {elapsed:.2f} s")
+    print(f"{current / count:.1f} bytes per queued change ({current / 2**20:.1f} MiB total)")
+
+
+if __name__ == "__main__":
+    main()
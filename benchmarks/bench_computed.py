@@ -0,0 +1,48 @@
+"""
+Compares a computed total against recomputing the total after every change, while most changes modify unrelated parts of the tree.
+
+Run from the repository root with `python -m benchmarks.bench_computed`.
+"""
+
+import time
+from perci import reactive, watch, computed
+
+
+def build():
+    return reactive({"prices": {f"item_{i}": i for i in range(1000)}, "sessions": {f"user_{i}": 0 for i in range(1000)}})
+
+
+def recompute_on_change(count: int) -> float:
+    state = build()
+    totals = []
+    watch(state, lambda _: totals.append(sum(state["prices"].values())))
+
+    start = time.perf_counter()
+    for i in range(count):
+        state["sessions"][f"user_{i % 1000}"] = i
+        if i % 100 == 0:
+            state["prices"][f"item_{i % 1000}"] = i
+    return time.perf_counter() - start
+
+
+def computed_total(count: int) -> float:
+    state = build()
+    total = computed(lambda: sum(state["prices"].values()))
+    total()
+
+    start = time.perf_counter()
+    for i in range(count):
+        state["sessions"][f"user_{i % 1000}"] = i
+        if i % 100 == 0:
+            state["prices"][f"item_{i % 1000}"] = i
+        total()
+    return time.perf_counter() - start
+
+
+def main(count: int = 5_000):
+    for name, func in [("recompute", recompute_on_change), ("computed", computed_total)]:
+        print(f"{name:>10}: {func(count) * 1e3:8.1f} ms for {count} changes")
+
+
+if __name__ == "__main__":
+    main()
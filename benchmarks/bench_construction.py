@@ -0,0 +1,44 @@
+"""
+Measures how fast reactive() builds a tree from a large JSON-like document, and how fast such a document is attached to a watched tree.
+
+Run from the repository root with `python -m benchmarks.bench_construction`.
+"""
+
+import json
+import time
+from perci import reactive, watch
+
+
+def make_document(count: int) -> dict:
+    return {
+        "devices": {
+            f"device_{i}": {
+                "name": f"Device {i}",
+                "enabled": i % 2 == 0,
+                "status": {"temperature": 20.5 + i % 10, "errors": [], "tags": ["a", "b", "c"]},
+            }
+            for i in range(count)
+        }
+    }
+
+
+def main(count: int = 100_000):
+    document = make_document(count)
+    size = len(json.dumps(document))
+
+    start = time.perf_counter()
+    state = reactive(document)
+    elapsed = time.perf_counter() - start
+    print(f"reactive(): {size / 2**20:.1f} MiB in {elapsed:.2f} s ({size / 2**20 / elapsed:.1f} MiB/s)")
+
+    changes = []
+    watch(state, changes.append)
+
+    start = time.perf_counter()
+    state["copy"] = document["devices"]
+    elapsed = time.perf_counter() - start
+    print(f"attach to watched tree: {elapsed:.2f} s, {len(changes)} change(s) emitted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Measures the writer throughput when several threads modify unrelated subtrees, with a single namespace lock and with a striped lock.
+
+Run from the repository root with `python -m benchmarks.bench_contention`. Pure Python mutations are serialized by the interpreter
+lock either way, but with handlers that wait on I/O the striped lock should scale with the number of writers.
+"""
+
+import threading
+import time
+from typing import Optional
+from perci import reactive, watch, StripedLock
+
+
+def bench(threads: int, lock: Optional[StripedLock], handler_cost: float, writes: int = 200) -> float:
+    state = reactive({f"w{i}": {"value": 0} for i in range(threads)}, lock=lock)
+    if handler_cost:
+        watch(state, lambda change: time.sleep(handler_cost))
+
+    def writer(i: int):
+        node = state[f"w{i}"]
+        for j in range(writes):
+            node["value"] = j + 1
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    return threads * writes / elapsed
+
+
+def main():
+    for handler_cost in (0, 0.0002):
+        print(f"handler cost {handler_cost * 1e3:.1f} ms")
+        print(f"{'threads':>10} {'single/s':>12} {'striped/s':>12}")
+        for threads in (1, 2, 4, 8, 16):
+            single = bench(threads, None, handler_cost)
+            striped = bench(threads, StripedLock(stripes=64), handler_cost)
+            print(f"{threads:>10} {single:>12.0f} {striped:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Measures the mutation latency with a slow handler for each dispatcher.
+
+Run from the repository root with `python -m benchmarks.bench_dispatch`. With the threaded dispatchers the time per mutation should
+not depend on the handler cost.
+"""
+
+import time
+from perci import reactive, watch, Dispatcher, ThreadDispatcher, ExecutorDispatcher
+
+
+def bench(dispatcher: Dispatcher, handler_cost: float, mutations: int = 200) -> float:
+    state = reactive({"value": 0}, dispatcher=dispatcher)
+    watch(state, lambda change: time.sleep(handler_cost))
+
+    start = time.perf_counter()
+    for i in range(mutations):
+        state["value"] = i + 1
+    elapsed = time.perf_counter() - start
+
+    dispatcher.close()
+
+    return elapsed / mutations
+
+
+def main():
+    print(f"{'handler ms':>10} {'sync us':>10} {'thread us':>10} {'executor us':>12}")
+    for handler_cost in (0, 0.0001, 0.001):
+        sync = bench(Dispatcher(), handler_cost)
+        thread = bench(ThreadDispatcher(), handler_cost)
+        executor = bench(ExecutorDispatcher(), handler_cost)
+        print(f"{handler_cost * 1e3:>10.1f} {sync * 1e6:>10.2f} {thread * 1e6:>10.2f} {executor * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
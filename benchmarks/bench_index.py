@@ -0,0 +1,37 @@
+"""
+Compares lookups with and without secondary indexes, and measures what maintaining an index adds to modifications.
+
+Run from the repository root with `python -m benchmarks.bench_index`.
+"""
+
+import time
+from perci import reactive
+
+
+def build(count: int):
+    return reactive({"values": [f"value_{i}" for i in range(count)], "devices": {f"device_{i}": {"status": "on" if i % 100 == 0 else "off"} for i in range(count)}})
+
+
+def measure(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat
+
+
+def main(count: int = 20_000, repeat: int = 200):
+    for indexed in (False, True):
+        state = build(count)
+        values, devices = state["values"], state["devices"]
+        if indexed:
+            values.create_index()
+            devices.create_index("status")
+
+        label = "indexed" if indexed else "scan"
+        print(f"{label:>8} contains: {measure(lambda i: f'value_{count - 1 - i}' in values, repeat) * 1e6:10.1f} us")
+        print(f"{label:>8} find:     {measure(lambda i: devices.find('on', 'status'), repeat) * 1e6:10.1f} us")
+        print(f"{label:>8} update:   {measure(lambda i: devices[f'device_{i}'].__setitem__('status', 'idle'), repeat) * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures appending to and deleting from the head of a watched list, and writing below an item after the head was shifted.
+
+Run from the repository root with `python -m benchmarks.bench_list_append`. The time per item should stay flat as the list grows.
+"""
+
+import time
+from perci import reactive, watch
+
+
+def bench_append(count: int) -> float:
+    state = reactive({"samples": []})
+    watch(state, lambda change: None)
+    samples = state["samples"]
+
+    start = time.perf_counter()
+    for i in range(count):
+        samples.append(i * 0.5)
+    return time.perf_counter() - start
+
+
+def bench_extend(count: int) -> float:
+    state = reactive({"samples": []})
+    watch(state, lambda change: None)
+
+    start = time.perf_counter()
+    state["samples"].extend(i * 0.5 for i in range(count))
+    return time.perf_counter() - start
+
+
+def bench_delete_head(count: int) -> float:
+    state = reactive({"records": [{"id": i, "tags": {"a": i}} for i in range(count)]})
+    watch(state, lambda change: None)
+    records = state["records"]
+
+    start = time.perf_counter()
+    while records:
+        del records[0]
+    return time.perf_counter() - start
+
+
+def bench_shifted_write(count: int, repeat: int = 200) -> float:
+    state = reactive({"records": [{"a": 0} for _ in range(count)]})
+    watch(state, lambda change: None)
+    records = state["records"]
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        records.insert(0, {"a": -1})
+        records[count // 2]["a"] = i
+        del records[0]
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    print(f"{'items':>8} {'append us/item':>15} {'extend us/item':>15} {'del head us/item':>17} {'shifted write us':>17}")
+    for count in (1000, 10000, 100000):
+        append = bench_append(count) / count * 1e6
+        extend = bench_extend(count) / count * 1e6
+        delete = bench_delete_head(count) / count * 1e6
+        shifted = bench_shifted_write(count) * 1e6
+        print(f"{count:>8} {append:>15.2f} {extend:>15.2f} {delete:>17.2f} {shifted:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
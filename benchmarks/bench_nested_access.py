@@ -0,0 +1,45 @@
+"""
+Measures reads and writes through dotted keys at increasing depths, through dict nodes only and through list items.
+
+Run from the repository root with `python -m benchmarks.bench_nested_access`.
+"""
+
+import time
+from perci import reactive
+
+
+def nested(depth: int, through_lists: bool):
+    value = 0
+    for level in reversed(range(depth)):
+        value = [value] if through_lists and level % 2 else {f"k{level}": value}
+    return value
+
+
+def dotted_key(depth: int, through_lists: bool) -> str:
+    return ".".join("0" if through_lists and level % 2 else f"k{level}" for level in range(depth))
+
+
+def main():
+    count = 50000
+
+    print(f"{'depth':>6} {'lists':>6} {'read us':>10} {'write us':>10}")
+    for depth in (2, 8, 32):
+        for through_lists in (False, True):
+            root = reactive({"tree": nested(depth, through_lists)})
+            key = "tree." + dotted_key(depth, through_lists)
+
+            start = time.perf_counter()
+            for _ in range(count):
+                root[key]
+            read = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for i in range(count):
+                root[key] = i
+            write = time.perf_counter() - start
+
+            print(f"{depth:>6} {str(through_lists):>6} {read / count * 1e6:>10.2f} {write / count * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Measures the node creation rate for validated keys, trusted keys and list items.
+
+Run from the repository root with `python -m benchmarks.bench_node_creation`.
+"""
+
+import time
+from perci.node import ReactiveNode
+from perci.list_node import ReactiveListNode
+
+
+def rate(func, count: int) -> float:
+    start = time.perf_counter()
+    func(count)
+    return count / (time.perf_counter() - start)
+
+
+def validated_keys(count: int):
+    for i in range(count):
+        ReactiveNode(f"key_{i % 100}")
+
+
+def trusted_keys(count: int):
+    for i in range(count):
+        ReactiveNode("key", validate_key=False)
+
+
+def list_items(count: int):
+    ReactiveListNode.build_list("samples", list(range(count)))
+
+
+def dict_items(count: int):
+    ReactiveNode.build("entries", {f"key_{i}": i for i in range(count)})
+
+
+def main(count: int = 500_000):
+    for name, func in [("validated keys", validated_keys), ("trusted keys", trusted_keys), ("list items", list_items), ("dict items", dict_items)]:
+        print(f"{name:>15}: {rate(func, count) / 1e3:8.0f} k nodes/s")
+
+
+if __name__ == "__main__":
+    main()
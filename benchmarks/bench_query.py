@@ -0,0 +1,54 @@
+"""
+Compares pattern queries against walking the tree by hand with the dict and list interface.
+
+Run from the repository root with `python -m benchmarks.bench_query`.
+"""
+
+import time
+from perci import reactive
+
+
+def build(count: int):
+    return reactive({"devices": {f"device_{i}": {"status": "on", "power": i, "sensors": {"a": {"status": "ok"}, "b": {"value": 1}}} for i in range(count)}})
+
+
+def manual_status(state) -> list:
+    devices = state["devices"]
+    return [(f"devices.{key}.status", device["status"]) for key, device in devices.items() if "status" in device]
+
+
+def manual_recursive(node, prefix: str = "") -> list:
+    matches = []
+    for key, value in node.items():
+        path = f"{prefix}{key}"
+        if key == "status":
+            matches.append((path, value))
+        if hasattr(value, "items"):
+            matches.extend(manual_recursive(value, path + "."))
+    return matches
+
+
+def measure(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(count: int = 10_000, repeat: int = 5):
+    state = build(count)
+
+    assert state.query("devices.*.status") == manual_status(state)
+    assert state.query("**.status") == manual_recursive(state)
+
+    for name, func in [
+        ("manual devices.*.status", lambda: manual_status(state)),
+        ("query devices.*.status", lambda: state.query("devices.*.status")),
+        ("manual **.status", lambda: manual_recursive(state)),
+        ("query **.status", lambda: state.query("**.status")),
+    ]:
+        print(f"{name:>24}: {measure(func, repeat) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
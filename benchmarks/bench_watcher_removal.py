@@ -0,0 +1,39 @@
+"""
+Measures the cost of removing watcher-free subtrees while the total number of watchers grows.
+
+Run from the repository root with `python -m benchmarks.bench_watcher_removal`. The time per removal should stay flat across all watcher counts.
+"""
+
+import time
+from perci import reactive, watch
+
+
+def bench(watcher_count: int, removals: int = 2000) -> float:
+    state = reactive({"entities": {}, "scratch": {}})
+
+    # register many watchers on unrelated entities
+    entities = state["entities"]
+    for i in range(watcher_count):
+        entities[f"e{i}"] = {"value": i}
+        watch(entities.get_child(f"e{i}"), lambda change: None)
+
+    scratch = state["scratch"]
+    for i in range(removals):
+        scratch[f"s{i}"] = i
+
+    start = time.perf_counter()
+    for i in range(removals):
+        del scratch[f"s{i}"]
+    elapsed = time.perf_counter() - start
+
+    return elapsed / removals
+
+
+def main():
+    print(f"{'watchers':>10} {'us/removal':>12}")
+    for watcher_count in (10, 100, 1000, 10000, 50000):
+        print(f"{watcher_count:>10} {bench(watcher_count) * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
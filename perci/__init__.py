@@ -1,134 +1,243 @@
-"""
-This module is the entry point for the package.
-"""
-
-from typing import Optional
-from .namespace import ReactiveNamespace
-from .node import ReactiveNode, AtomicType
-from .dict_node import ReactiveDictNode
-from .list_node import ReactiveListNode
-from .watcher import Watcher, QueueWatcher
-
-
-def _create_node(cls: type[ReactiveNode], *args, **kwargs) -> ReactiveNode:
-    """
-    Creates a new namespace with a single root node.
-
-    :param cls: The class of the node
-    :param args: The positional arguments to pass to the node
-    :param kwargs: The keyword arguments to pass to the node
-    """
-
-    node = cls(*args, **kwargs)
-    namespace = ReactiveNamespace(node)
-    node.set_namespace(namespace, [node.get_key()])
-
-    return node
-
-
-def create_root_node(root_key: str = "root") -> ReactiveNode:
-    """
-    Creates an empty reactive tree containing only the root node.
-
-    :param root_key: The key of the root node. Defaults to "root".
-
-    :return: The root node of the reactive tree.
-    """
-
-    return _create_node(ReactiveNode, root_key)
-
-
-def create_dict_node(data: Optional[dict] = None, root_key: str = "root") -> ReactiveDictNode:
-    """
-    Creates a reactive tree from the given data.
-
-    :param data: The data to create the tree from.
-    :param root_key: The key of the root node. Defaults to "root".
-
-    :return: The root node of the reactive tree.
-    """
-
-    if data is None:
-        data = {}
-
-    if not isinstance(data, dict):
-        raise ValueError("Data must be a dictionary")
-
-    node = _create_node(ReactiveDictNode, root_key)
-
-    # pack the data into the root node
-    for key, value in data.items():
-        node.pack(key, value)
-
-    return node
-
-
-def reactive(data: Optional[dict] = None, root_key: str = "root") -> ReactiveDictNode:
-    """
-    Creates a reactive tree from the given data.
-
-    :param data: The data to create the tree from.
-    :param root_key: The key of the root node. Defaults to "root".
-
-    :return: The root node of the reactive tree.
-    """
-
-    return create_dict_node(data, root_key)
-
-
-def _create_watcher(node: ReactiveNode, path: str, cls: type[Watcher], *args, **kwargs) -> Watcher:
-    """
-    Creates a watcher of the given type.
-
-    :param node: The node to watch.
-    :param path: The path to watch.
-    :param cls: The base class of the watcher.
-    :param args: The positional arguments to pass to the watcher constructor.
-    :param kwargs: The keyword arguments to pass to the watcher constructor.
-    """
-
-    if not isinstance(node, ReactiveNode):
-        info_message = f"Cannot watch value of type {type(node)}."
-        if isinstance(node, AtomicType):
-            info_message += f' Use node.get_child("<key>") instead of node["<key>"] if you want to watch an atomic value.'
-        raise ValueError(info_message)
-
-    absolute_path = node.get_path() + (path.split(".") if path else [])
-    watcher = cls(absolute_path, *args, **kwargs)
-    node.get_namespace().add_watcher(watcher)
-    return watcher
-
-
-def create_watcher(node: ReactiveNode, handler: callable, path: str = "") -> Watcher:
-    """
-    Creates a watcher that calls the given handler when a change occurs.
-
-    :param node: The node to watch.
-    :param handler: The handler to call when a change occurs.
-    :param path: The path to watch. Defaults to None.
-    """
-
-    return _create_watcher(node, path, Watcher, handler)
-
-
-def create_queue_watcher(node: ReactiveNode, path: str = "") -> QueueWatcher:
-    """
-    Creates a thread-safe watcher that stores changes in a queue.
-
-    :param node: The node to watch.
-    :param path: The path to watch. Defaults to None.
-    """
-
-    return _create_watcher(node, path, QueueWatcher)
-
-
-def watch(node: ReactiveNode, handler: callable, path: str = "") -> Watcher:
-    """
-    Adds a watcher to the given node.
-
-    :param node: The node to watch.
-    :param handler: The handler to call when a change occurs.
-    :param path: The path to watch. Defaults to None.
-    """
-
-    return create_watcher(node, handler, path)
+"""
+This module is the entry point for the package.
+"""
+
+import asyncio
+from typing import Optional, ContextManager
+from .namespace import ReactiveNamespace
+from .node import ReactiveNode, AtomicType, MissingNamespaceError
+from .batch import ChangeBatch
+from .dict_node import ReactiveDictNode
+from .list_node import ReactiveListNode
+from .array_node import ReactiveArrayNode, CompactList, compact
+from .watcher import Watcher, QueueWatcher, AsyncQueueWatcher, OverflowPolicy
+from .dispatch import Dispatcher, ThreadDispatcher, ExecutorDispatcher
+from .locking import StripedLock, LockOrderError
+from .snapshot import snapshot_json
+from .patch import PatchWatcher, PatchError, apply_patch, changes_to_patch
+from .diff import diff
+from .changelog import ChangeLog, restore_tree
+from .computed import Computed, ReactiveComputedNode, CyclicComputationError, computed
+from .query import Query, compile_query
+from .index import ValueIndex
+
+
+def _create_namespace(node: ReactiveNode, dispatcher: Optional[Dispatcher] = None, lock: Optional[StripedLock] = None) -> ReactiveNode:
+    """
+    Creates a new namespace with the given node as its root.
+
+    :param node: The detached root node.
+    :param dispatcher: The dispatcher delivering changes to the watchers. Defaults to synchronous delivery.
+    :param lock: A striped lock guarding the tree. Defaults to a single lock for the whole tree.
+
+    :return: The root node.
+    """
+
+    namespace = ReactiveNamespace(node, dispatcher, lock)
+    node.set_namespace(namespace)
+
+    return node
+
+
+def create_root_node(root_key: str = "root", dispatcher: Optional[Dispatcher] = None, lock: Optional[StripedLock] = None) -> ReactiveNode:
+    """
+    Creates an empty reactive tree containing only the root node.
+
+    :param root_key: The key of the root node. Defaults to "root".
+    :param dispatcher: The dispatcher delivering changes to the watchers. Defaults to synchronous delivery.
+    :param lock: A striped lock guarding the tree. Defaults to a single lock for the whole tree.
+
+    :return: The root node of the reactive tree.
+    """
+
+    return _create_namespace(ReactiveNode(root_key), dispatcher, lock)
+
+
+def create_dict_node(data: Optional[dict] = None, root_key: str = "root", dispatcher: Optional[Dispatcher] = None, lock: Optional[StripedLock] = None) -> ReactiveDictNode:
+    """
+    Creates a reactive tree from the given data. The whole tree is built detached, without locks or changes, before the namespace
+    is created.
+
+    :param data: The data to create the tree from.
+    :param root_key: The key of the root node. Defaults to "root".
+    :param dispatcher: The dispatcher delivering changes to the watchers. Defaults to synchronous delivery.
+    :param lock: A striped lock guarding the tree. Defaults to a single lock for the whole tree.
+
+    :return: The root node of the reactive tree.
+    """
+
+    if data is None:
+        data = {}
+
+    if not isinstance(data, dict):
+        raise ValueError("Data must be a dictionary")
+
+    return _create_namespace(ReactiveDictNode.build_dict(root_key, data), dispatcher, lock)
+
+
+def reactive(data: Optional[dict] = None, root_key: str = "root", dispatcher: Optional[Dispatcher] = None, lock: Optional[StripedLock] = None) -> ReactiveDictNode:
+    """
+    Creates a reactive tree from the given data.
+
+    :param data: The data to create the tree from.
+    :param root_key: The key of the root node. Defaults to "root".
+    :param dispatcher: The dispatcher delivering changes to the watchers. Pass a ThreadDispatcher or ExecutorDispatcher to run the
+        handlers outside the namespace lock. Defaults to synchronous delivery.
+    :param lock: A StripedLock that lets writers to unrelated subtrees proceed in parallel. Defaults to a single lock for the whole
+        tree.
+
+    :return: The root node of the reactive tree.
+    """
+
+    return create_dict_node(data, root_key, dispatcher, lock)
+
+
+def create_change_log(node: ReactiveNode, directory: str, checkpoint_interval: int = 10000, flush_interval: float = 0.01, sync: bool = False) -> ChangeLog:
+    """
+    Starts logging every change of the tree of the given node to a directory, so that the tree can be restored with restore().
+
+    :param node: A node of the tree.
+    :param directory: The log directory. If it already holds a log, the tree must have been restored from it.
+    :param checkpoint_interval: The number of changes after which a new checkpoint is taken. Defaults to 10000.
+    :param flush_interval: The maximum number of seconds a change is buffered before it is written. Defaults to 0.01.
+    :param sync: Whether to fsync every write. Defaults to False.
+
+    :raises MissingNamespaceError: If the node is not part of a namespace.
+
+    :return: The change log. Close it with namespace.detach_change_log().
+    """
+
+    if not node.get_namespace():
+        raise MissingNamespaceError("Node is not part of a namespace")
+
+    change_log = ChangeLog(directory, checkpoint_interval, flush_interval, sync=sync)
+    node.get_namespace().attach_change_log(change_log)
+    return change_log
+
+
+def restore(directory: str, dispatcher: Optional[Dispatcher] = None, lock: Optional[StripedLock] = None) -> ReactiveNode:
+    """
+    Restores a tree from a log directory written by a change log. Only the latest checkpoint and the changes made after it are read.
+
+    :param directory: The log directory.
+    :param dispatcher: The dispatcher delivering changes to the watchers. Defaults to synchronous delivery.
+    :param lock: A striped lock guarding the tree. Defaults to a single lock for the whole tree.
+
+    :raises FileNotFoundError: If the directory does not contain a checkpoint.
+
+    :return: The root node of the restored tree.
+    """
+
+    return _create_namespace(restore_tree(directory), dispatcher, lock)
+
+
+def _create_watcher(node: ReactiveNode, path: str, cls: type[Watcher], *args, **kwargs) -> Watcher:
+    """
+    Creates a watcher of the given type.
+
+    :param node: The node to watch.
+    :param path: The path to watch.
+    :param cls: The base class of the watcher.
+    :param args: The positional arguments to pass to the watcher constructor.
+    :param kwargs: The keyword arguments to pass to the watcher constructor.
+    """
+
+    if not isinstance(node, ReactiveNode):
+        info_message = f"Cannot watch value of type {type(node)}."
+        if isinstance(node, AtomicType):
+            info_message += f' Use node.get_child("<key>") instead of node["<key>"] if you want to watch an atomic value.'
+        raise ValueError(info_message)
+
+    absolute_path = node.get_path() + (path.split(".") if path else [])
+    watcher = cls(absolute_path, *args, **kwargs)
+    node.get_namespace().add_watcher(watcher)
+    return watcher
+
+
+def create_watcher(node: ReactiveNode, handler: callable, path: str = "", batched: bool = False) -> Watcher:
+    """
+    Creates a watcher that calls the given handler when a change occurs.
+
+    :param node: The node to watch.
+    :param handler: The handler to call when a change occurs.
+    :param path: The path to watch. Defaults to None.
+    :param batched: Whether the handler receives a list of changes. Defaults to False.
+    """
+
+    return _create_watcher(node, path, Watcher, handler, batched)
+
+
+def create_queue_watcher(node: ReactiveNode, path: str = "", capacity: int = 0, overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST, timeout: Optional[float] = None) -> QueueWatcher:
+    """
+    Creates a thread-safe watcher that stores changes in a queue.
+
+    :param node: The node to watch.
+    :param path: The path to watch. Defaults to None.
+    :param capacity: The maximum number of queued changes. Defaults to 0, meaning unbounded.
+    :param overflow: What to do when a change arrives while the queue is full. Defaults to dropping the oldest change.
+    :param timeout: How long to block the mutating thread with the BLOCK policy. Defaults to None, meaning forever.
+    """
+
+    return _create_watcher(node, path, QueueWatcher, capacity, overflow, timeout)
+
+
+def create_async_watcher(
+    node: ReactiveNode, path: str = "", loop: Optional[asyncio.AbstractEventLoop] = None, capacity: int = 0, overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST
+) -> AsyncQueueWatcher:
+    """
+    Creates a watcher that hands changes to an asyncio event loop. Consume it with `async for change in watcher`.
+
+    :param node: The node to watch.
+    :param path: The path to watch. Defaults to None.
+    :param loop: The event loop of the consumer. Defaults to the running loop.
+    :param capacity: The maximum number of queued changes. Defaults to 0, meaning unbounded.
+    :param overflow: What to do when a change arrives while the queue is full. Defaults to dropping the oldest change.
+    """
+
+    return _create_watcher(node, path, AsyncQueueWatcher, loop, capacity, overflow)
+
+
+def create_patch_watcher(node: ReactiveNode, handler: callable, path: str = "") -> PatchWatcher:
+    """
+    Creates a watcher that calls the given handler with a coalesced JSON Patch for every change or batch of changes. The paths of the
+    operations are relative to the watched node, so a replica can apply them with apply_patch().
+
+    :param node: The node to watch.
+    :param handler: The handler to call with the list of operations.
+    :param path: The path to watch. It must not contain wildcards. Defaults to None.
+
+    :raises ValueError: If the path contains a wildcard.
+    """
+
+    return _create_watcher(node, path, PatchWatcher, handler)
+
+
+def watch(node: ReactiveNode, handler: callable, path: str = "", batched: bool = False) -> Watcher:
+    """
+    Adds a watcher to the given node.
+
+    :param node: The node to watch.
+    :param handler: The handler to call when a change occurs.
+    :param path: The path to watch. Defaults to None.
+    :param batched: Whether the handler receives a list of changes. Defaults to False.
+    """
+
+    return create_watcher(node, handler, path, batched)
+
+
+def transaction(node: ReactiveNode) -> ContextManager[ChangeBatch]:
+    """
+    Groups all changes made to the tree of the given node into a single batch. The namespace lock is held for the whole
+    transaction, and each watcher receives the coalesced changes once the transaction ends.
+
+    :param node: A node of the tree.
+
+    :raises MissingNamespaceError: If the node is not part of a namespace.
+
+    :return: A context manager yielding the change batch.
+    """
+
+    if not node.get_namespace():
+        raise MissingNamespaceError("Node is not part of a namespace")
+
+    return node.get_namespace().batch()
@@ -0,0 +1,563 @@
+"""
+Provides a list node that stores numbers in a single typed buffer instead of one node per item.
+"""
+
+import array
+import json
+from typing import Any, Callable, Iterable, Optional
+from collections.abc import MutableSequence
+from .node import ReactiveNode
+from .list_node import ReactiveListNode
+from .types import UnpackedType
+from .changes import ListInsertChange, ListDeleteChange, ListReplaceChange
+from .dependencies import DependencyKind
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# typecodes of the numeric array.array types
+_NUMERIC_TYPECODES = "bBhHiIlLqQfd"
+_INTEGER_TYPECODES = "bBhHiIlLqQ"
+
+# the chunk size used to find the common prefix and suffix of two arrays with slice comparisons
+_COMPARE_CHUNK = 4096
+
+
+def array_typecode(values: Any) -> Optional[str]:
+    """
+    Returns the typecode of an array that holds the given values without changing their JSON representation: 'q' for 64 bit
+    integers and 'd' for floats. Lists that mix integers and floats, or contain booleans or other types, cannot be stored.
+
+    :param values: The values to check. Typed arrays and NumPy arrays keep their own type if it is numeric.
+
+    :return: The typecode or None if the values cannot be stored in an array.
+    """
+
+    if isinstance(values, array.array):
+        return values.typecode if values.typecode in _NUMERIC_TYPECODES else None
+
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.ndim != 1 or values.dtype.kind not in "iuf":
+            return None
+        return values.dtype.char if values.dtype.char in _NUMERIC_TYPECODES else "d"
+
+    if not isinstance(values, (list, tuple)) or not values:
+        return None
+
+    # bool is a subclass of int, so the exact types are compared
+    first = type(values[0])
+    if first is int and all(type(value) is int for value in values):
+        return "q" if -(2**63) <= min(values) and max(values) < 2**63 else None
+    if first is float and all(type(value) is float for value in values):
+        return "d"
+
+    return None
+
+
+def _to_array(typecode: str, values: Any) -> array.array:
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return array.array(typecode, values.astype(typecode, copy=False).tobytes())
+
+    return array.array(typecode, values)
+
+
+def _as_sequence(values: Any) -> Any:
+    # reactive nodes are stored by their JSON representation, and other iterables can only be consumed once
+    if isinstance(values, ReactiveNode):
+        return values.json()
+    if isinstance(values, (list, tuple, array.array)) or (numpy is not None and isinstance(values, numpy.ndarray)):
+        return values
+
+    return list(values)
+
+
+def _to_list(values: Any) -> Any:
+    # typed arrays and NumPy arrays become lists of plain Python numbers that list nodes can store
+    if isinstance(values, array.array) or (numpy is not None and isinstance(values, numpy.ndarray)):
+        return values.tolist()
+
+    return values
+
+
+def _common_prefix(a: array.array, b: array.array, limit: int) -> int:
+    # skip equal chunks with C level slice comparisons and only compare the last chunk item by item
+    prefix = 0
+    while prefix + _COMPARE_CHUNK <= limit and a[prefix : prefix + _COMPARE_CHUNK] == b[prefix : prefix + _COMPARE_CHUNK]:
+        prefix += _COMPARE_CHUNK
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+
+    return prefix
+
+
+def _common_suffix(a: array.array, b: array.array, limit: int) -> int:
+    suffix = 0
+    while suffix + _COMPARE_CHUNK <= limit and a[len(a) - suffix - _COMPARE_CHUNK : len(a) - suffix] == b[len(b) - suffix - _COMPARE_CHUNK : len(b) - suffix]:
+        suffix += _COMPARE_CHUNK
+    while suffix < limit and a[len(a) - suffix - 1] == b[len(b) - suffix - 1]:
+        suffix += 1
+
+    return suffix
+
+
+class ReactiveArrayNode(ReactiveNode, MutableSequence):
+    """
+    Represents a list of numbers in a reactive tree, stored in a single array.array buffer.
+
+    The node behaves like a list node, but its items are plain values without nodes of their own, so they cannot be watched
+    individually. Range operations are applied to the buffer at once and emit a single positional change: insertions and deletions
+    emit list insert and delete changes, and assigning a slice of the same length overwrites it in place and emits a list replace
+    change.
+
+    Readers can access the buffer without copying it through view() or, if NumPy is installed, numpy(). Such views see later
+    in-place writes. Resizing a buffer that is still viewed moves the node to a copy, so the view keeps the old items.
+
+    Plain lists are always stored in list nodes. Lists of integers or floats wrapped with compact() are stored in an array instead,
+    which accepts the same values as a list: a value of another type, e.g. a string, None or an integer in a list of floats, makes
+    the parent replace the array with a list node holding the modified items, and a single change is emitted. References to the
+    array must be looked up again afterwards. Until then, the items of such an array cannot be watched or reached with get_child(),
+    although their dotted paths work with the [] operator. Arrays built from typed arrays or NumPy arrays convert new values to
+    their type instead, and raise a ValueError for values that cannot be converted.
+
+    :param key: The key of the node.
+    :param typecode: The array.array typecode of the items. Defaults to 'd'.
+    """
+
+    def __init__(self, key: str, typecode: str = "d", validate_key: bool = True):
+        if typecode not in _NUMERIC_TYPECODES:
+            raise ValueError(f"Typecode {typecode!r} is not numeric")
+
+        super().__init__(key, validate_key)
+
+        self._array = array.array(typecode)
+
+        # whether the array stores a list given to compact(), and falls back to a list node for other values
+        self._auto_selected = False
+
+    def get_value_repr(self) -> str:
+        return "array"
+
+    def get_typecode(self) -> str:
+        """
+        Returns the array.array typecode of the items.
+        """
+
+        return self._array.typecode
+
+    def create_index(self, field: Optional[str] = None):
+        raise TypeError("The items of array nodes have no nodes of their own and cannot be indexed")
+
+    def find(self, value: Any, field: Optional[str] = None) -> list[int]:
+        """
+        Returns the positions of the items equal to the given value by scanning the array, as array nodes cannot be indexed.
+
+        :param value: The value to look for.
+        :param field: Must be None, as the items have no fields.
+
+        :return: The positions of the matching items in ascending order.
+        """
+
+        self._track_read(DependencyKind.STRUCTURE)
+        if field is not None:
+            return []
+
+        return [i for i, item in enumerate(self._array) if item == value]
+
+    def accepts(self, values: Any) -> bool:
+        """
+        Returns whether the given values can be stored in this array without changing their JSON representation.
+
+        :param values: The values to check.
+        """
+
+        return array_typecode(values) == self._array.typecode
+
+    def _coerce(self, values: Any) -> Optional[array.array]:
+        """
+        Converts values to the type of this array.
+
+        :param values: The values to convert.
+
+        :raises ValueError: If the values cannot be converted and the array does not fall back to a list node.
+
+        :return: The converted values, or None if the values do not fit an automatically selected array.
+        """
+
+        if isinstance(values, ReactiveNode):
+            values = values.json()
+
+        # automatically selected arrays only take values that keep their JSON representation, so integers never become floats
+        if self._auto_selected and len(values):
+            typecode = array_typecode(values)
+            if typecode is None or (typecode in _INTEGER_TYPECODES) != (self._array.typecode in _INTEGER_TYPECODES):
+                return None
+
+        try:
+            return _to_array(self._array.typecode, values)
+        except (TypeError, OverflowError) as e:
+            if self._auto_selected:
+                return None
+            raise ValueError(f"Values cannot be stored in an array of type {self._array.typecode!r}: {e}") from e
+
+    def _fall_back(self, modify: Callable[[list], Any]):
+        """
+        Replaces this array with a list node after a modification that the array cannot hold. The modification is applied to the
+        items as a plain list, and the parent swaps the nodes and emits a single change.
+
+        :param modify: Applies the modification to a list of the current items.
+
+        :raises ValueError: If the array has no parent to replace it.
+        """
+
+        with self._optional_namespace_lock():
+            if self._parent is None:
+                raise ValueError(f"Values cannot be stored in an array of type {self._array.typecode!r}")
+
+            items = self._array.tolist()
+            modify(items)
+            self._parent._replace_child(self, ReactiveListNode.build_list(self.get_key(), items))  # pylint: disable=protected-access
+
+    def _normalize_index(self, index: int) -> int:
+        if index < 0:
+            index += len(self._array)
+
+        if not 0 <= index < len(self._array):
+            raise IndexError(f"Index {index} out of bounds")
+
+        return index
+
+    def _resize(self, start: int, stop: int, values: array.array):
+        try:
+            self._array[start:stop] = values
+        except BufferError:
+            # a reader still holds a view of the buffer, which cannot be resized. The reader keeps the old buffer
+            self._array = array.array(self._array.typecode, self._array)
+            self._array[start:stop] = values
+
+    def _insert_values(self, index: int, values: array.array):
+        """
+        Inserts values at the given position and emits one change for all of them.
+
+        :param index: The position to insert the values at.
+        :param values: The values to insert, already converted to the type of this array.
+
+        :raises IndexError: If the index is out of bounds.
+        """
+
+        with self._optional_namespace_lock():
+            if not 0 <= index <= len(self._array):
+                raise IndexError(f"Index {index} out of bounds")
+            if not values:
+                return
+
+            self._resize(index, index, values)
+            self._invalidate_cached_forms()
+
+            namespace = self.get_namespace()
+            if namespace:
+                namespace.invoke_watcher(ListInsertChange(path=self._get_path_tuple(), index=index, values=values.tolist()))
+
+    def _delete_values(self, start: int, stop: int):
+        """
+        Removes the values in the given range and emits one change for all of them.
+
+        :param start: The position of the first value to remove.
+        :param stop: The position after the last value to remove.
+        """
+
+        with self._optional_namespace_lock():
+            start = min(start, len(self._array))
+            stop = min(max(start, stop), len(self._array))
+            if start == stop:
+                return
+
+            self._resize(start, stop, array.array(self._array.typecode))
+            self._invalidate_cached_forms()
+
+            namespace = self.get_namespace()
+            if namespace:
+                namespace.invoke_watcher(ListDeleteChange(path=self._get_path_tuple(), index=start, count=stop - start))
+
+    def _replace_values(self, index: int, values: array.array):
+        """
+        Overwrites the values starting at the given position in place and emits one change for all of them. Nothing is emitted if the
+        values did not change.
+
+        :param index: The position of the first value to overwrite.
+        :param values: The new values, already converted to the type of this array. They must fit into the array.
+        """
+
+        with self._optional_namespace_lock():
+            stop = index + len(values)
+            if not 0 <= index <= stop <= len(self._array):
+                raise IndexError(f"Range {index}:{stop} out of bounds")
+            if self._array[index:stop] == values:
+                return
+
+            self._array[index:stop] = values
+            self._invalidate_cached_forms()
+
+            namespace = self.get_namespace()
+            if namespace:
+                namespace.invoke_watcher(ListReplaceChange(path=self._get_path_tuple(), index=index, values=values.tolist()))
+
+    def _splice(self, start: int, stop: int, values: array.array):
+        # the overlapping part is overwritten in place and only the difference in length is inserted or deleted
+        with self._optional_namespace_lock():
+            overlap = min(stop - start, len(values))
+            if overlap:
+                self._replace_values(start, values[:overlap])
+            if len(values) > overlap:
+                self._insert_values(start + overlap, values[overlap:])
+            else:
+                self._delete_values(start + overlap, stop)
+
+    def update_from(self, data: Any):
+        """
+        Changes the items to the given values. Only the range between the common prefix and suffix is changed, so a series that was
+        modified in one place emits a single change.
+
+        :param data: The new values.
+
+        :raises ValueError: If the values cannot be stored in this array and it does not fall back to a list node.
+        """
+
+        data = _as_sequence(data)
+        values = self._coerce(data)
+        if values is None:
+            self._fall_back(lambda items: items.__setitem__(slice(None), _to_list(data)))
+            return
+
+        with self._optional_namespace_lock():
+            current = self._array
+            limit = min(len(current), len(values))
+            prefix = _common_prefix(current, values, limit)
+            suffix = _common_suffix(current, values, limit - prefix)
+
+            self._splice(prefix, len(current) - suffix, values[prefix : len(values) - suffix])
+
+    def view(self) -> memoryview:
+        """
+        Returns a read-only view of the buffer without copying it.
+        """
+
+        self._track_read(DependencyKind.STRUCTURE)
+        return memoryview(self._array).toreadonly()
+
+    def numpy(self) -> "numpy.ndarray":
+        """
+        Returns a read-only NumPy array sharing the buffer, without copying it.
+
+        :raises ImportError: If NumPy is not installed.
+        """
+
+        if numpy is None:
+            raise ImportError("NumPy is not installed")
+
+        self._track_read(DependencyKind.STRUCTURE)
+        result = numpy.frombuffer(self._array, dtype=self._array.typecode)
+        result.flags.writeable = False
+        return result
+
+    def __getitem__(self, index: int | slice) -> UnpackedType:
+        # the items have no nodes of their own, so every read depends on the whole array
+        self._track_read(DependencyKind.STRUCTURE)
+        if isinstance(index, slice):
+            return self._array[index].tolist()
+
+        return self._array[self._normalize_index(index)]
+
+    def __setitem__(self, index: int | slice, value: Any):
+        if not isinstance(index, slice):
+            values = self._coerce([value])
+            if values is None:
+                self._fall_back(lambda items: items.__setitem__(index, value))
+                return
+
+            self._replace_values(self._normalize_index(index), values)
+            return
+
+        value = _as_sequence(value)
+        values = self._coerce(value)
+        if values is None:
+            self._fall_back(lambda items: items.__setitem__(index, _to_list(value)))
+            return
+
+        start, stop, step = index.indices(len(self._array))
+        if step == 1:
+            self._splice(start, max(start, stop), values)
+            return
+
+        indices = range(start, stop, step)
+        if len(values) != len(indices):
+            raise ValueError(f"Attempt to assign sequence of size {len(values)} to extended slice of size {len(indices)}")
+
+        with self._optional_namespace_lock():
+            for k, i in enumerate(indices):
+                self._replace_values(i, values[k : k + 1])
+
+    def __delitem__(self, index: int | slice):
+        if not isinstance(index, slice):
+            index = self._normalize_index(index)
+            self._delete_values(index, index + 1)
+            return
+
+        start, stop, step = index.indices(len(self._array))
+        if step == 1:
+            self._delete_values(start, stop)
+            return
+
+        # delete extended slices back to front, so that the remaining indices stay valid
+        with self._optional_namespace_lock():
+            for i in sorted(range(start, stop, step), reverse=True):
+                self._delete_values(i, i + 1)
+
+    def __len__(self) -> int:
+        self._track_read(DependencyKind.STRUCTURE)
+        return len(self._array)
+
+    def __iter__(self):
+        self._track_read(DependencyKind.STRUCTURE)
+        return iter(self._array)
+
+    def __contains__(self, value: Any) -> bool:
+        self._track_read(DependencyKind.STRUCTURE)
+        return value in self._array
+
+    def insert(self, index: int, value: Any):
+        values = self._coerce([value])
+        if values is None:
+            self._fall_back(lambda items: items.insert(index, value))
+            return
+
+        # follow the semantics of list.insert for out of bounds indices
+        with self._optional_namespace_lock():
+            if index < 0:
+                index = max(index + len(self._array), 0)
+            self._insert_values(min(index, len(self._array)), values)
+
+    def append(self, value: Any):
+        values = self._coerce([value])
+        if values is None:
+            self._fall_back(lambda items: items.append(value))
+            return
+
+        with self._optional_namespace_lock():
+            self._insert_values(len(self._array), values)
+
+    def extend(self, values: Iterable[Any]):
+        values = _as_sequence(values)
+        converted = self._coerce(values)
+        if converted is None:
+            self._fall_back(lambda items: items.extend(_to_list(values)))
+            return
+
+        with self._optional_namespace_lock():
+            self._insert_values(len(self._array), converted)
+
+    def __iadd__(self, values: Iterable[Any]) -> "ReactiveArrayNode":
+        self.extend(values)
+        return self
+
+    def pop(self, index: int = -1) -> UnpackedType:
+        with self._optional_namespace_lock():
+            index = self._normalize_index(index)
+            value = self._array[index]
+            self._delete_values(index, index + 1)
+            return value
+
+    def remove(self, value: Any):
+        with self._optional_namespace_lock():
+            index = self._array.index(value)
+            self._delete_values(index, index + 1)
+
+    def clear(self):
+        self._delete_values(0, len(self._array))
+
+    def is_leaf(self) -> bool:
+        return not self._array
+
+    def _freeze(self) -> tuple:
+        return tuple(self._array)
+
+    def _build_json(self) -> list:
+        return self._array.tolist()
+
+    def _encode(self) -> str:
+        return json.dumps(self._array.tolist())
+
+    def __str__(self) -> str:
+        return f"ReactiveArrayNode({self._array.typecode!r}, {len(self._array)} items)"
+
+    def unpack(self) -> "ReactiveArrayNode":
+        return self
+
+    @staticmethod
+    def build_array(key: str, values: Any, typecode: Optional[str] = None) -> "ReactiveArrayNode":
+        """
+        Builds a detached array node holding the given values.
+
+        :param key: The key of the node.
+        :param values: The numbers to store. A list, a typed array or a one-dimensional NumPy array.
+        :param typecode: The typecode of the array. Defaults to the one given by array_typecode().
+
+        :raises ValueError: If the values cannot be stored in an array.
+
+        :return: The new node.
+        """
+
+        typecode = typecode or array_typecode(values)
+        if typecode is None:
+            raise ValueError("Values must be homogeneous numbers to be stored in an array")
+
+        node = ReactiveArrayNode(key, typecode, validate_key=False)
+        node._array = node._coerce(values)  # pylint: disable=protected-access
+        return node
+
+    @staticmethod
+    def build_compact(key: str, data: "CompactList") -> ReactiveNode:
+        """
+        Builds a detached node for a list given to compact(). Lists of integers or floats are stored in an array node that falls back
+        to a list node once it is given a value of another type, all others in a list node.
+
+        :param key: The key of the node.
+        :param data: The items of the list.
+
+        :return: The new node.
+        """
+
+        typecode = array_typecode(data)
+        if typecode is None:
+            return ReactiveListNode.build_list(key, list(data))
+
+        node = ReactiveArrayNode.build_array(key, data, typecode)
+        node._auto_selected = True  # pylint: disable=protected-access
+        return node
+
+
+class CompactList(list):
+    """
+    A list whose numbers are stored in a single array node instead of one node per item. Created with compact().
+    """
+
+
+def compact(values: Iterable[Any]) -> CompactList:
+    """
+    Marks a list of numbers to be stored in an array node when it is added to the tree. The array saves memory and turns range
+    operations into single changes, but its items cannot be watched individually. It behaves like a list otherwise and is replaced
+    with a list node once it is given a value that is not a number of the same kind.
+
+    :param values: The items of the list.
+
+    :return: The marked list.
+    """
+
+    return CompactList(values)
+
+
+ReactiveNode.PACK_METHODS[CompactList] = ReactiveArrayNode.build_compact
+ReactiveNode.PACK_METHODS[array.array] = ReactiveArrayNode.build_array
+if numpy is not None:
+    ReactiveNode.PACK_METHODS[numpy.ndarray] = ReactiveArrayNode.build_array
@@ -0,0 +1,94 @@
+"""
+Provides a buffer that coalesces the changes of a batch before they are dispatched.
+"""
+
+from typing import Optional
+from .changes import Change, AddChange, RemoveChange, UpdateChange
+from .watcher import Watcher
+
+
+class ChangeBatch:
+    """
+    Buffers the changes of a batch together with the watchers they matched when they occurred.
+
+    Repeated updates of the same path collapse so that the last write wins, and a child that is added and removed again within the
+    batch is dropped together with all changes below it. Positional list changes shift the meaning of paths, so updates and
+    additions before them are never coalesced with changes after them.
+    """
+
+    def __init__(self):
+        self._entries: list[Optional[tuple[Change, list[Watcher]]]] = []
+        self._updates: dict[tuple[str, ...], int] = {}
+        self._adds: dict[tuple[str, ...], int] = {}
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self._entries if entry is not None)
+
+    def add(self, change: Change, watchers: list[Watcher]):
+        """
+        Adds a change to the batch.
+
+        :param change: The change to add.
+        :param watchers: The watchers that matched the change.
+        """
+
+        if isinstance(change, UpdateChange):
+            path = tuple(change.path)
+            previous = self._updates.get(path)
+            if previous is not None:
+                self._entries[previous] = None
+            self._updates[path] = len(self._entries)
+
+        elif isinstance(change, AddChange):
+            self._adds[tuple(change.path) + (change.key,)] = len(self._entries)
+
+        elif isinstance(change, RemoveChange):
+            path = tuple(change.path) + (change.key,)
+            added = self._adds.pop(path, None)
+            if added is not None:
+                self._drop_subtree(added, path)
+                return
+
+        else:
+            self._updates.clear()
+            self._adds.clear()
+
+        self._entries.append((change, watchers))
+
+    def _drop_subtree(self, start: int, path: tuple[str, ...]):
+        """
+        Drops the entry at the given position and all following entries that describe changes at or below the given path.
+
+        :param start: The position of the addition that is dropped.
+        :param path: The path of the added child.
+        """
+
+        self._entries[start] = None
+
+        for i in range(start + 1, len(self._entries)):
+            entry = self._entries[i]
+            if entry is not None and tuple(entry[0].path[: len(path)]) == path:
+                self._entries[i] = None
+
+    def get_changes(self) -> list[Change]:
+        """
+        Returns the coalesced changes in the order they occurred.
+        """
+
+        return [entry[0] for entry in self._entries if entry is not None]
+
+    def group_by_watcher(self) -> dict[Watcher, list[Change]]:
+        """
+        Returns the coalesced changes grouped by the watchers they matched. Each list keeps the order in which the changes occurred.
+        """
+
+        groups: dict[Watcher, list[Change]] = {}
+        for entry in self._entries:
+            if entry is None:
+                continue
+
+            change, watchers = entry
+            for watcher in watchers:
+                groups.setdefault(watcher, []).append(change)
+
+        return groups
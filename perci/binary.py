@@ -0,0 +1,405 @@
+"""
+Provides a compact binary wire format for change streams.
+
+A stream is a sequence of records, each prefixed with its length as a varint. A record starts with the change type, followed by the
+path and the fields of the change:
+
+- Paths are encoded relative to the path of the previous change, as the number of leading keys they share with it followed by the
+  remaining keys.
+- Keys are taken from a dictionary that the encoder and decoder build up in lockstep. A key is sent in full the first time it occurs
+  and as its dictionary index afterwards.
+- Values are packed by type, using zigzag varints for integers, 8 byte doubles for floats and length-prefixed UTF-8 for strings.
+
+Encoder and decoder are stateful, so a stream must be decoded from its start by a single decoder.
+"""
+
+import struct
+from typing import Any, Iterator, Union
+from .changes import Change, ChangeType, AddChange, RemoveChange, UpdateChange, ListInsertChange, ListDeleteChange, ListMoveChange, ListReplaceChange, ListSpliceChange
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+_CHANGE_TYPES = (ChangeType.ADD, ChangeType.REMOVE, ChangeType.UPDATE, ChangeType.LIST_INSERT, ChangeType.LIST_DELETE, ChangeType.LIST_MOVE, ChangeType.LIST_REPLACE, ChangeType.LIST_SPLICE)
+_CHANGE_TAGS = {change_type: tag for tag, change_type in enumerate(_CHANGE_TYPES)}
+_ADD, _REMOVE, _UPDATE, _LIST_INSERT, _LIST_DELETE, _LIST_MOVE, _LIST_REPLACE, _LIST_SPLICE = range(len(_CHANGE_TYPES))
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _DICT = range(8)
+
+# the lowest two bits of a key reference tell how the key is sent
+_KEY_KNOWN, _KEY_NEW, _KEY_LITERAL = range(3)
+
+_DOUBLE = struct.Struct("<d")
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: memoryview, pos: int) -> tuple[int, int]:
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+
+    result = byte & 0x7F
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class ChangeEncoder:
+    """
+    Encodes changes into the binary wire format.
+
+    :param max_keys: The maximum size of the key dictionary. Keys that occur after it is full are always sent in full.
+    """
+
+    def __init__(self, max_keys: int = 65536):
+        self.max_keys = max_keys
+
+        self._keys: dict[str, int] = {}
+        self._path: tuple[str, ...] = ()
+        self._record = bytearray()
+
+    def reset(self):
+        """
+        Forgets the key dictionary and the previous path, e.g. to start a new stream.
+        """
+
+        self._keys.clear()
+        self._path = ()
+
+    def _write_key(self, out: bytearray, key: str):
+        index = self._keys.get(key)
+        if index is not None:
+            _write_varint(out, index << 2 | _KEY_KNOWN)
+            return
+
+        encoded = key.encode()
+        if len(self._keys) < self.max_keys:
+            self._keys[key] = len(self._keys)
+            _write_varint(out, len(encoded) << 2 | _KEY_NEW)
+        else:
+            _write_varint(out, len(encoded) << 2 | _KEY_LITERAL)
+        out += encoded
+
+    def _write_value(self, out: bytearray, value: Any):
+        # bool is a subclass of int, so it has to be checked first
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, int):
+            out.append(_INT)
+            _write_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(value)
+        elif isinstance(value, str):
+            encoded = value.encode()
+            out.append(_STR)
+            _write_varint(out, len(encoded))
+            out += encoded
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self._write_value(out, item)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                self._write_key(out, key)
+                self._write_value(out, item)
+        else:
+            raise ValueError(f"Cannot encode value {value!r} of unsupported type {type(value)}")
+
+    def encode_into(self, change: Change, out: bytearray):
+        """
+        Appends the record of a change to a buffer.
+
+        :param change: The change to encode.
+        :param out: The buffer to append to.
+
+        :raises ValueError: If the change contains a value of an unsupported type. The encoder is left as it was, so the stream
+            stays decodable.
+        """
+
+        keys = self._keys
+        size = len(keys)
+        try:
+            self._encode_record(change)
+        except BaseException:
+            # the keys added for the failed record are the newest ones, and the decoder never sees them
+            while len(keys) > size:
+                keys.popitem()
+            raise
+
+        self._path = change.path
+
+        record = self._record
+        _write_varint(out, len(record))
+        out += record
+
+    def _encode_record(self, change: Change):
+        # encodes a change into the record buffer. Only the key dictionary is updated, so that a failure can be rolled back
+        tag = _CHANGE_TAGS[change.change_type]
+
+        record = self._record
+        record.clear()
+        record.append(tag)
+
+        # encode the path relative to the previous one
+        path = change.path
+        previous = self._path
+        common = 0
+        limit = min(len(path), len(previous))
+        while common < limit and path[common] == previous[common]:
+            common += 1
+
+        _write_varint(record, common)
+        _write_varint(record, len(path) - common)
+        for key in path[common:]:
+            self._write_key(record, key)
+
+        if tag == _UPDATE:
+            self._write_value(record, change.value)
+        elif tag == _ADD:
+            self._write_key(record, change.key)
+            self._write_key(record, change.repr)
+            self._write_value(record, change.value)
+        elif tag == _REMOVE:
+            self._write_key(record, change.key)
+        elif tag in (_LIST_INSERT, _LIST_REPLACE):
+            _write_varint(record, change.index)
+            self._write_value(record, change.values)
+        elif tag == _LIST_DELETE:
+            _write_varint(record, change.index)
+            _write_varint(record, change.count)
+        elif tag == _LIST_SPLICE:
+            _write_varint(record, change.index)
+            _write_varint(record, change.count)
+            self._write_value(record, change.values)
+        else:
+            _write_varint(record, change.index)
+            _write_varint(record, change.target)
+
+    def encode(self, change: Change) -> bytes:
+        """
+        Returns the record of a single change.
+
+        :param change: The change to encode.
+        """
+
+        out = bytearray()
+        self.encode_into(change, out)
+        return bytes(out)
+
+    def encode_all(self, changes: list[Change]) -> bytes:
+        """
+        Returns the records of several changes.
+
+        :param changes: The changes to encode, in the order they occurred.
+        """
+
+        out = bytearray()
+        for change in changes:
+            self.encode_into(change, out)
+        return bytes(out)
+
+
+class ChangeDecoder:
+    """
+    Decodes changes from the binary wire format. Records are read straight from the given buffers without copying them.
+    """
+
+    def __init__(self):
+        self._keys: list[str] = []
+        self._path: tuple[str, ...] = ()
+        self._pending = bytearray()
+
+    def reset(self):
+        """
+        Forgets the key dictionary, the previous path and any incomplete record, e.g. to start a new stream.
+        """
+
+        self._keys.clear()
+        self._path = ()
+        self._pending.clear()
+
+    def _read_key(self, data: memoryview, pos: int) -> tuple[str, int]:
+        reference, pos = _read_varint(data, pos)
+        kind = reference & 3
+        if kind == _KEY_KNOWN:
+            return self._keys[reference >> 2], pos
+
+        end = pos + (reference >> 2)
+        key = str(data[pos:end], "utf-8")
+        if kind == _KEY_NEW:
+            self._keys.append(key)
+        return key, end
+
+    def _read_value(self, data: memoryview, pos: int) -> tuple[Any, int]:
+        tag = data[pos]
+        pos += 1
+
+        if tag == _INT:
+            value, pos = _read_varint(data, pos)
+            return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+        elif tag == _STR:
+            length, pos = _read_varint(data, pos)
+            return str(data[pos : pos + length], "utf-8"), pos + length
+        elif tag == _FLOAT:
+            return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+        elif tag == _NONE:
+            return None, pos
+        elif tag == _TRUE:
+            return True, pos
+        elif tag == _FALSE:
+            return False, pos
+        elif tag == _LIST:
+            count, pos = _read_varint(data, pos)
+            items = []
+            for _ in range(count):
+                item, pos = self._read_value(data, pos)
+                items.append(item)
+            return items, pos
+        elif tag == _DICT:
+            count, pos = _read_varint(data, pos)
+            items = {}
+            for _ in range(count):
+                key, pos = self._read_key(data, pos)
+                items[key], pos = self._read_value(data, pos)
+            return items, pos
+        else:
+            raise ValueError(f"Unknown value tag {tag}")
+
+    def _read_change(self, data: memoryview, pos: int) -> Change:
+        tag = data[pos]
+        pos += 1
+        if tag >= len(_CHANGE_TYPES):
+            raise ValueError(f"Unknown change tag {tag}")
+
+        common, pos = _read_varint(data, pos)
+        count, pos = _read_varint(data, pos)
+        keys = []
+        for _ in range(count):
+            key, pos = self._read_key(data, pos)
+            keys.append(key)
+
+        path = self._path[:common] + tuple(keys) if keys else self._path[:common]
+        self._path = path
+
+        if tag == _UPDATE:
+            value, pos = self._read_value(data, pos)
+            return UpdateChange(path=path, value=value)
+        elif tag == _ADD:
+            key, pos = self._read_key(data, pos)
+            value_repr, pos = self._read_key(data, pos)
+            value, pos = self._read_value(data, pos)
+            return AddChange(path=path, key=key, repr=value_repr, value=value)
+        elif tag == _REMOVE:
+            key, pos = self._read_key(data, pos)
+            return RemoveChange(path=path, key=key)
+        elif tag == _LIST_INSERT:
+            index, pos = _read_varint(data, pos)
+            values, pos = self._read_value(data, pos)
+            return ListInsertChange(path=path, index=index, values=values)
+        elif tag == _LIST_DELETE:
+            index, pos = _read_varint(data, pos)
+            count, pos = _read_varint(data, pos)
+            return ListDeleteChange(path=path, index=index, count=count)
+        elif tag == _LIST_REPLACE:
+            index, pos = _read_varint(data, pos)
+            values, pos = self._read_value(data, pos)
+            return ListReplaceChange(path=path, index=index, values=values)
+        elif tag == _LIST_SPLICE:
+            index, pos = _read_varint(data, pos)
+            count, pos = _read_varint(data, pos)
+            values, pos = self._read_value(data, pos)
+            return ListSpliceChange(path=path, index=index, count=count, values=values)
+        else:
+            index, pos = _read_varint(data, pos)
+            target, pos = _read_varint(data, pos)
+            return ListMoveChange(path=path, index=index, target=target)
+
+    def iter_records(self, data: Buffer) -> Iterator[tuple[Change, int]]:
+        """
+        Decodes the complete records of a buffer.
+
+        :param data: The buffer to decode. It may end with an incomplete record, which is not consumed.
+
+        :return: An iterator of the changes together with the offset after their record.
+        """
+
+        view = memoryview(data)
+        pos = 0
+        size = len(view)
+
+        while pos < size:
+            try:
+                length, start = _read_varint(view, pos)
+            except IndexError:
+                return
+
+            end = start + length
+            if end > size:
+                return
+
+            yield self._read_change(view[:end], start), end
+            pos = end
+
+    def decode(self, data: Buffer) -> list[Change]:
+        """
+        Decodes a buffer that holds complete records only.
+
+        :param data: The buffer to decode.
+
+        :raises ValueError: If the buffer ends with an incomplete record.
+
+        :return: The changes.
+        """
+
+        changes = []
+        end = 0
+        for change, end in self.iter_records(data):
+            changes.append(change)
+
+        if end != len(data):
+            raise ValueError("The buffer ends with an incomplete record")
+
+        return changes
+
+    def feed(self, data: Buffer) -> list[Change]:
+        """
+        Decodes the next chunk of a stream. Records may be split across chunks; an incomplete record at the end of a chunk is kept
+        until the rest of it arrives.
+
+        :param data: The next chunk.
+
+        :return: The changes of all records completed by the chunk.
+        """
+
+        if self._pending:
+            self._pending += data
+            data = self._pending
+
+        changes = []
+        end = 0
+        for change, end in self.iter_records(data):
+            changes.append(change)
+
+        # only the incomplete tail is copied. A new buffer is used, as the old one may still be exported to a view
+        self._pending = bytearray(memoryview(data)[end:])
+
+        return changes
@@ -0,0 +1,308 @@
+"""
+Provides a persistent, append-only log of the changes of a namespace, from which the tree can be restored after a restart.
+
+A log directory holds numbered segments and checkpoints:
+
+- `checkpoint-<n>.json` holds the JSON representation of the tree at the start of segment n.
+- `segment-<n>.log` holds the changes made after checkpoint n in the binary wire format of perci.binary. Every segment starts with
+  a fresh key dictionary, so it can be decoded on its own.
+
+Changes are encoded into a buffer while the namespace lock is held and written by a background thread, which commits all changes
+that arrived since its last write at once. After a configurable number of changes, the thread takes a new checkpoint, starts a new
+segment and deletes the older files. Restoring a tree therefore loads the latest checkpoint and replays only the changes made since.
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+from typing import TYPE_CHECKING, Iterator, Optional
+from .binary import ChangeEncoder, ChangeDecoder
+from .changes import Change
+from .node import ReactiveNode
+from .patch import apply_patch, change_to_patch
+
+if TYPE_CHECKING:
+    from .namespace import ReactiveNamespace
+
+logger = logging.getLogger(__name__)
+
+_FILE_PATTERN = re.compile(r"(checkpoint|segment)-(\d+)\.(json|log)")
+
+
+def _checkpoint_path(directory: str, sequence: int) -> str:
+    return os.path.join(directory, f"checkpoint-{sequence:08d}.json")
+
+
+def _segment_path(directory: str, sequence: int) -> str:
+    return os.path.join(directory, f"segment-{sequence:08d}.log")
+
+
+def _sequences(directory: str, kind: str) -> list[int]:
+    sequences = []
+    for name in os.listdir(directory):
+        match = _FILE_PATTERN.fullmatch(name)
+        if match and match.group(1) == kind:
+            sequences.append(int(match.group(2)))
+
+    return sorted(sequences)
+
+
+def read_segment(path: str) -> Iterator[Change]:
+    """
+    Decodes the changes of a log segment. The file is memory-mapped and decoded in place. An incomplete record at its end, left by a
+    write that was interrupted, is ignored.
+
+    :param path: The path of the segment.
+
+    :return: An iterator of the changes, in the order they occurred.
+    """
+
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            records = ChangeDecoder().iter_records(mapped)
+            try:
+                for change, _ in records:
+                    yield change
+            finally:
+                # the decoder holds a view of the mapping, which has to be released before the mapping can be closed
+                records.close()
+
+
+def restore_tree(directory: str) -> ReactiveNode:
+    """
+    Rebuilds a tree from a log directory by loading its latest checkpoint and replaying the changes made since.
+
+    :param directory: The log directory.
+
+    :raises FileNotFoundError: If the directory does not contain a checkpoint.
+
+    :return: The detached root node of the tree.
+    """
+
+    checkpoints = _sequences(directory, "checkpoint")
+    if not checkpoints:
+        raise FileNotFoundError(f"No checkpoint found in {directory}")
+
+    sequence = checkpoints[-1]
+    with open(_checkpoint_path(directory, sequence), "r", encoding="utf-8") as file:
+        checkpoint = json.load(file)
+
+    root = ReactiveNode.build(checkpoint["key"], checkpoint["data"])
+    base_path = (checkpoint["key"],)
+
+    # a checkpoint is written after its segment was started, so segments after it may exist if the process stopped in between
+    segments = [segment for segment in _sequences(directory, "segment") if segment >= sequence]
+    apply_patch(root, (operation for segment in segments for change in read_segment(_segment_path(directory, segment)) for operation in change_to_patch(change, base_path)))
+
+    return root
+
+
+class ChangeLog:
+    """
+    Appends the changes of a namespace to a log directory. Attach it with ReactiveNamespace.attach_change_log().
+
+    A directory that already holds a log must only be attached to the tree restored from it, as new segments continue its history.
+
+    :param directory: The log directory. It is created if it does not exist.
+    :param checkpoint_interval: The number of changes after which a new checkpoint is taken. Defaults to 10000.
+    :param flush_interval: The maximum number of seconds a change is buffered before it is written. Defaults to 0.01.
+    :param flush_size: The buffer size in bytes that triggers a write before the interval has passed. Defaults to 1 MiB.
+    :param sync: Whether to fsync every write, so that committed changes survive a crash of the operating system. Defaults to False.
+    """
+
+    def __init__(self, directory: str, checkpoint_interval: int = 10000, flush_interval: float = 0.01, flush_size: int = 1 << 20, sync: bool = False):
+        if checkpoint_interval < 1:
+            raise ValueError("The checkpoint interval must be at least 1")
+
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.sync = sync
+
+        self._namespace: Optional["ReactiveNamespace"] = None
+        self._encoder = ChangeEncoder()
+        self._buffer = bytearray()
+        self._file = None
+        self._sequence = 0
+        self._since_checkpoint = 0
+
+        # guards the encoder and the buffer. Taken while a stripe of the namespace is held, so it must never wait for the namespace
+        self._lock = threading.Lock()
+        # keeps writes to the segment files in the order their buffers were taken. Always taken after the namespace lock
+        self._write_lock = threading.Lock()
+
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self, namespace: "ReactiveNamespace"):
+        """
+        Starts logging the changes of a namespace with a checkpoint of its current state. Called by the namespace while it holds its
+        lock.
+
+        :param namespace: The namespace to log.
+        """
+
+        if self._namespace is not None:
+            raise ValueError("The change log is already open")
+
+        os.makedirs(self.directory, exist_ok=True)
+        existing = _sequences(self.directory, "checkpoint") + _sequences(self.directory, "segment")
+        self._sequence = max(existing, default=0)
+        self._namespace = namespace
+
+        self.checkpoint()
+
+        self._thread = threading.Thread(target=self._run, name="perci-changelog", daemon=True)
+        self._thread.start()
+
+    def append(self, change: Change):
+        """
+        Buffers a change. Called by the namespace for every change while it holds the lock of the modified node.
+
+        :param change: The change to log.
+        """
+
+        with self._lock:
+            try:
+                self._encoder.encode_into(change, self._buffer)
+                self._since_checkpoint += 1
+            except ValueError:
+                # the tree already changed, so the error must not reach the mutator. The log misses the change until the next
+                # checkpoint, which is therefore taken right away
+                logger.exception("Cannot log change at %s", ".".join(change.path))
+                self._since_checkpoint = self.checkpoint_interval
+
+            wake = len(self._buffer) >= self.flush_size or self._since_checkpoint >= self.checkpoint_interval
+
+        if wake:
+            self._wakeup.set()
+
+    def _write(self, file, data: bytearray):
+        file.write(data)
+        file.flush()
+        if self.sync:
+            os.fsync(file.fileno())
+
+    def flush(self):
+        """
+        Writes all buffered changes to the current segment.
+        """
+
+        with self._write_lock:
+            with self._lock:
+                data, self._buffer = self._buffer, bytearray()
+                file = self._file
+
+            if data and file is not None:
+                try:
+                    self._write(file, data)
+                except BaseException:
+                    # the changes that arrived meanwhile follow these ones, so they go back in front of them
+                    with self._lock:
+                        self._buffer[:0] = data
+                    raise
+
+    def checkpoint(self):
+        """
+        Takes a checkpoint of the tree and starts a new segment. Older checkpoints and segments are deleted once the checkpoint was
+        written. The caller must not hold a stripe of a striped namespace lock.
+        """
+
+        namespace = self._namespace
+        if namespace is None:
+            raise ValueError("The change log is not open")
+
+        # the tree is encoded and the segment switched while all writers are blocked, so the checkpoint matches the start of the new
+        # segment. The files are written once the writers may continue
+        with namespace.lock:
+            self._write_lock.acquire()
+            try:
+                with self._lock:
+                    pending, self._buffer = self._buffer, bytearray()
+                    previous = self._file
+
+                    self._sequence += 1
+                    sequence = self._sequence
+                    self._file = open(_segment_path(self.directory, sequence), "ab")
+                    self._encoder.reset()
+                    self._since_checkpoint = 0
+
+                key = namespace.root.get_key()
+                data = namespace.root.dumps()
+            except BaseException:
+                self._write_lock.release()
+                raise
+
+        try:
+            if previous is not None:
+                try:
+                    if pending:
+                        self._write(previous, pending)
+                finally:
+                    previous.close()
+        except Exception:  # pylint: disable=broad-exception-caught
+            # the pending changes were encoded for the previous segment, so they cannot be written to the new one. The checkpoint
+            # below already contains them, so the log stays complete once it is written
+            logger.exception("Writing the change log to %s failed", self.directory)
+        finally:
+            self._write_lock.release()
+
+        try:
+            temporary = _checkpoint_path(self.directory, sequence) + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                file.write(f'{{"key": {json.dumps(key)}, "data": {data}}}')
+                file.flush()
+                if self.sync:
+                    os.fsync(file.fileno())
+            os.replace(temporary, _checkpoint_path(self.directory, sequence))
+        except BaseException:
+            # the new segment is useless without its checkpoint, so the background thread takes another one
+            with self._lock:
+                self._since_checkpoint = self.checkpoint_interval
+            raise
+
+        for name in os.listdir(self.directory):
+            match = _FILE_PATTERN.fullmatch(name)
+            if match and int(match.group(2)) < sequence:
+                os.remove(os.path.join(self.directory, name))
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            # an error must not stop the thread, as the changes keep arriving. They stay buffered until a write succeeds
+            try:
+                if self._since_checkpoint >= self.checkpoint_interval and not self._closed:
+                    self.checkpoint()
+                else:
+                    self.flush()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Writing the change log to %s failed", self.directory)
+
+    def close(self):
+        """
+        Writes all buffered changes and closes the current segment. Must not be called while the namespace lock is held.
+        """
+
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+        self._namespace = None
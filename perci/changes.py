@@ -2,40 +2,61 @@
 Provides classes for tracking changes in a reactive tree.
 """
 
-from dataclasses import dataclass, field
-from typing import Any
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, ClassVar
 
 
-@dataclass
+class ChangeType(str, Enum):
+    """
+    Enumerates the types of changes. The members compare equal to their string values.
+    """
+
+    ADD = "add"
+    REMOVE = "remove"
+    UPDATE = "update"
+    LIST_INSERT = "list_insert"
+    LIST_DELETE = "list_delete"
+    LIST_MOVE = "list_move"
+    LIST_REPLACE = "list_replace"
+    LIST_SPLICE = "list_splice"
+
+
+@dataclass(frozen=True, slots=True)
 class Change:
     """
-    Represents a single change in a reactive tree.
+    Represents a single change in a reactive tree. Changes are immutable and do not share state with the tree.
 
-    :param change_type: The type of change that occurred.
-    :param path: The path under which the change occurred.
+    :param path: The path under which the change occurred. Any iterable is stored as a tuple.
     """
 
-    change_type: str = field(init=False)
-    path: list[str]
+    change_type: ClassVar[ChangeType]
+
+    path: tuple[str, ...]
 
+    def __post_init__(self):
+        if not isinstance(self.path, tuple):
+            object.__setattr__(self, "path", tuple(self.path))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class AddChange(Change):
     """
-    Represents an addition change in a reactive tree.
+    Represents an addition change in a reactive tree. Adding a whole subtree emits a single change.
 
     :param key: The key of the added child.
+    :param repr: How the added child is represented, e.g. "value", "dict" or "list".
+    :param value: The JSON representation of the added child.
     """
 
+    change_type: ClassVar[ChangeType] = ChangeType.ADD
+
     key: str
     repr: str
     value: Any
 
-    def __post_init__(self):
-        self.change_type = "add"
-
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RemoveChange(Change):
     """
     Represents a removal change in a reactive tree.
@@ -43,13 +64,12 @@ class RemoveChange(Change):
     :param key: The key of the removed child.
     """
 
-    key: str
+    change_type: ClassVar[ChangeType] = ChangeType.REMOVE
 
-    def __post_init__(self):
-        self.change_type = "remove"
+    key: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UpdateChange(Change):
     """
     Represents an update change in a reactive tree.
@@ -57,7 +77,84 @@ class UpdateChange(Change):
     :param value: The new value of the node.
     """
 
+    change_type: ClassVar[ChangeType] = ChangeType.UPDATE
+
     value: Any
 
-    def __post_init__(self):
-        self.change_type = "update"
+
+@dataclass(frozen=True, slots=True)
+class ListInsertChange(Change):
+    """
+    Represents an insertion into a list node. All items at or after the index are shifted up.
+
+    :param index: The position of the first inserted item.
+    :param values: The JSON representations of the inserted items.
+    """
+
+    change_type: ClassVar[ChangeType] = ChangeType.LIST_INSERT
+
+    index: int
+    values: list
+
+
+@dataclass(frozen=True, slots=True)
+class ListDeleteChange(Change):
+    """
+    Represents a deletion from a list node. All items after the deleted range are shifted down.
+
+    :param index: The position of the first deleted item.
+    :param count: The number of deleted items.
+    """
+
+    change_type: ClassVar[ChangeType] = ChangeType.LIST_DELETE
+
+    index: int
+    count: int = 1
+
+
+@dataclass(frozen=True, slots=True)
+class ListMoveChange(Change):
+    """
+    Represents moving an item of a list node to another position. The items in between are shifted by one to make room.
+
+    :param index: The position of the item before the move.
+    :param target: The position of the item after the move.
+    """
+
+    change_type: ClassVar[ChangeType] = ChangeType.LIST_MOVE
+
+    index: int
+    target: int
+
+
+@dataclass(frozen=True, slots=True)
+class ListReplaceChange(Change):
+    """
+    Represents overwriting a range of items of a list in place. No items are shifted.
+
+    :param index: The position of the first overwritten item.
+    :param values: The JSON representations of the new items.
+    """
+
+    change_type: ClassVar[ChangeType] = ChangeType.LIST_REPLACE
+
+    index: int
+    values: list
+
+
+@dataclass(frozen=True, slots=True)
+class ListSpliceChange(Change):
+    """
+    Represents replacing a range of items of a list node with a different number of new items. All items after the range are
+    shifted by the difference.
+
+    :param index: The position of the first replaced item.
+    :param count: The number of replaced items.
+    :param values: The JSON representations of the new items.
+    """
+
+    change_type: ClassVar[ChangeType] = ChangeType.LIST_SPLICE
+
+    index: int
+    count: int
+    values: list
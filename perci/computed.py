@@ -0,0 +1,280 @@
+"""
+Provides computed values that are derived from a reactive tree and cached until a change affects the paths they read.
+
+While a computed value is evaluated, every read of a node records the path of the node and how much of it was read: the value of
+a leaf, the keys of a dict or the length of a list, or a whole subtree, e.g. through json(). The namespace keeps these dependencies
+in a trie and invalidates the computed value once a change hits one of them. The value is evaluated again on its next read, so
+changes to unrelated parts of the tree cost nothing beyond a lookup in the trie.
+
+A computed value can be stored in the tree like any other value. It then becomes a read-only leaf that can be watched: if a
+watcher matches its path, it is evaluated again right after the change or batch that invalidated it, and an update change is
+emitted if its value changed.
+"""
+
+import json
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Optional
+from .node import ReactiveNode, _read_tracking, _NOT_CACHED
+from .dependencies import DependencyKind
+from .changes import UpdateChange
+from .types import AtomicType
+
+if TYPE_CHECKING:
+    from .namespace import ReactiveNamespace
+
+
+class CyclicComputationError(RuntimeError):
+    """
+    Raised when a computed value reads itself while it is being evaluated.
+    """
+
+
+class _ReadTracker:
+    """
+    Collects the reads of a single evaluation of a computed value.
+    """
+
+    __slots__ = ("dependencies", "change_counts", "computed")
+
+    def __init__(self):
+        self.dependencies: dict["ReactiveNamespace", dict[tuple[str, ...], DependencyKind]] = {}
+        self.change_counts: dict["ReactiveNamespace", int] = {}
+        self.computed: list["Computed"] = []
+
+    def record(self, node: ReactiveNode, kind: DependencyKind, keys: tuple[str, ...]):
+        namespace = node.get_namespace()
+        if namespace is None:
+            return
+
+        dependencies = self.dependencies.get(namespace)
+        if dependencies is None:
+            dependencies = self.dependencies[namespace] = {}
+            self.change_counts[namespace] = namespace.change_count
+
+        path = node._get_path_tuple() + keys if keys else node._get_path_tuple()  # pylint: disable=protected-access
+        if dependencies.get(path, -1) < kind:
+            dependencies[path] = kind
+
+
+class Computed:
+    """
+    Caches the result of a function of the tree and evaluates it again only after a change affected the nodes it read.
+
+    :param function: Computes the value from the tree. It is called without arguments and must not modify the tree.
+    """
+
+    def __init__(self, function: Callable[[], Any]):
+        self.function = function
+
+        self._value: Any = None
+        self._valid = False
+        self._version = 0
+        self._namespaces: set["ReactiveNamespace"] = set()
+
+        # computed values that read this one and have to be invalidated with it
+        self._dependents: weakref.WeakSet["Computed"] = weakref.WeakSet()
+        self._listener: Optional[Callable[[], None]] = None
+
+        self._lock = threading.RLock()
+        self._state_lock = threading.Lock()
+        self._evaluating = False
+
+    def is_valid(self) -> bool:
+        """
+        Returns whether the cached value is up to date.
+        """
+
+        return self._valid
+
+    def peek(self) -> Any:
+        """
+        Returns the cached value without evaluating the function, even if it is outdated.
+        """
+
+        return self._value
+
+    def get(self) -> Any:
+        """
+        Returns the value, evaluating the function first if a change affected it since the last evaluation.
+
+        :raises CyclicComputationError: If the value is read while it is being evaluated on the same thread.
+        """
+
+        tracker = _read_tracking.tracker
+        if tracker is not None:
+            tracker.computed.append(self)
+
+        if self._valid:
+            return self._value
+
+        with self._lock:
+            if self._evaluating:
+                raise CyclicComputationError("Computed value depends on itself")
+            if not self._valid:
+                self._evaluate()
+
+            return self._value
+
+    __call__ = get
+
+    def _evaluate(self):
+        version = self._version
+        tracker = _ReadTracker()
+
+        previous = _read_tracking.tracker
+        _read_tracking.tracker = tracker
+        self._evaluating = True
+        try:
+            value = self.function()
+        finally:
+            self._evaluating = False
+            _read_tracking.tracker = previous
+
+        # a change that occurred during the evaluation may have missed the dependencies, so the value is only cached if the tree did
+        # not change in between
+        changed = False
+        for namespace in self._namespaces | set(tracker.dependencies):
+            change_count = namespace.set_dependencies(self, tracker.dependencies.get(namespace, {}))
+            if change_count != tracker.change_counts.get(namespace, change_count):
+                changed = True
+        self._namespaces = set(tracker.dependencies)
+
+        for inner in tracker.computed:
+            inner._dependents.add(self)  # pylint: disable=protected-access
+            if not inner._valid:  # pylint: disable=protected-access
+                changed = True
+
+        with self._state_lock:
+            self._value = value
+            self._valid = not changed and self._version == version
+
+    def invalidate(self):
+        """
+        Marks the value as outdated, together with all computed values that read it. Called by the namespace when a change affects
+        one of the dependencies.
+        """
+
+        with self._state_lock:
+            self._version += 1
+            self._valid = False
+
+        dependents = list(self._dependents)
+        self._dependents.clear()
+        for dependent in dependents:
+            dependent.invalidate()
+
+        if self._listener is not None:
+            self._listener()
+
+    def dispose(self):
+        """
+        Stops tracking the dependencies. The value is evaluated again on its next read.
+        """
+
+        with self._state_lock:
+            self._version += 1
+            self._valid = False
+
+        for namespace in self._namespaces:
+            namespace.set_dependencies(self, {})
+        self._namespaces = set()
+
+
+class ReactiveComputedNode(ReactiveNode):
+    """
+    Represents a computed value stored in a reactive tree. It behaves like a read-only leaf whose value is evaluated on demand.
+
+    :param key: The key of the node.
+    :param value: The computed value.
+    """
+
+    def __init__(self, key: str, value: Computed, validate_key: bool = True):
+        if value._listener is not None:  # pylint: disable=protected-access
+            raise ValueError("The computed value is already part of a tree")
+
+        super().__init__(key, validate_key)
+
+        self._computed = value
+        self._notified: Any = _NOT_CACHED
+
+        value._listener = self._on_invalidated  # pylint: disable=protected-access
+
+    def get_value_repr(self) -> str:
+        return "computed"
+
+    def get_computed(self) -> Computed:
+        """
+        Returns the computed value of this node.
+        """
+
+        return self._computed
+
+    def get_value(self) -> AtomicType:
+        self._track_read(DependencyKind.VALUE)
+        return self._computed.get()
+
+    def set_value(self, value: AtomicType):
+        raise ValueError("Computed nodes are read-only")
+
+    def _on_invalidated(self):
+        self._invalidate_cached_forms()
+
+        namespace = self.get_namespace()
+        if namespace is None:
+            # the node was removed from its tree, so nobody can read it through the tree anymore
+            self._computed.dispose()
+            return
+
+        if namespace.has_watchers(self._get_path_tuple()):
+            if self._notified is _NOT_CACHED:
+                self._notified = self._computed.peek()
+            namespace.schedule_refresh(self)
+
+    def refresh(self):
+        """
+        Evaluates the value again and tells the watchers about it if it changed. Called by the namespace once the change or batch that
+        invalidated the value is complete.
+        """
+
+        namespace = self.get_namespace()
+        if namespace is None:
+            return
+
+        value = self._computed.get()
+        if self._notified is not _NOT_CACHED and type(value) is type(self._notified) and value == self._notified:
+            return
+
+        self._notified = value
+        namespace.invoke_watcher(UpdateChange(path=self._get_path_tuple(), value=value))
+
+    def _freeze(self) -> Any:
+        return self._computed.get()
+
+    def _build_json(self) -> Any:
+        return self._computed.get()
+
+    def _encode(self) -> str:
+        return json.dumps(self._computed.get())
+
+    def __str__(self) -> str:
+        return f"ReactiveComputedNode({self._computed.peek()!r})"
+
+    @staticmethod
+    def build_computed(key: str, value: Computed) -> "ReactiveComputedNode":
+        return ReactiveComputedNode(key, value, validate_key=False)
+
+
+ReactiveNode.PACK_METHODS[Computed] = ReactiveComputedNode.build_computed
+
+
+def computed(function: Callable[[], Any]) -> Computed:
+    """
+    Creates a computed value. Read it with get() or by calling it, or store it in the tree to make it watchable.
+
+    :param function: Computes the value from the tree. It is called without arguments and must not modify the tree.
+
+    :return: The computed value.
+    """
+
+    return Computed(function)
@@ -0,0 +1,159 @@
+"""
+Provides an index from the paths read by computed values to the computed values, so that a change only reaches the computed values
+it affects.
+"""
+
+from enum import IntEnum
+from typing import Any, Hashable, Optional
+from .changes import Change, AddChange, RemoveChange, ListInsertChange, ListDeleteChange, ListMoveChange, ListReplaceChange, ListSpliceChange
+
+
+class DependencyKind(IntEnum):
+    """
+    Enumerates how much of a node a computed value depends on. Each kind includes the ones before it.
+    """
+
+    # the node at the path, e.g. the value of a leaf. Replacing or removing the node or one of its ancestors affects it
+    VALUE = 0
+    # the set of children of the node, e.g. the keys of a dict or the length of a list
+    STRUCTURE = 1
+    # everything below the node, e.g. its JSON representation
+    DEEP = 2
+
+
+class _DependencyTrieNode:
+    __slots__ = ("children", "owners")
+
+    def __init__(self):
+        self.children: dict[str, _DependencyTrieNode] = {}
+        self.owners: dict[Hashable, DependencyKind] = {}
+
+
+def _affected_indices(change: Change) -> Optional[range]:
+    """
+    Returns the positions of the list items whose path refers to a different item or value after a positional list change.
+    """
+
+    if isinstance(change, (ListInsertChange, ListDeleteChange, ListSpliceChange)):
+        return range(change.index, 2**63)
+    if isinstance(change, ListMoveChange):
+        return range(min(change.index, change.target), max(change.index, change.target) + 1)
+    if isinstance(change, ListReplaceChange):
+        return range(change.index, change.index + len(change.values))
+
+    return None
+
+
+class DependencyTrie:
+    """
+    Stores the dependencies of computed values in a trie of their paths. Finding the computed values affected by a change walks the
+    path of the change and the subtree below it, so its cost depends on the number of affected dependencies rather than on the total.
+    """
+
+    def __init__(self):
+        self._root = _DependencyTrieNode()
+        self._registrations: dict[Hashable, dict[tuple[str, ...], DependencyKind]] = {}
+
+    def __len__(self) -> int:
+        return len(self._registrations)
+
+    def set(self, owner: Hashable, dependencies: dict[tuple[str, ...], DependencyKind]):
+        """
+        Replaces the dependencies of an owner.
+
+        :param owner: The computed value.
+        :param dependencies: The paths it read, with how much of each node it depends on. Empty to remove the owner.
+        """
+
+        self.discard(owner)
+        if not dependencies:
+            return
+
+        for path, kind in dependencies.items():
+            node = self._root
+            for key in path:
+                node = node.children.setdefault(key, _DependencyTrieNode())
+            node.owners[owner] = kind
+
+        self._registrations[owner] = dependencies
+
+    def discard(self, owner: Hashable):
+        """
+        Removes all dependencies of an owner.
+
+        :param owner: The computed value.
+        """
+
+        dependencies = self._registrations.pop(owner, None)
+        if dependencies is None:
+            return
+
+        for path in dependencies:
+            trail = [self._root]
+            for key in path:
+                trail.append(trail[-1].children[key])
+            del trail[-1].owners[owner]
+
+            # prune the branches that became empty
+            for depth in range(len(path), 0, -1):
+                node = trail[depth]
+                if node.owners or node.children:
+                    break
+                del trail[depth - 1].children[path[depth - 1]]
+
+    def pop_affected(self, change: Change) -> list[Any]:
+        """
+        Returns the owners affected by a change and removes their dependencies, as they are recorded again once the owners are
+        evaluated again.
+
+        :param change: The change.
+
+        :return: The affected owners.
+        """
+
+        if isinstance(change, (AddChange, RemoveChange)):
+            target = change.path + (change.key,)
+            container = len(change.path)
+        else:
+            target = change.path
+            # list changes modify the structure of the node at their path. Updates only replace a value
+            container = len(change.path) if _affected_indices(change) is not None else -1
+
+        found: dict[Hashable, None] = {}
+        node = self._root
+
+        # ancestors of the target are affected if they depend on everything below them, or on the structure of the modified node
+        for depth, key in enumerate(target):
+            for owner, kind in node.owners.items():
+                if kind == DependencyKind.DEEP or (depth == container and kind == DependencyKind.STRUCTURE):
+                    found[owner] = None
+
+            node = node.children.get(key)
+            if node is None:
+                break
+        else:
+            indices = _affected_indices(change)
+            if indices is None:
+                self._collect(node, found)
+            else:
+                # a positional change keeps the list node itself, but changes its structure and the items at the given positions
+                for owner, kind in node.owners.items():
+                    if kind >= DependencyKind.STRUCTURE:
+                        found[owner] = None
+
+                for key, child in node.children.items():
+                    if not key.isdecimal() or int(key) in indices:
+                        self._collect(child, found)
+
+        for owner in found:
+            self.discard(owner)
+
+        return list(found)
+
+    @staticmethod
+    def _collect(node: _DependencyTrieNode, found: dict[Hashable, None]):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            found.update(dict.fromkeys(node.owners))
+            stack.extend(node.children.values())
@@ -1,24 +1,52 @@
+from types import MappingProxyType
 from typing import Any
 from collections.abc import MutableMapping
 from .node import ReactiveNode
 from .types import AtomicType, UnpackedType
+from .list_node import ReactiveListNode
+from .array_node import ReactiveArrayNode
+from .keys import parse_path
+from .dependencies import DependencyKind
 
 
 class ReactiveDictNode(ReactiveNode, MutableMapping):
     def get_value_repr(self) -> str:
         return "dict"
 
-    def _invoke_nested_key_method(self, key: str, method: callable, *args, **kwargs) -> Any:
-        path = key.split(".")
-        if path[0] not in self._children:
-            raise KeyError(f"Key {path[0]} not found")
+    def _find_nested_parent(self, key: str) -> tuple[ReactiveNode, str]:
+        """
+        Returns the parent of the descendant at a dotted key together with the last key. If the parent is a list node, the last key is
+        converted to an index.
+
+        :raises KeyError: If the parent does not exist or the last key is not a valid child of it.
+        """
+
+        keys = parse_path(key)
+        parent = self._find_descendant(keys[:-1])
 
-        return method(self._children[path[0]], ".".join(path[1:]), *args, **kwargs)
+        if isinstance(parent, ReactiveDictNode):
+            return parent, keys[-1]
+        if isinstance(parent, ReactiveListNode) and parent.has_child(keys[-1]):
+            return parent, int(keys[-1])
+        # the items of array nodes have no nodes of their own, so they are only found through their parent
+        if isinstance(parent, ReactiveArrayNode) and keys[-1].isdecimal() and int(keys[-1]) < len(parent):
+            return parent, int(keys[-1])
+
+        raise KeyError(f"Key {key} not found")
 
     def __getitem__(self, key: str) -> UnpackedType:
         if "." in key:
-            return self._invoke_nested_key_method(key, ReactiveDictNode.__getitem__)
+            keys = parse_path(key)
+            self._track_read(DependencyKind.VALUE, keys)
+
+            node = self._find_descendant(keys)
+            if node is not None:
+                return node.unpack()
+
+            parent, last = self._find_nested_parent(key)
+            return parent[last]
 
+        self._track_read(DependencyKind.VALUE, (key,))
         if key not in self._children:
             raise KeyError(f"Key {key} not found")
 
@@ -38,26 +66,12 @@ class ReactiveDictNode(ReactiveNode, MutableMapping):
 
     def _setitem_sparse(self, key: str, value: Any):
         """
-        Set a key by updating its descendants individually. This only works if both the old and new values are dict nodes
+        Set a key by changing the existing child to the new value with a minimal set of changes, see update_from(). Only used if
+        the child is a dict node and the value is a dict.
         """
 
-        old_child = self._children[key]
-
-        # check which subkeys need to be added, updated or removed and perform the necessary operations
-        old_keys = set(old_child.keys())
-        new_keys = set(value.keys())
-
-        # remove keys that are not in the new value
-        for key in old_keys - new_keys:
-            old_child.remove_child(key)
-
-        # update keys that are in both the old and new values
-        for key in old_keys & new_keys:
-            old_child[key] = value[key]
-
-        # add keys that are not in the old value
-        for key in new_keys - old_keys:
-            old_child.pack(key, value[key])
+        # only apply what actually changed, down to single list items
+        self._children[key].update_from(value)
 
     def _can_use_setitem_sparse(self, key: str, value: Any) -> bool:
         # child must exist
@@ -81,16 +95,28 @@ class ReactiveDictNode(ReactiveNode, MutableMapping):
 
     def __setitem__(self, key: str, value: Any):
         if "." in key:
-            self._invoke_nested_key_method(key, ReactiveDictNode.__setitem__, value)
+            parent, last = self._find_nested_parent(key)
+            parent[last] = value
             return
 
         old_child = self._children.get(key)
 
-        # if the old child is a leaf node and the new value is an atomic type, update the value directly
-        if old_child and old_child.is_leaf() and isinstance(value, AtomicType):
+        # if the old child is a value node and the new value is an atomic type, update the value directly. Empty containers are leaves too,
+        # but must be replaced
+        if old_child and old_child.get_value_repr() == "value" and isinstance(value, AtomicType):
             old_child.set_value(value)
             return
 
+        # arrays are updated in place as long as the new values fit their type
+        if isinstance(old_child, ReactiveArrayNode) and old_child.accepts(value):
+            old_child.update_from(value)
+            return
+
+        # keyed lists are reconciled instead of replaced, so that their items keep their nodes
+        if isinstance(old_child, ReactiveListNode) and old_child.get_key_function() and isinstance(value, (list, tuple)):
+            old_child.reconcile(value)
+            return
+
         # use either the replace or update method to set the
         if self._can_use_setitem_sparse(key, value):
             self._setitem_sparse(key, value)
@@ -99,7 +125,8 @@ class ReactiveDictNode(ReactiveNode, MutableMapping):
 
     def __delitem__(self, key: str):
         if "." in key:
-            self._invoke_nested_key_method(key, ReactiveDictNode.__delitem__)
+            parent, last = self._find_nested_parent(key)
+            del parent[last]
             return
 
         if key not in self._children:
@@ -108,15 +135,28 @@ class ReactiveDictNode(ReactiveNode, MutableMapping):
         self.remove_child(key)
 
     def __iter__(self):
+        self._track_read(DependencyKind.STRUCTURE)
         return iter(self._children)
 
     def __len__(self) -> int:
+        self._track_read(DependencyKind.STRUCTURE)
         return len(self._children)
 
     def __contains__(self, key: str) -> bool:
         if "." in key:
-            return self._invoke_nested_key_method(key, ReactiveDictNode.__contains__)
+            keys = parse_path(key)
+            self._track_read(DependencyKind.VALUE, keys)
+
+            if self._find_descendant(keys) is not None:
+                return True
 
+            try:
+                parent, last = self._find_nested_parent(key)
+            except KeyError:
+                return False
+            return isinstance(parent, ReactiveArrayNode) or last in parent
+
+        self._track_read(DependencyKind.VALUE, (key,))
         return key in self._children
 
     def get(self, key: str, default: Any = None) -> UnpackedType:
@@ -126,16 +166,25 @@ class ReactiveDictNode(ReactiveNode, MutableMapping):
             return default
 
     def keys(self) -> list[str]:
+        self._track_read(DependencyKind.STRUCTURE)
         return list(self._children.keys())
 
     def values(self) -> list[UnpackedType]:
+        self._track_read(DependencyKind.STRUCTURE)
         return [child.unpack() for child in self._children.values()]
 
     def items(self) -> list[tuple[str, UnpackedType]]:
+        self._track_read(DependencyKind.STRUCTURE)
         return [(key, child.unpack()) for key, child in self._children.items()]
 
-    def json(self) -> dict:
-        return {key: child.json() for key, child in self._children.items()}
+    def _freeze(self) -> MappingProxyType:
+        return MappingProxyType({key: child._snapshot for key, child in self._children.items()})  # pylint: disable=protected-access
+
+    def _build_json(self) -> dict:
+        return {key: child._json for key, child in self._children.items()}  # pylint: disable=protected-access
+
+    def _encode(self) -> str:
+        return "{" + ", ".join(f'"{key}": {child._encoded}' for key, child in self._children.items()) + "}"  # pylint: disable=protected-access
 
     def __str__(self) -> str:
         return f"ReactiveDictNode({{ {', '.join(f'{key}: {child}' for key, child in self._children.items())} }})"
@@ -144,12 +193,35 @@ class ReactiveDictNode(ReactiveNode, MutableMapping):
         return self
 
     def pack_dict(self, key: str, data: dict):
-        child = ReactiveDictNode(key)
-        self.add_child(child)
+        """
+        Adds a dict node holding the given data as a child. Kept for compatibility, use build_dict() or pack() instead.
+
+        :param key: The key of the child.
+        :param data: The items of the child.
 
-        # invoke the generic pack method for each key-value pair
+        :raises ValueError: If a key is invalid or a value has an unsupported type.
+        """
+
+        if not self.is_key_valid(key):
+            raise ValueError(f"Key {key} is invalid")
+
+        self.add_child(ReactiveDictNode.build_dict(key, data))
+
+    @staticmethod
+    def build_dict(key: str, data: dict) -> "ReactiveDictNode":
+        node = ReactiveDictNode(key, validate_key=False)
+
+        # build the children detached and link them directly, as nobody can be watching them yet
+        children = node._children  # pylint: disable=protected-access
         for k, v in data.items():
-            child.pack(k, v)
+            child = ReactiveNode.build(k, v)
+            child._invalidate_caches()  # pylint: disable=protected-access
+            child._parent = node  # pylint: disable=protected-access
+            children[k] = child
+
+        node._invalidate_caches()  # pylint: disable=protected-access
+
+        return node
 
 
-ReactiveNode.PACK_METHODS[dict] = ReactiveDictNode.pack_dict
+ReactiveNode.PACK_METHODS[dict] = ReactiveDictNode.build_dict
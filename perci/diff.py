@@ -0,0 +1,183 @@
+"""
+Provides a structural diff that turns one JSON-like value into another with a minimal JSON Patch.
+"""
+
+import json
+from typing import Any
+from .node import ReactiveNode
+from .patch import escape_pointer_key
+
+# above this many compared pairs, lists are diffed position by position instead of by their longest common subsequence
+LCS_LIMIT = 1_000_000
+
+
+def _node_json(value: Any) -> Any:
+    if isinstance(value, ReactiveNode):
+        return value.json()
+
+    raise TypeError(f"Value {value!r} of type {type(value)} is not JSON serializable")
+
+
+def _canonical(value: Any) -> str:
+    # a hashable form that tells equal values apart from values that are only equal in Python, e.g. True and 1
+    return json.dumps(value, sort_keys=True, default=_node_json)
+
+
+def _lcs(old: list[str], new: list[str]) -> list[tuple[int, int]]:
+    """
+    Returns the index pairs of a longest common subsequence of two lists.
+    """
+
+    rows = len(old) + 1
+    columns = len(new) + 1
+    lengths = [[0] * columns for _ in range(rows)]
+
+    for i in range(len(old) - 1, -1, -1):
+        row = lengths[i]
+        below = lengths[i + 1]
+        for j in range(len(new) - 1, -1, -1):
+            row[j] = below[j + 1] + 1 if old[i] == new[j] else max(below[j], row[j + 1])
+
+    pairs = []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        if old[i] == new[j]:
+            pairs.append((i, j))
+            i += 1
+            j += 1
+        elif lengths[i + 1][j] >= lengths[i][j + 1]:
+            i += 1
+        else:
+            j += 1
+
+    return pairs
+
+
+def _diff_value(old: Any, new: Any, pointer: str, operations: list[dict]):
+    if isinstance(old, dict) and isinstance(new, dict):
+        _diff_dict(old, new, pointer, operations)
+    elif isinstance(old, list) and isinstance(new, list):
+        _diff_list(old, new, pointer, operations)
+    elif type(old) is not type(new) or old != new:
+        operations.append({"op": "replace", "path": pointer, "value": new})
+
+
+def _diff_dict(old: dict, new: dict, pointer: str, operations: list[dict]):
+    for key in old:
+        if key not in new:
+            operations.append({"op": "remove", "path": f"{pointer}/{escape_pointer_key(key)}"})
+
+    for key, value in new.items():
+        if key in old:
+            _diff_value(old[key], value, f"{pointer}/{escape_pointer_key(key)}", operations)
+
+    for key, value in new.items():
+        if key not in old:
+            operations.append({"op": "add", "path": f"{pointer}/{escape_pointer_key(key)}", "value": value})
+
+
+def _diff_list(old: list, new: list, pointer: str, operations: list[dict]):
+    # items at the start and the end that did not change are skipped, so that the expensive part only covers the edited region
+    start = 0
+    while start < len(old) and start < len(new) and old[start] == new[start] and type(old[start]) is type(new[start]):
+        start += 1
+
+    end = 0
+    while end < len(old) - start and end < len(new) - start and old[-end - 1] == new[-end - 1] and type(old[-end - 1]) is type(new[-end - 1]):
+        end += 1
+
+    old_items = old[start : len(old) - end]
+    new_items = new[start : len(new) - end]
+    if not old_items and not new_items:
+        return
+
+    old_keys = [_canonical(item) for item in old_items]
+    new_keys = [_canonical(item) for item in new_items]
+
+    if len(old_items) * len(new_items) <= LCS_LIMIT:
+        matches = _lcs(old_keys, new_keys)
+    else:
+        matches = []
+
+    # pair the remaining items within each gap between two matches by position, so that they are diffed instead of replaced
+    kept: list[tuple[int, int]] = []
+    unmatched_old: list[int] = []
+    unmatched_new: list[int] = []
+    previous_i = previous_j = 0
+    for i, j in matches + [(len(old_items), len(new_items))]:
+        gap_old = list(range(previous_i, i))
+        gap_new = list(range(previous_j, j))
+        pairs = min(len(gap_old), len(gap_new))
+
+        kept.extend(zip(gap_old[:pairs], gap_new[:pairs]))
+        unmatched_old.extend(gap_old[pairs:])
+        unmatched_new.extend(gap_new[pairs:])
+
+        if i < len(old_items):
+            kept.append((i, j))
+        previous_i, previous_j = i + 1, j + 1
+
+    # an item that was removed in one place and added in another is moved instead
+    removed: dict[str, list[int]] = {}
+    for i in unmatched_old:
+        removed.setdefault(old_keys[i], []).append(i)
+
+    moved: list[tuple[int, int]] = []
+    for j in unmatched_new:
+        candidates = removed.get(new_keys[j])
+        if candidates:
+            moved.append((candidates.pop(0), j))
+
+    moved_old = {i for i, _ in moved}
+    moved_new = {j for _, j in moved}
+    inserted = set(unmatched_new) - moved_new
+
+    # delete the items that are neither kept nor moved, back to front so that the remaining positions stay valid
+    current = list(range(len(old_items)))
+    for i in sorted(set(unmatched_old) - moved_old, reverse=True):
+        operations.append({"op": "remove", "path": f"{pointer}/{start + i}"})
+        current.pop(i)
+
+    # the kept items are already in order. Each moved item is placed right after the item that precedes it in the new list, so that
+    # it only moves once
+    source = {j: i for i, j in kept + moved}
+    for i, j in sorted(moved, key=lambda pair: pair[1]):
+        predecessor = next((source[p] for p in range(j - 1, -1, -1) if p not in inserted), None)
+        k = current.index(i)
+        current.pop(k)
+        position = current.index(predecessor) + 1 if predecessor is not None else 0
+        current.insert(position, i)
+
+        if position != k:
+            operations.append({"op": "move", "from": f"{pointer}/{start + k}", "path": f"{pointer}/{start + position}"})
+
+    # all existing items are in their final order now, so the new ones can be added from the front
+    for j in sorted(inserted):
+        operations.append({"op": "add", "path": f"{pointer}/{start + j}", "value": new_items[j]})
+
+    # finally update the kept items that were paired by position, now that every item is at its final position
+    for i, j in kept:
+        if old_keys[i] != new_keys[j]:
+            _diff_value(old_items[i], new_items[j], f"{pointer}/{start + j}", operations)
+
+
+def diff(old: Any, new: Any) -> list[dict]:
+    """
+    Returns a JSON Patch that turns one value into another. Dicts are compared key by key and lists by their longest common
+    subsequence, so the patch only touches what actually changed. Items that were moved within a list become move operations, and
+    items that were only modified are patched in place.
+
+    :param old: The original value. Reactive nodes are compared by their JSON representation.
+    :param new: The new value. Reactive nodes are compared by their JSON representation.
+
+    :return: The operations, with paths relative to the original value.
+    """
+
+    if isinstance(old, ReactiveNode):
+        old = old.json()
+    if isinstance(new, ReactiveNode):
+        new = new.json()
+
+    operations: list[dict] = []
+    _diff_value(old, new, "", operations)
+    return operations
@@ -0,0 +1,191 @@
+"""
+Provides dispatchers that decide where and when watcher handlers run.
+
+The namespace hands every change to its dispatcher while the namespace lock is still held, so the order of the dispatched changes
+always matches the order of the mutations. The default dispatcher calls the handlers right away, which means a slow handler delays
+the mutating thread and every other thread waiting for the lock. The threaded dispatchers only queue the change under the lock and
+run the handlers on other threads once the lock has been released, so mutation latency no longer depends on handler cost.
+"""
+
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
+from .changes import Change
+from .watcher import Watcher
+
+logger = logging.getLogger(__name__)
+
+
+class Dispatcher:
+    """
+    Delivers changes to watchers synchronously, on the mutating thread and while the namespace lock is held.
+    """
+
+    def dispatch(self, watcher: Watcher, changes: list[Change]):
+        """
+        Delivers changes to a watcher. Called by the namespace while it holds its lock.
+
+        :param watcher: The watcher to deliver the changes to.
+        :param changes: The changes to deliver, in the order they occurred. The list must not be modified afterwards.
+        """
+
+        watcher.notify_batch(changes)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until all dispatched changes were delivered.
+
+        :param timeout: The maximum number of seconds to wait. Defaults to None, meaning forever.
+
+        :return: Whether all changes were delivered.
+        """
+
+        return True
+
+    def close(self):
+        """
+        Delivers all pending changes and releases any resources held by the dispatcher.
+        """
+
+
+class _PendingCounter:
+    """
+    Counts the dispatched changes that were not delivered yet, so that flush() can wait for them.
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._condition = threading.Condition()
+
+    def increment(self):
+        with self._condition:
+            self._count += 1
+
+    def decrement(self):
+        with self._condition:
+            self._count -= 1
+            if self._count == 0:
+                self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self._count == 0, timeout)
+
+
+def _deliver(watcher: Watcher, changes: list[Change]):
+    # a failing handler must not stop the delivery to other watchers, so the error is only logged
+    try:
+        watcher.notify_batch(changes)
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Watcher %s failed to handle changes", watcher)
+
+
+class ThreadDispatcher(Dispatcher):
+    """
+    Delivers changes on a single dedicated thread. All changes are delivered in the order they occurred, across all watchers.
+
+    :param name: The name of the dispatcher thread.
+    """
+
+    _STOP = object()
+
+    def __init__(self, name: str = "perci-dispatcher"):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._pending = _PendingCounter()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is ThreadDispatcher._STOP:
+                return
+
+            watcher, changes = item
+            _deliver(watcher, changes)
+            self._pending.decrement()
+
+    def dispatch(self, watcher: Watcher, changes: list[Change]):
+        if self._closed:
+            raise RuntimeError("Dispatcher is closed")
+
+        self._pending.increment()
+        self._queue.put((watcher, changes))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self._pending.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(ThreadDispatcher._STOP)
+        self._thread.join()
+
+
+class ExecutorDispatcher(Dispatcher):
+    """
+    Delivers changes on a concurrent.futures executor. Different watchers are served in parallel, but each watcher receives its
+    changes one at a time and in the order they occurred.
+
+    :param executor: The executor to run the handlers on. Defaults to a thread pool owned by the dispatcher.
+    :param max_workers: The number of workers of the owned thread pool. Ignored if an executor is given.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_workers: Optional[int] = None):
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="perci-dispatcher")
+
+        # per-watcher queues. A watcher is present while a drain task for it is scheduled or running
+        self._queues: dict[Watcher, deque[list[Change]]] = {}
+        self._lock = threading.Lock()
+        self._pending = _PendingCounter()
+        self._closed = False
+
+    def dispatch(self, watcher: Watcher, changes: list[Change]):
+        if self._closed:
+            raise RuntimeError("Dispatcher is closed")
+
+        self._pending.increment()
+
+        with self._lock:
+            watcher_queue = self._queues.get(watcher)
+            if watcher_queue is not None:
+                watcher_queue.append(changes)
+                return
+
+            self._queues[watcher] = deque([changes])
+
+        self._executor.submit(self._drain, watcher)
+
+    def _drain(self, watcher: Watcher):
+        while True:
+            with self._lock:
+                watcher_queue = self._queues[watcher]
+                if not watcher_queue:
+                    del self._queues[watcher]
+                    return
+
+                changes = watcher_queue.popleft()
+
+            _deliver(watcher, changes)
+            self._pending.decrement()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self._pending.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+
+        self._closed = True
+        self.flush()
+
+        if self._owns_executor:
+            self._executor.shutdown()
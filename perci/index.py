@@ -0,0 +1,171 @@
+"""
+Provides secondary indexes that map the values of the children of a container, or of a field of them, to the children.
+
+An index is created per container with create_index() and is updated along with every modification of the container or of its
+children, so looking up the children holding a value takes time proportional to the number of matches instead of the number of
+children. Only atomic values of plain leaves are indexed. Children without a value at the indexed field, or whose value is a
+container or a computed value, are left out.
+"""
+
+from typing import Any, Hashable, Optional
+from .node import ReactiveNode
+from .keys import parse_path
+from .types import AtomicType
+
+# marks a child without an indexable value
+_UNINDEXED = object()
+
+
+class ValueIndex:
+    """
+    Maps the values of the children of a container, or the values at a field of them, to the children.
+
+    :param field: The dotted path of the field relative to each child, e.g. "status". Defaults to the values of the children.
+    """
+
+    def __init__(self, field: Optional[str] = None):
+        self.field = field
+        self._keys: tuple[str, ...] = parse_path(field) if field else ()
+
+        # children are keyed by their id, as container nodes compare by their contents and cannot be hashed
+        self._children: dict[Hashable, dict[int, ReactiveNode]] = {}
+        self._values: dict[int, Hashable] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def resolve(self, child: ReactiveNode) -> Any:
+        """
+        Returns the value of a child at the indexed field, or _UNINDEXED if it has none.
+
+        :param child: The child.
+        """
+
+        node = child
+        for key in self._keys:
+            node = node.get_child(key)
+            if node is None:
+                return _UNINDEXED
+
+        # only plain leaves hold their value themselves. Computed values are left out, as they would have to be evaluated
+        if type(node) is not ReactiveNode or node._children:  # pylint: disable=protected-access,unidiomatic-typecheck
+            return _UNINDEXED
+
+        return node._value  # pylint: disable=protected-access
+
+    def add(self, child: ReactiveNode):
+        """
+        Adds a new child of the container.
+
+        :param child: The child.
+        """
+
+        value = self.resolve(child)
+        if value is _UNINDEXED:
+            return
+
+        self._values[id(child)] = value
+        self._children.setdefault(value, {})[id(child)] = child
+
+    def discard(self, child: ReactiveNode):
+        """
+        Removes a child that is no longer part of the container.
+
+        :param child: The child.
+        """
+
+        value = self._values.pop(id(child), _UNINDEXED)
+        if value is _UNINDEXED:
+            return
+
+        children = self._children[value]
+        del children[id(child)]
+        if not children:
+            del self._children[value]
+
+    def update(self, child: ReactiveNode):
+        """
+        Indexes a child again after it or one of its descendants was modified.
+
+        :param child: The child.
+        """
+
+        value = self.resolve(child)
+        previous = self._values.get(id(child), _UNINDEXED)
+        if value is not _UNINDEXED and previous is not _UNINDEXED and type(value) is type(previous) and value == previous:
+            return
+
+        self.discard(child)
+        self.add(child)
+
+    def find(self, value: AtomicType) -> list[ReactiveNode]:
+        """
+        Returns the children with the given value, in no particular order.
+
+        :param value: The value. Values that compare equal, such as 1 and 1.0, are found together like with the == operator.
+        """
+
+        if not isinstance(value, Hashable):
+            return []
+
+        return list(self._children.get(value, {}).values())
+
+    def count(self, value: AtomicType) -> int:
+        """
+        Returns the number of children with the given value.
+
+        :param value: The value.
+        """
+
+        if not isinstance(value, Hashable):
+            return 0
+
+        return len(self._children.get(value, ()))
+
+    def __contains__(self, value: AtomicType) -> bool:
+        return isinstance(value, Hashable) and value in self._children
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}(field={self.field!r}, size={len(self)})"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+def build_index(container: ReactiveNode, field: Optional[str] = None) -> ValueIndex:
+    """
+    Builds an index of the current children of a container.
+
+    :param container: The container.
+    :param field: The dotted path of the field relative to each child. Defaults to the values of the children.
+
+    :return: The index.
+    """
+
+    index = ValueIndex(field)
+    for child in container._child_nodes():  # pylint: disable=protected-access
+        index.add(child)
+
+    return index
+
+
+def scan_children(container: ReactiveNode, value: AtomicType, field: Optional[str] = None) -> list[ReactiveNode]:
+    """
+    Returns the children of a container with a value at a field by checking every child, for containers without an index. Matches
+    the same children as an index would.
+
+    :param container: The container.
+    :param value: The value to look for.
+    :param field: The dotted path of the field relative to each child. Defaults to the values of the children.
+
+    :return: The matching children, in their order.
+    """
+
+    resolver = ValueIndex(field)
+    matches = []
+    for child in container._child_nodes():  # pylint: disable=protected-access
+        found = resolver.resolve(child)
+        if found is not _UNINDEXED and found == value:
+            matches.append(child)
+
+    return matches
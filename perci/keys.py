@@ -0,0 +1,57 @@
+"""
+Provides helpers to validate and intern node keys.
+"""
+
+import re
+import sys
+from functools import lru_cache
+
+_KEY_PATTERN = re.compile(r"^[a-zA-Z0-9_-]+$")
+
+# index keys are generated by perci itself, so the most common ones are created once and shared by all lists
+_INDEX_KEYS: tuple[str, ...] = tuple(sys.intern(str(i)) for i in range(4096))
+
+
+@lru_cache(maxsize=8192)
+def is_key_valid(key: str) -> bool:
+    """
+    Returns whether the given key is valid. Results are cached, as trees tend to reuse the same keys.
+
+    :param key: The key to check.
+    """
+
+    return _KEY_PATTERN.match(key) is not None
+
+
+def intern_key(key: str) -> str:
+    """
+    Returns the interned version of the given key, so that large trees share their key objects.
+
+    :param key: The key to intern.
+    """
+
+    return sys.intern(key)
+
+
+@lru_cache(maxsize=4096)
+def parse_path(path: str) -> tuple[str, ...]:
+    """
+    Splits a dotted path into its interned keys. Results are cached, as the same paths tend to be accessed over and over.
+
+    :param path: The dotted path, e.g. "a.b.0.c".
+    """
+
+    return tuple(intern_key(key) for key in path.split("."))
+
+
+def index_key(index: int) -> str:
+    """
+    Returns the key of the list item at the given index.
+
+    :param index: The index of the item.
+    """
+
+    if 0 <= index < len(_INDEX_KEYS):
+        return _INDEX_KEYS[index]
+
+    return str(index)
@@ -1,132 +1,810 @@
-from typing import Any
+import bisect
+from typing import Any, Callable, Hashable, Iterable, Optional
 from collections.abc import MutableSequence
 from .node import ReactiveNode
 from .types import UnpackedType, AtomicType
+from .changes import ListInsertChange, ListDeleteChange, ListMoveChange, ListReplaceChange, ListSpliceChange
+from .keys import index_key
+from .positions import PositionIndex
+from .dependencies import DependencyKind
 
 
 class ReactiveListNode(ReactiveNode, MutableSequence):
+    """
+    Represents a list in a reactive tree.
+
+    The items are stored by position, so their keys are not baked into the node. An item's key is its current index, which is
+    looked up in a PositionIndex built on first use. Inserting or deleting an item therefore only touches the items in the same
+    block of the index rather than all following items, and emits a single positional change.
+
+    A list can be given a key function that identifies its items, e.g. by an id field. Assigning a new sequence to such a list
+    reconciles it by key instead of rebuilding it: existing items keep their nodes and watchers and are only moved, updated in place
+    or deleted, while items with new keys are inserted.
+
+    :param key: The key of the node.
+    """
+
+    def __init__(self, key: str, validate_key: bool = True):
+        super().__init__(key, validate_key)
+
+        self._items: list[ReactiveNode] = []
+
+        # finds the index of an item. Built when the key of an item is first requested, and maintained from then on
+        self._positions: Optional[PositionIndex] = None
+
+        self._key_function: Optional[Callable[[Any], Hashable]] = None
+
+    def set_key_function(self, key_function: Optional[Callable[[Any], Hashable]]):
+        """
+        Sets the function that identifies the items of this list. Once set, assigning a new sequence to the list reconciles it by
+        key. See reconcile().
+
+        :param key_function: Returns the identity of an item given its JSON representation, or None to disable reconciliation.
+        """
+
+        self._key_function = key_function
+
+    def get_key_function(self) -> Optional[Callable[[Any], Hashable]]:
+        """
+        Returns the function that identifies the items of this list, if any.
+        """
+
+        return self._key_function
+
     def get_value_repr(self) -> str:
         return "list"
 
-    def _index_to_key(self, index: int, check_bounds: bool = True) -> str:
+    def _normalize_index(self, index: int) -> int:
         # handle negative indices
         if index < 0:
-            index += len(self)
+            index += len(self._items)
 
         # check if the index is out of bounds
-        if check_bounds and not (0 <= index < len(self._children)):
+        if not 0 <= index < len(self._items):
             raise IndexError(f"Index {index} out of bounds")
 
-        # convert the index to a string key
-        return str(index)
+        return index
+
+    def _key_to_index(self, key: str) -> Optional[int]:
+        if not key.isdecimal() or str(int(key)) != key:
+            return None
+
+        return int(key)
+
+    def _get_child_key(self, child: ReactiveNode) -> str:
+        if self._positions is None:
+            self._positions = PositionIndex(self._items)
+
+        return index_key(self._positions.position(child))
+
+    def _insert_children(self, index: int, children: list[ReactiveNode]):
+        """
+        Inserts a batch of detached children at the given position under a single lock and emits one change for all of them.
+        Appending at the tail does not touch any of the existing items.
+
+        :param index: The position to insert the children at.
+        :param children: The children to insert.
+
+        :raises IndexError: If the index is out of bounds.
+        :raises ValueError: If one of the children already has a parent.
+        """
+
+        with self._optional_namespace_lock():
+            if not 0 <= index <= len(self._items):
+                raise IndexError(f"Index {index} out of bounds")
+            if any(child.get_parent() or child.get_namespace() for child in children):
+                raise ValueError("Child already has a parent or is part of a namespace")
+            if not children:
+                return
+
+            tail = index == len(self._items)
+            self._items[index:index] = children
+
+            # the children are no longer roots, so the caches of their subtrees refer to the wrong tree
+            for child in children:
+                child._invalidate_caches()  # pylint: disable=protected-access
+                child._parent = self  # pylint: disable=protected-access
+
+            if self._positions is not None:
+                self._positions.insert(self._items, index, len(children))
+
+            self._add_to_indexes(children)
+
+            self._invalidate_caches()
+            self._invalidate_cached_forms()
+
+            namespace = self.get_namespace()
+            if namespace:
+                path = self._get_path_tuple()
+                if not tail:
+                    namespace.shift_watchers(list(path), index, len(children))
+
+                namespace.invoke_watcher(ListInsertChange(path=path, index=index, values=[child._copy_json() for child in children]))  # pylint: disable=protected-access
+
+    def _delete_children(self, start: int, stop: int) -> list[ReactiveNode]:
+        """
+        Removes the children in the given range under a single lock and emits one change for all of them.
+
+        :param start: The position of the first child to remove.
+        :param stop: The position after the last child to remove.
+
+        :return: The removed children.
+        """
+
+        with self._optional_namespace_lock():
+            children = self._items[start:stop]
+            if not children:
+                return children
+
+            del self._items[start:stop]
+
+            # removed items keep their last index as their key
+            for i, child in enumerate(children, start):
+                child._key = index_key(i)  # pylint: disable=protected-access
+                child._parent = None  # pylint: disable=protected-access
+                child._invalidate_caches()  # pylint: disable=protected-access
+
+            if self._positions is not None:
+                self._positions.delete(self._items, start, children)
+
+            self._remove_from_indexes(children)
+
+            self._invalidate_caches()
+            self._invalidate_cached_forms()
+
+            namespace = self.get_namespace()
+            if namespace:
+                # remove any watchers for the removed children and let the watchers of the following items follow them
+                path = self._get_path_tuple()
+                for i in range(start, stop):
+                    namespace.remove_watcher_by_path(list(path) + [index_key(i)])
+                if stop < len(self._items) + len(children):
+                    namespace.shift_watchers(list(path), stop, -len(children))
+
+                namespace.invoke_watcher(ListDeleteChange(path=path, index=start, count=len(children)))
+
+            return children
+
+    def _splice_children(self, start: int, stop: int, children: list[ReactiveNode], keep_watchers: bool = False) -> list[ReactiveNode]:
+        """
+        Replaces the children in the given range with new ones under a single lock and emits one change for all of them. Replacing
+        children with as many new ones emits a replace change, anything else a splice change.
+
+        :param start: The position of the first child to replace.
+        :param stop: The position after the last child to replace.
+        :param children: The new detached children.
+        :param keep_watchers: Whether the watchers of the replaced children stay registered, for new children that take the place of
+            the same number of old ones.
+
+        :raises ValueError: If one of the new children already has a parent or is part of a namespace.
+
+        :return: The replaced children.
+        """
+
+        with self._optional_namespace_lock():
+            if any(child.get_parent() or child.get_namespace() for child in children):
+                raise ValueError("Child already has a parent or is part of a namespace")
+
+            removed = self._items[start:stop]
+            if not removed:
+                self._insert_children(start, children)
+                return removed
+            if not children:
+                return self._delete_children(start, stop)
+
+            stop = start + len(removed)
+            offset = len(children) - len(removed)
+
+            # removed items keep their last index as their key
+            for i, child in enumerate(removed, start):
+                child._key = index_key(i)  # pylint: disable=protected-access
+                child._parent = None  # pylint: disable=protected-access
+                child._invalidate_caches()  # pylint: disable=protected-access
+
+            for child in children:
+                child._invalidate_caches()  # pylint: disable=protected-access
+                child._parent = self  # pylint: disable=protected-access
+
+            if not offset:
+                self._items[start:stop] = children
+                if self._positions is not None:
+                    self._positions.replace(start, removed, children)
+            else:
+                del self._items[start:stop]
+                if self._positions is not None:
+                    self._positions.delete(self._items, start, removed)
+                self._items[start:start] = children
+                if self._positions is not None:
+                    self._positions.insert(self._items, start, len(children))
+
+            self._remove_from_indexes(removed)
+            self._add_to_indexes(children)
+
+            self._invalidate_caches()
+            self._invalidate_cached_forms()
+
+            namespace = self.get_namespace()
+            if namespace:
+                # the watchers of the replaced items are removed, as their paths now refer to other items
+                path = self._get_path_tuple()
+                if not keep_watchers or offset:
+                    for i in range(start, stop):
+                        namespace.remove_watcher_by_path(list(path) + [index_key(i)])
+                if offset and stop < len(self._items) - offset:
+                    namespace.shift_watchers(list(path), stop, offset)
+
+                values = [child._copy_json() for child in children]  # pylint: disable=protected-access
+                if offset:
+                    namespace.invoke_watcher(ListSpliceChange(path=path, index=start, count=len(removed), values=values))
+                else:
+                    namespace.invoke_watcher(ListReplaceChange(path=path, index=start, values=values))
+
+            return removed
+
+    def _replace_child(self, child: ReactiveNode, replacement: ReactiveNode):
+        with self._optional_namespace_lock():
+            if child.get_parent() is not self:
+                raise ValueError(f"Node {child.get_key()} is not a child of {self.get_key()}")
+
+            index = int(child.get_key())
+            self._splice_children(index, index + 1, [replacement], keep_watchers=True)
+
+    def move_child(self, index: int, target: int):
+        """
+        Moves an item to another position, shifting the items in between by one. The item keeps its node and its watchers follow
+        it. A single move change is emitted.
+
+        :param index: The position of the item to move.
+        :param target: The position of the item after the move.
+
+        :raises IndexError: If one of the positions is out of bounds.
+        """
+
+        with self._optional_namespace_lock():
+            index = self._normalize_index(index)
+            target = self._normalize_index(target)
+            if index == target:
+                return
+
+            child = self._items.pop(index)
+            if self._positions is not None:
+                self._positions.delete(self._items, index, [child])
+
+            self._items.insert(target, child)
+            if self._positions is not None:
+                self._positions.insert(self._items, target, 1)
+
+            self._invalidate_caches()
+            self._invalidate_cached_forms()
+
+            namespace = self.get_namespace()
+            if namespace:
+                path = self._get_path_tuple()
+                namespace.move_watchers(list(path), index, target)
+                namespace.invoke_watcher(ListMoveChange(path=path, index=index, target=target))
+
+    def reconcile(self, values: Iterable[Any], key_function: Optional[Callable[[Any], Hashable]] = None):
+        """
+        Changes the items of this list to the given values, matching old and new items by key like a virtual DOM diff.
+
+        Items whose key disappeared are deleted and items with new keys are inserted. Items whose key is kept keep their node, so
+        their watchers stay attached. The longest run of kept items that is already in order stays in place and every other kept
+        item is moved once. Kept items whose content changed are updated in place with a minimal diff. All changes are applied in a
+        single batch.
+
+        :param values: The new values.
+        :param key_function: Returns the identity of an item given its JSON representation. Defaults to the key function of the list.
+
+        :raises ValueError: If there is no key function, or if two old or two new items share a key.
+        """
+
+        key_function = key_function or self._key_function
+        if key_function is None:
+            raise ValueError("Reconciling a list requires a key function")
+
+        values = list(values)
+        namespace = self.get_namespace()
+
+        with namespace.batch() if namespace else self._optional_namespace_lock():
+            new_keys = [key_function(value.json() if isinstance(value, ReactiveNode) else value) for value in values]
+            old_keys = [key_function(child._get_json()) for child in self._items]  # pylint: disable=protected-access
+            if len(set(new_keys)) != len(new_keys) or len(set(old_keys)) != len(old_keys):
+                raise ValueError("The keys of a reconciled list must be unique")
+
+            new_positions = {key: j for j, key in enumerate(new_keys)}
+
+            # delete the items whose key is gone, back to front and in contiguous runs
+            i = len(old_keys)
+            while i > 0:
+                if old_keys[i - 1] in new_positions:
+                    i -= 1
+                    continue
+
+                stop = i
+                while i > 0 and old_keys[i - 1] not in new_positions:
+                    i -= 1
+                self._delete_children(i, stop)
+                del old_keys[i:stop]
+
+            # the kept items on the longest increasing run of target positions stay, all others are moved once
+            for index, target in _plan_moves([new_positions[key] for key in old_keys]):
+                self.move_child(index, target)
+
+            # the kept items are in their final order now, so the new items can be inserted from the front in contiguous runs
+            kept_keys = set(old_keys)
+            j = 0
+            while j < len(new_keys):
+                if new_keys[j] in kept_keys:
+                    j += 1
+                    continue
+
+                start = j
+                while j < len(new_keys) and new_keys[j] not in kept_keys:
+                    j += 1
+                self._insert_children(start, self._build_children(start, values[start:j]))
+
+            # finally update the content of the kept items
+            for child, value in zip(self._items, values):
+                if isinstance(value, ReactiveNode):
+                    value = value.json()
+                if child._get_json() != value:  # pylint: disable=protected-access
+                    self._update_child(child, value)
+
+    def update_from(self, data: Any):
+        if self._key_function and isinstance(data, (list, tuple)):
+            self.reconcile(data)
+            return
+
+        super().update_from(data)
+
+    def _update_child(self, child: ReactiveNode, value: Any):
+        if child.get_value_repr() == "value" and isinstance(value, AtomicType):
+            child.set_value(value)
+        else:
+            child.update_from(value)
+
+    def _build_children(self, index: int, values: Iterable[Any]) -> list[ReactiveNode]:
+        return [ReactiveNode.build(index_key(i), value, validate_key=False) for i, value in enumerate(values, index)]
+
+    def insert_child(self, index: int, child: ReactiveNode):
+        """
+        Inserts a child at the given position, shifting all following items up.
+
+        :param index: The position to insert the child at.
+        :param child: The child to insert.
+
+        :raises IndexError: If the index is out of bounds.
+        :raises ValueError: If the child already has a parent.
+        """
+
+        self._insert_children(index, [child])
+
+    def pop_child(self, index: int) -> ReactiveNode:
+        """
+        Removes the child at the given position, shifting all following items down.
+
+        :param index: The position of the child to remove.
+
+        :raises IndexError: If the index is out of bounds.
+
+        :return: The removed child.
+        """
+
+        with self._optional_namespace_lock():
+            index = self._normalize_index(index)
+            return self._delete_children(index, index + 1)[0]
+
+    def add_child(self, child: ReactiveNode):
+        """
+        Inserts a child at the position given by its key.
+
+        :param child: The child to add.
+
+        :raises IndexError: If the key of the child is not a valid position.
+        """
+
+        index = self._key_to_index(child.get_key())
+        if index is None:
+            raise IndexError(f"Key {child.get_key()} is not a valid list position")
 
-    def _check_key_consistency(self):
-        for i, key in enumerate(self._children.keys()):
-            if key != self._index_to_key(i, check_bounds=False):
-                raise ValueError(f"Key {key} does not match index {i}")
+        self.insert_child(index, child)
+
+    def remove_child(self, key: str) -> ReactiveNode:
+        index = self._key_to_index(key)
+        if index is None or index >= len(self._items):
+            raise KeyError(f"Child {key} does not exist")
+
+        return self.pop_child(index)
+
+    def has_child(self, key: str) -> bool:
+        self._track_read(DependencyKind.VALUE, (key,))
+        index = self._key_to_index(key)
+        return index is not None and index < len(self._items)
+
+    def get_child(self, key: str) -> Optional[ReactiveNode]:
+        self._track_read(DependencyKind.VALUE, (key,))
+        index = self._key_to_index(key)
+        if index is None or index >= len(self._items):
+            return None
+
+        return self._items[index]
+
+    def get_children(self) -> dict[str, ReactiveNode]:
+        """
+        Returns the children of the node keyed by their index. The mapping is built on demand.
+        """
+
+        self._track_read(DependencyKind.STRUCTURE)
+        return {index_key(i): child for i, child in enumerate(self._items)}
+
+    def is_leaf(self) -> bool:
+        return not self._items
 
     def __getitem__(self, index: int | slice) -> UnpackedType:
         if isinstance(index, slice):
-            return [self[i] for i in range(*index.indices(len(self)))]
+            self._track_read(DependencyKind.STRUCTURE)
+            return [child.unpack() for child in self._items[index]]
+
+        index = self._normalize_index(index)
+        self._track_read(DependencyKind.VALUE, (index_key(index),))
+        return self._items[index].unpack()
+
+    def __setitem__(self, index: int | slice, value: Any):
+        if isinstance(index, slice):
+            self._setitem_slice(index, value)
+            return
+
+        index = self._normalize_index(index)
 
-        key = self._index_to_key(index)
-        return self._children[key].unpack()
+        old_child = self._items[index]
 
-    def __setitem__(self, index: int, value: Any):
-        key = self._index_to_key(index)
+        # arrays are updated in place as long as the new values fit their type
+        if old_child is not None and old_child.get_value_repr() == "array" and old_child.accepts(value):
+            old_child.update_from(value)
+            return
 
-        old_child = self._children[key]
+        # keyed lists are reconciled instead of replaced, so that their items keep their nodes
+        if isinstance(old_child, ReactiveListNode) and old_child.get_key_function() and isinstance(value, (list, tuple)):
+            old_child.reconcile(value)
+            return
 
-        # if the old child is a leaf node and the new value is an atomic type, update the value directly
-        if old_child.is_leaf() and isinstance(value, AtomicType):
+        # if the old child is a value node and the new value is an atomic type, update the value directly. Empty containers are leaves too,
+        # but must be replaced
+        if old_child.get_value_repr() == "value" and isinstance(value, AtomicType):
             old_child.set_value(value)
             return
 
-        # remove the old child
-        self.remove_child(key)
+        # replace the old child with a new one at the same position
+        child = ReactiveNode.build(index_key(index), value, validate_key=False)
+        self._splice_children(index, index + 1, [child])
 
-        # use the generic pack method to add the new child
-        self.pack(key, value)
+    def _setitem_slice(self, index: slice, values: Iterable[Any]):
+        values = list(values)
+        start, stop, step = index.indices(len(self._items))
 
-    def __delitem__(self, index: int):
-        """
-        let n = [x0, x1, x2, x3, x4, x5]
-        ==> n._children = {
-                "0": x0,
-                "1": x1,
-                "2": x2,
-                "3": x3,
-                "4": x4,
-                "5": x5,
-            }
+        # replacing all items of a keyed list reconciles them
+        if self._key_function and step == 1 and start == 0 and stop >= len(self._items):
+            self.reconcile(values)
+            return
+
+        # contiguous slices are replaced by a single change
+        if step == 1:
+            self._splice_children(start, max(start, stop), self._build_children(start, values))
+            return
 
-        del n[2]
+        indices = range(start, stop, step)
+        if len(values) != len(indices):
+            raise ValueError(f"Attempt to assign sequence of size {len(values)} to extended slice of size {len(indices)}")
 
-        ==> del n._children["2"]
+        # reversed slices cover a contiguous range as well
+        if step == -1 and indices:
+            self._splice_children(indices[-1], indices[0] + 1, self._build_children(indices[-1], values[::-1]))
+            return
 
-            let x3 = n._children["3"].pop()
-            x3.set_key("2")
-            add n._children["2"] = x3
+        # other extended slices change the items one by one, and their changes are delivered as a single batch
+        namespace = self.get_namespace()
+        with namespace.batch() if namespace else self._optional_namespace_lock():
+            for i, value in zip(indices, values):
+                self[i] = value
 
-            let x4 = n._children["4"]
-            x4.set_key("3")
-            add n._children["3"] = x4
+    def __delitem__(self, index: int | slice):
+        if not isinstance(index, slice):
+            self.pop_child(index)
+            return
 
-        ==> n._children ={
-                "0": x0,
-                "1": x1,
-                "2": x3,
-                "3": x4,
-                "4": x5,
-            }
-        """
-        key = self._index_to_key(index)
-        self.remove_child(key)
+        start, stop, step = index.indices(len(self._items))
+        if step == 1:
+            self._delete_children(start, max(start, stop))
+            return
 
-        # reindex the remaining children. Note that length is already decreased by 1. Also, index can be negative so we use the converted key
-        for i in range(int(key) + 1, len(self) + 1):
-            child = self.remove_child(str(i))
-            child.set_key(str(i - 1))
-            self.add_child(child)
+        indices = range(start, stop, step)
+        if step == -1 and indices:
+            self._delete_children(indices[-1], indices[0] + 1)
+            return
 
-    def __len__(self) -> int:
-        return len(self._children)
+        # delete extended slices back to front, so that the remaining indices stay valid. The changes are delivered as a single batch
+        namespace = self.get_namespace()
+        with namespace.batch() if namespace else self._optional_namespace_lock():
+            for i in sorted(indices, reverse=True):
+                self._delete_children(i, i + 1)
 
-    def __contains__(self, key: Any) -> bool:
-        if isinstance(key, ReactiveNode):
-            return any(child is key for child in self._children.values())
-        elif isinstance(key, AtomicType):
-            return any(child.is_leaf() and child.unpack() == key for child in self._children.values())
+    def __len__(self) -> int:
+        self._track_read(DependencyKind.STRUCTURE)
+        return len(self._items)
+
+    def __iter__(self):
+        self._track_read(DependencyKind.STRUCTURE)
+        return (child.unpack() for child in self._items)
+
+    @staticmethod
+    def _child_matches(child: ReactiveNode, value: Any) -> bool:
+        if isinstance(value, ReactiveNode):
+            return child is value
+        elif isinstance(value, AtomicType):
+            return child.is_leaf() and child.unpack() == value
         else:
             return False
 
+    def _indexed_positions(self, value: Any) -> Optional[list[int]]:
+        """
+        Returns the sorted positions of the items equal to a value if the values of the items are indexed, or None otherwise. Only
+        atomic values are looked up, as other values never match an item with ==.
+        """
+
+        index = self._indexes.get(None) if self._indexes else None
+        if index is None or isinstance(value, ReactiveNode):
+            return None
+        if not isinstance(value, AtomicType):
+            return []
+
+        return sorted(int(self._get_child_key(child)) for child in index.find(value))
+
+    def __contains__(self, value: Any) -> bool:
+        self._track_read(DependencyKind.STRUCTURE)
+
+        index = self._indexes.get(None) if self._indexes else None
+        if index is not None and not isinstance(value, ReactiveNode):
+            return isinstance(value, AtomicType) and value in index
+
+        return any(self._child_matches(child, value) for child in self._items)
+
+    def index(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        self._track_read(DependencyKind.STRUCTURE)
+
+        positions = self._indexed_positions(value)
+        if positions is None:
+            return super().index(value, start, stop)
+
+        start, stop, _ = slice(start, stop).indices(len(self._items))
+        for position in positions:
+            if start <= position < stop:
+                return position
+
+        raise ValueError(f"{value} is not in list")
+
+    def count(self, value: Any) -> int:
+        self._track_read(DependencyKind.STRUCTURE)
+
+        index = self._indexes.get(None) if self._indexes else None
+        if index is None or isinstance(value, ReactiveNode):
+            return super().count(value)
+
+        return index.count(value) if isinstance(value, AtomicType) else 0
+
+    def find(self, value: AtomicType, field: Optional[str] = None) -> list[int]:
+        """
+        Returns the positions of the items with the given value, or with the given value at a field. Uses the secondary index created
+        with create_index() if there is one, and scans the items otherwise.
+
+        :param value: The value to look for. Values that compare equal, such as 1 and 1.0, are found together.
+        :param field: The dotted path of the field relative to each item, e.g. "status". Defaults to the values of the items.
+
+        :return: The positions of the matching items in ascending order.
+        """
+
+        with self._optional_namespace_lock():
+            return sorted(int(self._get_child_key(child)) for child in self._find_children(value, field))
+
     def insert(self, index: int, value: Any):
-        key = self._index_to_key(index, check_bounds=False)
+        # follow the semantics of list.insert for out of bounds indices
+        if index < 0:
+            index = max(index + len(self._items), 0)
+        index = min(index, len(self._items))
+
+        self._insert_children(index, self._build_children(index, [value]))
+
+    def append(self, value: Any):
+        with self._optional_namespace_lock():
+            index = len(self._items)
+            self._insert_children(index, self._build_children(index, [value]))
+
+    def extend(self, values: Iterable[Any]):
+        # materialize the values first, as they might be read from this list
+        values = list(values)
+
+        with self._optional_namespace_lock():
+            index = len(self._items)
+            self._insert_children(index, self._build_children(index, values))
+
+    def __iadd__(self, values: Iterable[Any]) -> "ReactiveListNode":
+        self.extend(values)
+        return self
+
+    def pop(self, index: int = -1) -> UnpackedType:
+        with self._optional_namespace_lock():
+            return self.pop_child(index).unpack()
+
+    def remove(self, value: Any):
+        with self._optional_namespace_lock():
+            positions = self._indexed_positions(value)
+            if positions:
+                self._delete_children(positions[0], positions[0] + 1)
+                return
+
+            if positions is None:
+                for i, child in enumerate(self._items):
+                    if self._child_matches(child, value):
+                        self._delete_children(i, i + 1)
+                        return
+
+        raise ValueError(f"{value} is not in list")
 
-        # reindex the children after the insertion point. Note that we need to iterate in reverse order
-        for i in range(len(self), index, -1):
-            child = self.remove_child(str(i - 1))
-            child.set_key(str(i))
-            self.add_child(child)
+    def clear(self):
+        with self._optional_namespace_lock():
+            self._delete_children(0, len(self._items))
 
-        self.pack(key, value)
+    def _child_nodes(self) -> list[ReactiveNode]:
+        return self._items
 
-    def json(self) -> Any:
-        return [child.json() for child in self._children.values()]
+    def _freeze(self) -> tuple:
+        return tuple(child._snapshot for child in self._items)  # pylint: disable=protected-access
+
+    def _build_json(self) -> list:
+        return [child._json for child in self._items]  # pylint: disable=protected-access
+
+    def _encode(self) -> str:
+        return "[" + ", ".join(child._encoded for child in self._items) + "]"  # pylint: disable=protected-access
 
     def __str__(self) -> str:
-        return f"ReactiveListNode([{', '.join(str(child) for child in self._children.values())}])"
+        return f"ReactiveListNode([{', '.join(str(child) for child in self._items)}])"
 
     def unpack(self) -> "ReactiveListNode":
         return self
 
     def pack_list(self, key: str, data: list):
-        child = ReactiveListNode(key)
-        self.add_child(child)
+        """
+        Adds a list node holding the given items as a child. Kept for compatibility, use build_list() or pack() instead.
+
+        :param key: The key of the child.
+        :param data: The items of the child.
+
+        :raises ValueError: If the key is invalid or an item has an unsupported type.
+        """
+
+        if not self.is_key_valid(key):
+            raise ValueError(f"Key {key} is invalid")
+
+        self.add_child(ReactiveListNode.build_list(key, data))
+
+    @staticmethod
+    def build_list(key: str, data: list) -> "ReactiveListNode":
+        node = ReactiveListNode(key, validate_key=False)
+
+        # build the items detached and link them directly, as nobody can be watching them yet
+        items = node._build_children(0, data)  # pylint: disable=protected-access
+        for item in items:
+            item._invalidate_caches()  # pylint: disable=protected-access
+            item._parent = node  # pylint: disable=protected-access
+
+        node._items = items  # pylint: disable=protected-access
+        node._invalidate_caches()  # pylint: disable=protected-access
+
+        return node
+
+
+def _plan_moves(targets: list[int]) -> list[tuple[int, int]]:
+    """
+    Plans the moves that sort a list, given the final rank of each of its items. The items on a longest increasing subsequence stay in
+    place and every other item is moved once, in the order of the final ranks, to right after its predecessor.
+
+    :param targets: The final rank of the item at each position. The ranks must be unique.
+
+    :return: The moves as pairs of the index before and after each move, to be applied in order.
+    """
+
+    staying = _longest_increasing_subsequence(targets)
+    if len(staying) == len(targets):
+        return []
+
+    # every item gets a sort key, so that the current list is always sorted by the keys of its items. Each staying item starts a
+    # bucket. Within a bucket, the items that were moved already come first, in final order, followed by the items that still wait
+    # for their move, in their original order
+    anchor_ranks = [targets[i] for i in staying]
+    staying_set = set(staying)
+
+    waiting_keys: dict[int, tuple[int, int, int]] = {}
+    moved_keys: dict[int, tuple[int, int, int]] = {}
+    all_keys = [(bucket, -1, 0) for bucket in range(len(staying))]
+
+    bucket = -1
+    for i, rank in enumerate(targets):
+        if i in staying_set:
+            bucket += 1
+            continue
+
+        waiting_keys[i] = (bucket, 1, i)
+        moved_keys[i] = (bisect.bisect_left(anchor_ranks, rank) - 1, 0, rank)
+        all_keys.append(waiting_keys[i])
+        all_keys.append(moved_keys[i])
+
+    slots = {key: slot for slot, key in enumerate(sorted(all_keys), 1)}
+
+    # a Fenwick tree counts the items present in front of a slot
+    tree = [0] * (len(slots) + 1)
+
+    def update(slot: int, delta: int):
+        while slot < len(tree):
+            tree[slot] += delta
+            slot += slot & -slot
+
+    def count_before(slot: int) -> int:
+        slot -= 1
+        total = 0
+        while slot > 0:
+            total += tree[slot]
+            slot -= slot & -slot
+        return total
+
+    for bucket in range(len(staying)):
+        update(slots[(bucket, -1, 0)], 1)
+    for key in waiting_keys.values():
+        update(slots[key], 1)
+
+    moves = []
+    for i in sorted(waiting_keys, key=targets.__getitem__):
+        source = slots[waiting_keys[i]]
+        index = count_before(source)
+        update(source, -1)
+
+        target = slots[moved_keys[i]]
+        update(target, 1)
+        position = count_before(target)
+
+        if index != position:
+            moves.append((index, position))
+
+    return moves
+
+
+def _longest_increasing_subsequence(values: list[int]) -> list[int]:
+    """
+    Returns the indices of a longest strictly increasing subsequence of the given values in O(n log n).
+    """
+
+    # tails[k] is the index of the smallest value that ends an increasing subsequence of length k + 1
+    tails: list[int] = []
+    tail_values: list[int] = []
+    previous: list[int] = [-1] * len(values)
+
+    for i, value in enumerate(values):
+        k = bisect.bisect_left(tail_values, value)
+        if k > 0:
+            previous[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[k] = i
+            tail_values[k] = value
+
+    result = []
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        result.append(i)
+        i = previous[i]
 
-        # invoke the generic pack method for each item in the list
-        for i, item in enumerate(data):
-            child.pack(str(i), item)
+    result.reverse()
+    return result
 
 
-ReactiveNode.PACK_METHODS[list] = ReactiveListNode.pack_list
+ReactiveNode.PACK_METHODS[list] = ReactiveListNode.build_list
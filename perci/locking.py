@@ -0,0 +1,135 @@
+"""
+Provides a striped lock that lets writers to unrelated subtrees of a namespace proceed in parallel.
+"""
+
+import threading
+import zlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .node import ReactiveNode
+
+
+class LockOrderError(RuntimeError):
+    """
+    Raised when a thread that holds a stripe needs a stripe with a lower index that another thread holds, which could deadlock.
+    """
+
+
+class StripedLock:
+    """
+    Guards a namespace with a fixed number of reentrant locks instead of a single one.
+
+    Every mutation locks the node it modifies. The stripe of a node is chosen by a checksum of the first `depth` keys of its path, so
+    a whole subtree always maps to the same stripe in every process. Mutations of nodes above that depth change which subtrees exist
+    and therefore take all stripes, as does entering the lock directly, e.g. for a transaction.
+
+    Stripes are taken in index order. A thread that holds a stripe may re-enter it or take stripes with a higher index. A lower
+    stripe, which it needs when a synchronous handler modifies a different subtree, is only taken if it is free; waiting for it could
+    deadlock, so a LockOrderError is raised if another thread holds it. Use a threaded dispatcher for handlers that write to other
+    subtrees while other threads write as well.
+
+    Reads are never locked. Leaf values are replaced with a single attribute store, so a reader always sees either the old or the
+    new value.
+
+    :param stripes: The number of stripes. Defaults to 16.
+    :param depth: The number of path keys that select the stripe, including the root key. Defaults to 2, so every child of the
+        root forms its own subtree.
+    """
+
+    def __init__(self, stripes: int = 16, depth: int = 2):
+        if stripes < 1:
+            raise ValueError("At least one stripe is required")
+        if depth < 1:
+            raise ValueError("The depth must be at least 1")
+
+        self.depth = depth
+
+        self._locks = [threading.RLock() for _ in range(stripes)]
+        self._all = tuple(range(stripes))
+        self._local = threading.local()
+
+    def _held(self) -> list[int]:
+        # the number of times each stripe is held by the current thread, followed by the total
+        try:
+            return self._local.held
+        except AttributeError:
+            held = self._local.held = [0] * (len(self._locks) + 1)
+            return held
+
+    def _stripes_for(self, path: tuple[str, ...]) -> tuple[int, ...]:
+        if len(path) < self.depth:
+            return self._all
+
+        # the builtin hash of strings is randomized per process, which would make the stripe order differ between runs
+        return (zlib.crc32("\0".join(path[: self.depth]).encode()) % len(self._locks),)
+
+    def _acquire(self, stripes: tuple[int, ...]):
+        held = self._held()
+        count = len(self._locks)
+
+        for i in stripes:
+            if held[count] and not held[i] and any(held[i + 1 : count]):
+                if not self._locks[i].acquire(blocking=False):
+                    self._release(stripes[: stripes.index(i)])
+                    raise LockOrderError(f"Cannot take stripe {i} while holding a stripe with a higher index")
+            else:
+                self._locks[i].acquire()
+
+            held[i] += 1
+            held[count] += 1
+
+    def _release(self, stripes: tuple[int, ...]):
+        held = self._held()
+        count = len(self._locks)
+
+        for i in reversed(stripes):
+            held[i] -= 1
+            held[count] -= 1
+            self._locks[i].release()
+
+    def lock_for(self, node: "ReactiveNode") -> "_NodeLock":
+        """
+        Returns a context manager that locks the stripes guarding the given node.
+
+        :param node: The node that is about to be modified.
+        """
+
+        return _NodeLock(self, node)
+
+    def __enter__(self):
+        self._acquire(self._all)
+        return self
+
+    def __exit__(self, *exc):
+        self._release(self._all)
+
+
+class _NodeLock:
+    """
+    Locks the stripes of a node. A concurrent mutation of an ancestor list may move the node to a different stripe before its stripe
+    is taken, so the path is checked again once the stripe is held.
+    """
+
+    __slots__ = ("_lock", "_node", "_stripes")
+
+    def __init__(self, lock: StripedLock, node: "ReactiveNode"):
+        self._lock = lock
+        self._node = node
+        self._stripes: tuple[int, ...] = ()
+
+    def __enter__(self):
+        lock = self._lock
+
+        while True:
+            stripes = lock._stripes_for(self._node._get_path_tuple())  # pylint: disable=protected-access
+            lock._acquire(stripes)  # pylint: disable=protected-access
+
+            if lock._stripes_for(self._node._get_path_tuple()) == stripes:  # pylint: disable=protected-access
+                self._stripes = stripes
+                return self
+
+            lock._release(stripes)  # pylint: disable=protected-access
+
+    def __exit__(self, *exc):
+        self._lock._release(self._stripes)  # pylint: disable=protected-access
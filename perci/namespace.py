@@ -3,12 +3,21 @@ Provides a class to group reactive nodes into a single thread-safe namespace.
 """
 
 import threading
-from typing import TYPE_CHECKING
-from .watcher import Watcher, path_matches
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, ContextManager, Iterator, Optional
+from .watcher import Watcher, WatcherTrie
 from .changes import Change
+from .batch import ChangeBatch
+from .dispatch import Dispatcher
+from .locking import StripedLock
+from .dependencies import DependencyTrie, DependencyKind
 
 if TYPE_CHECKING:
     from .node import ReactiveNode
+    from .changelog import ChangeLog
+    from .computed import ReactiveComputedNode
 
 
 class ReactiveNamespace:
@@ -16,26 +25,247 @@ class ReactiveNamespace:
     Represents a reactive tree namespace.
 
     :param root_node: The root node of the namespace.
+    :param dispatcher: Delivers the changes to the watchers. Defaults to calling the handlers synchronously under the lock.
+    :param lock: A striped lock that lets writers to unrelated subtrees proceed in parallel. Defaults to a single lock for the whole
+        namespace.
     """
 
-    def __init__(self, root_node: "ReactiveNode"):
+    def __init__(self, root_node: "ReactiveNode", dispatcher: Optional[Dispatcher] = None, lock: Optional[StripedLock] = None):
         self.root = root_node
-        self.lock = threading.RLock()
+        self.lock = lock or threading.RLock()
+        self.dispatcher = dispatcher or Dispatcher()
 
-        self._watchers: list[Watcher] = []
+        self._striped_lock = lock
+
+        # with a striped lock, writers to different subtrees share the watcher trie
+        self._watchers = WatcherTrie()
+        self._watchers_lock = threading.Lock()
+        self._batch: Optional[ChangeBatch] = None
+
+        self.change_log: Optional["ChangeLog"] = None
+
+        # maps absolute paths to the nodes found there. Entries are only hints: list mutations shift the paths of whole subtrees, so
+        # a node is checked against its actual path before it is returned. Removed subtrees do not stay alive through the index
+        self._path_index: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+        # the paths read by computed values, and the watched computed nodes that have to be evaluated again before their watchers
+        # can be told about their new value
+        self._dependencies = DependencyTrie()
+        self._dependencies_lock = threading.Lock()
+        self._stale_computed: deque["ReactiveComputedNode"] = deque()
+        self._refreshing = threading.local()
+
+        # the number of changes so far, so that a computed value can tell whether the tree changed while it was evaluated
+        self.change_count = 0
+
+    def lock_for(self, node: "ReactiveNode") -> ContextManager:
+        """
+        Returns the lock that guards modifications of the given node.
+
+        :param node: The node that is about to be modified.
+        """
+
+        if self._striped_lock is None:
+            return self.lock
+
+        return self._striped_lock.lock_for(node)
+
+    def attach_change_log(self, change_log: "ChangeLog"):
+        """
+        Starts logging every change of the namespace. The log takes a checkpoint of the current tree first, so that it can be
+        restored from the log alone.
+
+        :param change_log: The change log to attach.
+
+        :raises ValueError: If a change log is already attached.
+        """
+
+        with self.lock:
+            if self.change_log is not None:
+                raise ValueError("The namespace already has a change log")
+
+            change_log.open(self)
+            self.change_log = change_log
+
+    def detach_change_log(self):
+        """
+        Stops logging and closes the attached change log, if any. Must not be called while the namespace lock is held.
+        """
+
+        with self.lock:
+            change_log = self.change_log
+            self.change_log = None
+
+        if change_log is not None:
+            change_log.close()
+
+    def find_node(self, path: tuple[str, ...]) -> Optional["ReactiveNode"]:
+        """
+        Returns the node at an absolute path. Indexed nodes are returned with a single lookup; other paths are walked from the root
+        and indexed afterwards.
+
+        :param path: The keys of the path, including the key of the root node.
+
+        :return: The node or None if the path does not exist.
+        """
+
+        node = self._path_index.get(path)
+        if node is not None and node._get_path_tuple() == path and node.get_namespace() is self:  # pylint: disable=protected-access
+            return node
+
+        node = self.root
+        if not path or path[0] != node.get_key():
+            return None
+
+        for key in path[1:]:
+            node = node.get_child(key)
+            if node is None:
+                return None
+
+        self._path_index[path] = node
+        return node
+
+    def index_node(self, path: tuple[str, ...], node: "ReactiveNode"):
+        """
+        Records the node at an absolute path, e.g. after it was added.
+
+        :param path: The path of the node.
+        :param node: The node.
+        """
+
+        self._path_index[path] = node
+
+    def unindex_node(self, path: tuple[str, ...]):
+        """
+        Forgets the node at an absolute path, e.g. after it was removed. Entries of its descendants are detected as outdated once
+        they are looked up.
+
+        :param path: The path of the node.
+        """
+
+        self._path_index.pop(path, None)
 
     def add_watcher(self, watcher: Watcher):
-        self._watchers.append(watcher)
+        with self._watchers_lock:
+            self._watchers.add(watcher)
 
     def remove_watcher(self, watcher: Watcher):
-        self._watchers.remove(watcher)
+        with self._watchers_lock:
+            self._watchers.remove(watcher)
 
     def remove_watcher_by_path(self, path: list[str]):
-        self._watchers = [watcher for watcher in self._watchers if not path_matches(path, watcher.path, allow_children=True)]
+        with self._watchers_lock:
+            self._watchers.remove_subtree(path)
+
+    def shift_watchers(self, path: list[str], start: int, offset: int):
+        with self._watchers_lock:
+            self._watchers.shift(path, start, offset)
+
+    def move_watchers(self, path: list[str], index: int, target: int):
+        with self._watchers_lock:
+            self._watchers.move(path, index, target)
+
+    def set_dependencies(self, owner, dependencies: dict[tuple[str, ...], DependencyKind]) -> int:
+        """
+        Replaces the paths a computed value depends on. The computed value is invalidated once a change affects one of them.
+
+        :param owner: The computed value. It must provide an invalidate() method.
+        :param dependencies: The paths it read, with how much of each node it depends on.
+
+        :return: The number of changes of the namespace at the time the dependencies were recorded.
+        """
+
+        with self._dependencies_lock:
+            self._dependencies.set(owner, dependencies)
+            return self.change_count
+
+    def has_watchers(self, path: tuple[str, ...]) -> bool:
+        """
+        Returns whether any watcher would receive a change at the given path.
+
+        :param path: The path of the change.
+        """
+
+        with self._watchers_lock:
+            return bool(self._watchers.match(path))
+
+    def schedule_refresh(self, node: "ReactiveComputedNode"):
+        """
+        Evaluates a watched computed node again once the current change or batch is complete, so that its watchers receive the new
+        value.
+
+        :param node: The invalidated node.
+        """
+
+        self._stale_computed.append(node)
+
+    def _refresh_computed(self):
+        # refreshing emits changes, which must not start another refresh on the same thread
+        if getattr(self._refreshing, "active", False):
+            return
+
+        self._refreshing.active = True
+        try:
+            while self._stale_computed:
+                self._stale_computed.popleft().refresh()
+        finally:
+            self._refreshing.active = False
 
     def invoke_watcher(self, change: Change):
-        for watcher in self._watchers:
-            watcher.invoke(change)
+        change_log = self.change_log
+        if change_log is not None:
+            change_log.append(change)
+
+        # writers to different stripes of a striped lock get here in parallel, so the count is only changed under the lock
+        with self._dependencies_lock:
+            self.change_count += 1
+            affected = self._dependencies.pop_affected(change) if self._dependencies else ()
+
+        for owner in affected:
+            owner.invalidate()
+
+        with self._watchers_lock:
+            watchers = self._watchers.match(change.path)
+
+        if self._batch is not None:
+            self._batch.add(change, watchers)
+            return
+
+        # the changes are handed to the dispatcher under the lock, so that they are dispatched in the order they occurred
+        for watcher in watchers:
+            self.dispatcher.dispatch(watcher, [change])
+
+        if self._stale_computed:
+            self._refresh_computed()
+
+    @contextmanager
+    def batch(self) -> Iterator[ChangeBatch]:
+        """
+        Groups all changes made within the context into a single batch. The namespace lock is held for the whole batch and the
+        coalesced changes are delivered to each watcher once the outermost batch ends. Nested batches join the outer one.
+
+        :return: A context manager yielding the change batch.
+        """
+
+        with self.lock:
+            if self._batch is not None:
+                yield self._batch
+                return
+
+            self._batch = ChangeBatch()
+            try:
+                yield self._batch
+            finally:
+                # watched computed values are evaluated once, after all changes of the batch, and their changes join the batch
+                if self._stale_computed:
+                    self._refresh_computed()
+
+                batch = self._batch
+                self._batch = None
+
+                for watcher, changes in batch.group_by_watcher().items():
+                    self.dispatcher.dispatch(watcher, changes)
 
     def get_watchers(self) -> list[Watcher]:
-        return self._watchers
+        with self._watchers_lock:
+            return list(self._watchers)
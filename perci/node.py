@@ -2,13 +2,54 @@
 Provides a class to represent a node in a reactive tree.
 """
 
-import re
+import itertools
+import json
 import threading
 from contextlib import nullcontext
-from typing import Any, Optional, ContextManager
+from types import MappingProxyType
+from typing import Any, Iterator, Optional, ContextManager
 from .types import AtomicType, UnpackedType
 from .namespace import ReactiveNamespace
 from .changes import AddChange, RemoveChange, UpdateChange
+from .keys import is_key_valid, intern_key
+from .snapshot import SnapshotType
+from .dependencies import DependencyKind
+
+# marks a cached form of a node that has to be rebuilt. A plain None would be ambiguous, as it is a valid leaf value
+_NOT_CACHED = object()
+
+
+def _copy_json(value: Any) -> Any:
+    """
+    Returns a copy of a JSON representation that shares no dicts or lists with it. The copy is made without recursion, so deep
+    trees do not hit the recursion limit.
+    """
+
+    if type(value) is not dict and type(value) is not list:  # pylint: disable=unidiomatic-typecheck
+        return value
+
+    result = value.copy()
+    stack = [result]
+    while stack:
+        container = stack.pop()
+        for key, item in container.items() if type(container) is dict else enumerate(container):  # pylint: disable=unidiomatic-typecheck
+            if type(item) is dict or type(item) is list:  # pylint: disable=unidiomatic-typecheck
+                item = item.copy()
+                container[key] = item
+                stack.append(item)
+
+    return result
+
+
+class _ReadTracking(threading.local):
+    """
+    Holds the tracker of the computed value that is being evaluated on the current thread, if any.
+    """
+
+    tracker = None
+
+
+_read_tracking = _ReadTracking()
 
 
 class MissingNamespaceError(Exception):
@@ -22,24 +63,118 @@ class ReactiveNode:
     Represents a node in a reactive tree.
 
     :param key: The key of the node.
+    :param validate_key: Whether to validate the key. Only disable this for keys that are known to be valid, e.g. list indices.
 
     :raises ValueError: If the key is invalid.
     """
 
+    # builders of detached subtrees by value type, called as builder(key, value) and returning the new node. Before subtrees were
+    # built detached, the registry held methods called as method(parent, key, value) that added the child themselves. The pack_*
+    # methods remain as wrappers for such callers
     PACK_METHODS: dict[type, callable] = {}
 
-    def __init__(self, key: str):
-        if not self.is_key_valid(key):
+    # the generation of the tree a root node belongs to. It is bumped on every structural change in the tree, and cached roots and
+    # paths are only valid if they were computed in the current generation of their root. Generations are handed out once, so
+    # apart from the initial one they also identify the root
+    _generation: int = 0
+    _generation_counter = itertools.count(1)
+
+    # the secondary indexes of this node by field. Only containers that created an index hold their own mapping
+    _indexes: Optional[dict[Optional[str], Any]] = None
+
+    def __init__(self, key: str, validate_key: bool = True):
+        if validate_key and not is_key_valid(key):
             raise ValueError(f"Key {key} is invalid")
 
-        self._key: str = key
+        self._key: str = intern_key(key)
         self._value: AtomicType = None
 
         self._children: dict[str, ReactiveNode] = {}
         self._parent: Optional[ReactiveNode] = None
 
+        # only the root node of a namespace holds a reference to it, all other nodes derive it from their parent chain
         self._namespace: Optional[ReactiveNamespace] = None
-        self._path: list[str] = [self._key]
+
+        self._root_generation: int = -1
+        self._cached_root: Optional[ReactiveNode] = None
+
+        # whether an ancestor has a secondary index, cached along with the root. Modifications only update indexes if it is set
+        self._indexed_ancestor: bool = False
+
+        self._path_generation: int = -1
+        self._cached_path: tuple[str, ...] = ()
+
+        # the block of the position index of the parent list holding this node, and the offset of the node within it. Only list items
+        # have a block, see perci.positions
+        self._block: Optional[Any] = None
+        self._offset: int = 0
+
+        # cached forms of the subtree. If a node is missing one of them, none of its ancestors has it either
+        self._snapshot: SnapshotType = _NOT_CACHED
+        self._json: Any = _NOT_CACHED
+        self._encoded: str = _NOT_CACHED
+
+    def _invalidate_caches(self):
+        """
+        Invalidates the cached roots and paths of the nodes in the tree of this node, leaving other trees alone. Must be called after
+        every structural change.
+        """
+
+        self._get_root()._generation = next(ReactiveNode._generation_counter)
+
+    def _get_root(self) -> "ReactiveNode":
+        """
+        Returns the root of the node's tree. It is cached until the next structural change in the tree, and looking it up fills the
+        caches of all ancestors whose caches are outdated.
+        """
+
+        if self._parent is None:
+            return self
+
+        root = self._cached_root
+        if root is not None and self._root_generation == root._generation:
+            return root
+
+        # collect the nodes with outdated caches, stopping at the root or at the first ancestor that is still valid
+        chain = []
+        node = self
+        while node._parent is not None:
+            root = node._cached_root
+            if root is not None and node._root_generation == root._generation:
+                indexed = node._indexed_ancestor or bool(node._indexes)
+                break
+            chain.append(node)
+            node = node._parent
+        else:
+            root = node
+            indexed = bool(root._indexes)
+
+        # fill the caches from the top, so that each node learns whether any of its ancestors is indexed
+        generation = root._generation
+        for node in reversed(chain):
+            node._cached_root = root
+            node._root_generation = generation
+            node._indexed_ancestor = indexed
+            indexed = indexed or bool(node._indexes)
+
+        return root
+
+    def _update_path_cache(self, generation: int):
+        """
+        Recomputes the cached path of this node, reusing the path of the closest ancestor whose cache is still valid.
+
+        :param generation: The current generation of the node's tree.
+        """
+
+        keys = []
+        node = self
+        while node is not None and node._path_generation != generation:
+            keys.append(node.get_key())
+            node = node._parent
+
+        keys.reverse()
+        self._cached_path = (node._cached_path if node is not None else ()) + tuple(keys)
+        self._path_generation = generation
 
     @staticmethod
     def is_key_valid(key: str) -> bool:
@@ -49,7 +184,7 @@ class ReactiveNode:
         :param key: The key to check.
         """
 
-        return bool(re.match(r"^[a-zA-Z0-9_-]+$", key))
+        return is_key_valid(key)
 
     def _namespace_lock(self) -> threading.Lock:
         """
@@ -60,27 +195,56 @@ class ReactiveNode:
         :return: The lock of the namespace.
         """
 
-        if not self._namespace:
+        namespace = self.get_namespace()
+        if not namespace:
             raise MissingNamespaceError("Node is not part of a namespace")
 
-        return self._namespace.lock
+        return namespace.lock
 
     def _optional_namespace_lock(self) -> ContextManager:
         """
-        Returns the lock of the namespace of the node if it exists.
+        Returns the lock of the namespace that guards modifications of this node if the namespace exists.
 
         :return: The lock of the namespace or a null context manager.
         """
 
-        return self._namespace.lock if self._namespace else nullcontext()
+        namespace = self.get_namespace()
+        return namespace.lock_for(self) if namespace else nullcontext()
+
+    def _track_read(self, kind: DependencyKind, keys: tuple[str, ...] = ()):
+        """
+        Records a read of this node, or of the descendant at the given keys, for the computed value that is being evaluated on the
+        current thread.
+
+        :param kind: How much of the node was read.
+        :param keys: The keys of the descendant relative to this node.
+        """
+
+        tracker = _read_tracking.tracker
+        if tracker is not None:
+            tracker.record(self, kind, keys)
 
     def get_key(self) -> str:
         """
         Returns the key of this node.
         """
 
+        if self._parent is not None:
+            return self._parent._get_child_key(self)  # pylint: disable=protected-access
+
         return self._key
 
+    def _get_child_key(self, child: "ReactiveNode") -> str:
+        """
+        Returns the key of one of the node's children. Containers that derive keys from positions may override this.
+
+        :param child: The child to get the key of.
+
+        :return: The key of the child.
+        """
+
+        return child._key  # pylint: disable=protected-access
+
     def set_key(self, key: str):
         """
         Sets the key of the node. This only works if the node is not part of a namespace.
@@ -90,13 +254,14 @@ class ReactiveNode:
         :raises ValueError: If the key is invalid.
         """
 
-        if not self.is_key_valid(key):
+        if not is_key_valid(key):
             raise ValueError(f"Key {key} is invalid")
 
-        if self._namespace:
+        if self.get_namespace():
             raise ValueError("Cannot change key when node is part of a namespace")
 
-        self._key = key
+        self._key = intern_key(key)
+        self._invalidate_caches()
 
     def get_value_repr(self) -> str:
         """
@@ -115,6 +280,7 @@ class ReactiveNode:
         if not self.is_leaf():
             raise ValueError("Node is not a leaf")
 
+        self._track_read(DependencyKind.VALUE)
         return self._value
 
     def set_value(self, value: AtomicType):
@@ -130,13 +296,16 @@ class ReactiveNode:
             if not self.is_leaf():
                 raise ValueError("Node is not a leaf")
 
-            if self._value == value:
+            # 1, True and 1.0 compare equal but encode differently, so only a value of the same type is unchanged, as in diff()
+            if type(self._value) is type(value) and self._value == value:  # pylint: disable=unidiomatic-typecheck
                 return
 
             self._value = value
+            self._invalidate_cached_forms()
 
-            if self._namespace:
-                self._namespace.invoke_watcher(UpdateChange(path=self._path, value=value))
+            namespace = self.get_namespace()
+            if namespace:
+                namespace.invoke_watcher(UpdateChange(path=self._get_path_tuple(), value=value))
 
     def add_child(self, child: "ReactiveNode"):
         """
@@ -144,46 +313,106 @@ class ReactiveNode:
 
         :param child: The child to add.
 
+        The child may already have children of its own, e.g. when it was built detached. In that case a single change describing
+        the whole subtree is emitted. Detached nodes can be populated without a namespace, in which case no lock is taken and no
+        changes are emitted.
+
         :raises KeyError: If the child already exists.
         :raises ValueError: If the child already has a parent.
         """
 
-        with self._namespace_lock():
+        with self._optional_namespace_lock():
             if child.get_key() in self._children:
                 raise KeyError(f"Child {child.get_key()} already exists")
             if child.get_parent():
                 raise ValueError(f"Child {child.get_key()} already has a parent")
+            if child.get_namespace():
+                raise ValueError(f"Child {child.get_key()} is already part of a namespace")
+
+            # the child is no longer a root, so the caches of its subtree refer to the wrong tree
+            child._invalidate_caches()  # pylint: disable=protected-access
 
             self._children[child.get_key()] = child
             child._parent = self  # pylint: disable=protected-access
-            child.set_namespace(self._namespace, self._path + [child.get_key()])
+            self._add_to_indexes([child])
+            self._invalidate_caches()
+            self._invalidate_cached_forms()
 
-            self._namespace.invoke_watcher(AddChange(path=self._path, key=child.get_key(), repr=child.get_value_repr(), value=child.get_value()))
+            namespace = self.get_namespace()
+            if namespace:
+                path = self._get_path_tuple()
+                namespace.index_node(path + (child.get_key(),), child)
+                namespace.invoke_watcher(AddChange(path=path, key=child.get_key(), repr=child.get_value_repr(), value=child._copy_json()))  # pylint: disable=protected-access
 
     def remove_child(self, key: str):
         """
-        Removes a child from the node.
+        Removes a child from the node. Like add_child(), this works on detached nodes without a namespace, in which case no lock is
+        taken and no changes are emitted.
 
         :param key: The key of the child to remove.
 
         :raises KeyError: If the child does not exist.
         """
 
-        with self._namespace_lock():
+        with self._optional_namespace_lock():
             if key not in self._children:
                 raise KeyError(f"Child {key} does not exist")
 
             child = self._children.pop(key)
             child._parent = None  # pylint: disable=protected-access
-            child.set_namespace(None, [child.get_key()])
+            child._invalidate_caches()  # pylint: disable=protected-access
+            self._remove_from_indexes([child])
+            self._invalidate_caches()
+            self._invalidate_cached_forms()
 
-            # remove any watchers for this child and its descendants
-            self._namespace.remove_watcher_by_path(self._path + [key])
+            namespace = self.get_namespace()
+            if namespace:
+                # remove any watchers for this child and its descendants
+                path = self._get_path_tuple()
+                namespace.remove_watcher_by_path(list(path) + [key])
+                namespace.unindex_node(path + (key,))
 
-            self._namespace.invoke_watcher(RemoveChange(path=self._path, key=key))
+                namespace.invoke_watcher(RemoveChange(path=path, key=key))
 
             return child
 
+    def _replace_child(self, child: "ReactiveNode", replacement: "ReactiveNode"):
+        """
+        Swaps a child for a new detached node under the same key and emits a single update change with the representation of the new
+        node. The watchers of the child stay registered, as the new node takes its place.
+
+        :param child: The child to replace.
+        :param replacement: The detached node to put in its place.
+
+        :raises ValueError: If the child is not a child of this node or the replacement already has a parent.
+        """
+
+        with self._optional_namespace_lock():
+            key = child.get_key()
+            if self._children.get(key) is not child:
+                raise ValueError(f"Node {key} is not a child of {self.get_key()}")
+            if replacement.get_parent() or replacement.get_namespace():
+                raise ValueError(f"Child {replacement.get_key()} already has a parent or is part of a namespace")
+
+            child._parent = None  # pylint: disable=protected-access
+            child._invalidate_caches()  # pylint: disable=protected-access
+
+            replacement._key = key  # pylint: disable=protected-access
+            replacement._invalidate_caches()  # pylint: disable=protected-access
+            replacement._parent = self  # pylint: disable=protected-access
+            self._children[key] = replacement
+
+            self._remove_from_indexes([child])
+            self._add_to_indexes([replacement])
+            self._invalidate_caches()
+            self._invalidate_cached_forms()
+
+            namespace = self.get_namespace()
+            if namespace:
+                path = replacement._get_path_tuple()  # pylint: disable=protected-access
+                namespace.index_node(path, replacement)
+                namespace.invoke_watcher(UpdateChange(path=path, value=replacement._copy_json()))  # pylint: disable=protected-access
+
     def has_child(self, key: str) -> bool:
         """
         Returns whether the node has a child with the given key.
@@ -191,6 +420,7 @@ class ReactiveNode:
         :param key: The key of the child to check for.
         """
 
+        self._track_read(DependencyKind.VALUE, (key,))
         return key in self._children
 
     def get_child(self, key: str) -> Optional["ReactiveNode"]:
@@ -202,6 +432,7 @@ class ReactiveNode:
         :return: The child node or None if it does not exist.
         """
 
+        self._track_read(DependencyKind.VALUE, (key,))
         return self._children.get(key)
 
     def get_children(self) -> dict[str, "ReactiveNode"]:
@@ -209,8 +440,33 @@ class ReactiveNode:
         Returns the children of the node.
         """
 
+        self._track_read(DependencyKind.STRUCTURE)
         return self._children
 
+    def _find_descendant(self, keys: tuple[str, ...]) -> Optional["ReactiveNode"]:
+        """
+        Returns the descendant at the given keys, looking it up in the path index of the namespace if there is one.
+
+        :param keys: The keys of the path relative to this node. Keys of list items are their indices.
+
+        :return: The descendant or None if the path does not exist.
+        """
+
+        if not keys:
+            return self
+
+        namespace = self.get_namespace()
+        if namespace:
+            return namespace.find_node(self._get_path_tuple() + keys)
+
+        node = self
+        for key in keys:
+            node = node.get_child(key)
+            if node is None:
+                return None
+
+        return node
+
     def get_parent(self) -> Optional["ReactiveNode"]:
         """
         Returns the parent of the node.
@@ -220,44 +476,53 @@ class ReactiveNode:
 
     def get_namespace(self) -> Optional[ReactiveNamespace]:
         """
-        Returns the namespace of the node.
+        Returns the namespace of the node. It is held by the root of the node's tree, which is cached until the next structural change
+        in the tree.
         """
 
-        return self._namespace
+        return self._get_root()._namespace
 
-    def set_namespace(self, namespace: ReactiveNamespace, path: list[str]):
+    def set_namespace(self, namespace: ReactiveNamespace):
         """
-        Sets the namespace of the node.
+        Sets the namespace of a root node. All descendants derive their namespace from the root, so this is O(1).
 
         :param namespace: The new namespace of the node.
-        :param path: The path of the node in the namespace.
 
-        :raises ValueError: If the node is already part of a namespace.
+        :raises ValueError: If the node is already part of a namespace or is not a root node.
         """
 
+        if self._parent is not None:
+            raise ValueError(f"Node {self.get_key()} is not a root node")
         if namespace and self._namespace:
             raise ValueError(f"Node {self.get_key()} is already part of a namespace")
 
         self._namespace = namespace
-        self._path = path
 
-        # update children recursively
-        for key, child in self._children.items():
-            child.set_namespace(namespace, path + [key])
+    def _get_path_tuple(self) -> tuple[str, ...]:
+        """
+        Returns the cached path of the node as a tuple. The tuple is shared, but immutable.
+        """
+
+        generation = self._get_root()._generation
+        if self._path_generation != generation:
+            self._update_path_cache(generation)
+
+        return self._cached_path
 
     def get_path(self) -> list[str]:
         """
-        Returns the path of the node in the namespace.
+        Returns the path of the node in the namespace. The path is derived from the parent chain and cached until the next
+        structural change in its tree, so it never goes stale when items of a list are shifted.
         """
 
-        return self._path
+        return list(self._get_path_tuple())
 
     def get_path_repr(self) -> str:
         """
         Returns a string representation of the path of the node.
         """
 
-        return ".".join(self._path)
+        return ".".join(self._get_path_tuple())
 
     def is_leaf(self) -> bool:
         """
@@ -273,15 +538,333 @@ class ReactiveNode:
 
         return self._parent is None
 
+    def _invalidate_cached_forms(self):
+        """
+        Discards the cached snapshots, JSON representations and encodings of this node and its ancestors. Must be called after every
+        modification of the node.
+        """
+
+        if self._has_indexed_ancestor():
+            self._update_ancestor_indexes()
+
+        node = self
+        while node is not None and (node._snapshot is not _NOT_CACHED or node._json is not _NOT_CACHED or node._encoded is not _NOT_CACHED):
+            node._snapshot = _NOT_CACHED
+            node._json = _NOT_CACHED
+            node._encoded = _NOT_CACHED
+            node = node._parent
+
+    def _has_indexed_ancestor(self) -> bool:
+        """
+        Returns whether an ancestor of this node has a secondary index. The answer is cached along with the root of the node.
+        """
+
+        if self._parent is None:
+            return False
+
+        self._get_root()
+        return self._indexed_ancestor
+
+    def _update_ancestor_indexes(self):
+        """
+        Indexes the branch containing this node again in every indexed ancestor, as the modification may have changed a value at an
+        indexed field.
+        """
+
+        child, node = self, self._parent
+        while node is not None:
+            if node._indexes:
+                for index in node._indexes.values():
+                    index.update(child)
+            child, node = node, node._parent
+
+    def _add_to_indexes(self, children: list["ReactiveNode"]):
+        """
+        Adds new children to the secondary indexes of this node, if it has any.
+        """
+
+        if self._indexes:
+            for index in self._indexes.values():
+                for child in children:
+                    index.add(child)
+
+    def _remove_from_indexes(self, children: list["ReactiveNode"]):
+        """
+        Removes former children from the secondary indexes of this node, if it has any.
+        """
+
+        if self._indexes:
+            for index in self._indexes.values():
+                for child in children:
+                    index.discard(child)
+
+    def create_index(self, field: Optional[str] = None):
+        """
+        Creates a secondary index that maps the values of the children, or the values at a field of them, to the children. The index
+        is updated along with every modification, so that find() takes time proportional to the number of matches rather than the
+        number of children. Creating an index that already exists does nothing.
+
+        :param field: The dotted path of the field relative to each child, e.g. "status". Defaults to the values of the children.
+
+        :raises ValueError: If the field is not a valid dotted path.
+        """
+
+        # the index module builds on the node class, so it can only be imported once it is defined
+        from .index import build_index  # pylint: disable=import-outside-toplevel
+
+        if field is not None and not all(is_key_valid(key) for key in field.split(".")):
+            raise ValueError(f"Field {field} is invalid")
+
+        with self._optional_namespace_lock():
+            if self._indexes is None:
+                self._indexes = {}
+            if field in self._indexes:
+                return
+
+            self._indexes[field] = build_index(self, field)
+
+            # the descendants cache whether they have an indexed ancestor along with their root
+            self._invalidate_caches()
+
+    def drop_index(self, field: Optional[str] = None):
+        """
+        Removes a secondary index.
+
+        :param field: The field of the index. Defaults to the index of the values of the children.
+
+        :raises KeyError: If there is no such index.
+        """
+
+        with self._optional_namespace_lock():
+            if not self._indexes or field not in self._indexes:
+                raise KeyError(f"There is no index for {field}")
+
+            del self._indexes[field]
+            self._invalidate_caches()
+
+    def has_index(self, field: Optional[str] = None) -> bool:
+        """
+        Returns whether there is a secondary index for a field.
+
+        :param field: The field of the index. Defaults to the index of the values of the children.
+        """
+
+        return self._indexes is not None and field in self._indexes
+
+    def _find_children(self, value: AtomicType, field: Optional[str] = None) -> list["ReactiveNode"]:
+        """
+        Returns the children with a value at a field, using the secondary index if there is one and scanning the children otherwise.
+        The caller must hold the lock.
+        """
+
+        from .index import scan_children  # pylint: disable=import-outside-toplevel
+
+        self._track_read(DependencyKind.DEEP)
+
+        index = self._indexes.get(field) if self._indexes else None
+        if index is not None:
+            return index.find(value)
+
+        return scan_children(self, value, field)
+
+    def find(self, value: AtomicType, field: Optional[str] = None) -> list[str]:
+        """
+        Returns the keys of the children with the given value, or with the given value at a field. Uses the secondary index created
+        with create_index() if there is one, and scans the children otherwise.
+
+        :param value: The value to look for. Values that compare equal, such as 1 and 1.0, are found together.
+        :param field: The dotted path of the field relative to each child, e.g. "status". Defaults to the values of the children.
+
+        :return: The keys of the matching children, in no particular order.
+        """
+
+        with self._optional_namespace_lock():
+            return [self._get_child_key(child) for child in self._find_children(value, field)]
+
+    def _child_nodes(self) -> list["ReactiveNode"]:
+        """
+        Returns the children of this node in the order of its cached forms.
+        """
+
+        return list(self._children.values())
+
+    def _uncached_nodes(self, attribute: str) -> list["ReactiveNode"]:
+        """
+        Returns the nodes of the subtree that are missing the given cached form, with every child before its parent. The tree is
+        walked without recursion, as it can be deeper than the recursion limit.
+
+        :param attribute: The attribute holding the cached form.
+        """
+
+        nodes = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(child for child in node._child_nodes() if getattr(child, attribute) is _NOT_CACHED)
+
+        nodes.reverse()
+        return nodes
+
+    def _freeze(self) -> SnapshotType:
+        """
+        Builds the snapshot of this node from the cached snapshots of its children.
+        """
+
+        if self.is_leaf():
+            return self._value
+
+        return MappingProxyType({key: child._snapshot for key, child in self._children.items()})
+
+    def snapshot(self) -> SnapshotType:
+        """
+        Returns an immutable view of the node and its descendants. Dict nodes become read-only mappings, list nodes become tuples and
+        leaves become their values.
+
+        Snapshots are cached per node and a modification only discards the snapshots on the path from the modified node to the root.
+        Taking a snapshot of an unchanged tree is therefore O(1), and successive snapshots share all unchanged subtrees. The snapshot
+        is built under the lock of the node, so it never mixes states of concurrent writers.
+        """
+
+        self._track_read(DependencyKind.DEEP)
+        with self._optional_namespace_lock():
+            if self._snapshot is _NOT_CACHED:
+                for node in self._uncached_nodes("_snapshot"):
+                    node._snapshot = node._freeze()
+
+            return self._snapshot
+
+    def update_from(self, data: Any):
+        """
+        Updates this node to match the given data with a minimal set of changes, which are applied in a single batch. Unchanged
+        subtrees are left alone, list items are matched by their longest common subsequence and moved items are moved rather than
+        removed and added again. See perci.diff.diff().
+
+        :param data: The new data. Reactive nodes are compared by their JSON representation.
+
+        :raises PatchError: If the node cannot be changed into the type of the data.
+        """
+
+        from .diff import diff  # pylint: disable=import-outside-toplevel
+
+        with self._optional_namespace_lock():
+            self.apply_patch(diff(self._get_json(), data))
+
+    def _build_json(self) -> Any:
+        """
+        Builds the JSON representation of this node from the cached representations of its children.
+        """
+
+        if self.is_leaf():
+            return self._value
+
+        return {key: child._json for key, child in self._children.items()}
+
+    def _get_json(self) -> Any:
+        """
+        Returns the cached JSON representation of the node, rebuilding only the outdated branches. The caller must hold the lock.
+        """
+
+        if self._json is _NOT_CACHED:
+            for node in self._uncached_nodes("_json"):
+                node._json = node._build_json()
+
+        return self._json
+
+    def _copy_json(self) -> Any:
+        """
+        Returns a private copy of the cached JSON representation of the node, for results and changes that leave the node. The caller
+        must hold the lock.
+        """
+
+        return _copy_json(self._get_json())
+
+    def apply_patch(self, operations: list[dict]):
+        """
+        Applies JSON Patch (RFC 6902) operations to this node in a single batch. See perci.patch.apply_patch().
+
+        :param operations: The operations to apply. Their paths are relative to this node.
+
+        :raises PatchError: If an operation is malformed or cannot be applied.
+        """
+
+        # the patch module builds on the node classes, so it can only be imported once they are defined
+        from .patch import apply_patch  # pylint: disable=import-outside-toplevel
+
+        apply_patch(self, operations)
+
+    def query(self, pattern: str) -> list[tuple[str, UnpackedType]]:
+        """
+        Returns all values below this node whose path matches a pattern. See perci.query.
+
+        :param pattern: The dotted path pattern relative to this node. "*" matches any single key and "**" any number of keys, e.g.
+            "devices.*.status" or "**.status".
+
+        :raises ValueError: If a part of the pattern is neither a valid key nor a wildcard.
+
+        :return: The dotted paths of the matches relative to this node, and their unpacked values, in depth-first order.
+        """
+
+        from .query import query  # pylint: disable=import-outside-toplevel
+
+        return query(self, pattern)
+
+    def query_iter(self, pattern: str) -> Iterator[tuple[str, UnpackedType]]:
+        """
+        Yields all values below this node whose path matches a pattern, walking the tree lazily so that large results are never
+        collected. Unlike query(), the lock is not held between the matches, so the tree must not be modified while iterating.
+
+        :param pattern: The dotted path pattern relative to this node, e.g. "devices.*.status".
+
+        :raises ValueError: If a part of the pattern is neither a valid key nor a wildcard.
+
+        :return: A generator of the dotted paths of the matches relative to this node, and their unpacked values.
+        """
+
+        from .query import compile_query  # pylint: disable=import-outside-toplevel
+
+        return compile_query(pattern).iter(self)
+
     def json(self) -> Any:
         """
         Returns a JSON-serializable representation of the node.
+
+        The representation is cached per node and a modification only rebuilds the branches on the path from the modified node to
+        the root. The result is a copy of the cache that belongs to the caller and may be modified freely, so every call still takes
+        time linear in the size of the subtree; the cache only saves rebuilding it from the nodes. Use snapshot() for an immutable
+        view that is returned in O(1) and shares unchanged subtrees instead of copying them, or dumps() for the encoded form.
+        """
+
+        self._track_read(DependencyKind.DEEP)
+        with self._optional_namespace_lock():
+            return self._copy_json()
+
+    def _encode(self) -> str:
+        """
+        Encodes this node as a JSON string by splicing together the cached encodings of its children.
         """
 
         if self.is_leaf():
-            return self.get_value()
-        else:
-            return {key: child.json() for key, child in self._children.items()}
+            return json.dumps(self._value)
+
+        return "{" + ", ".join(f'"{key}": {child._encoded}' for key, child in self._children.items()) + "}"
+
+    def dumps(self) -> str:
+        """
+        Returns the node encoded as a JSON string, equal to json.dumps(node.json()).
+
+        The encoding of every subtree is cached, so only the branches on the path from a modified node to the root are encoded again.
+        As every level holds the encoding of its whole subtree, the cache takes memory proportional to the encoded size times the
+        depth of the tree.
+        """
+
+        self._track_read(DependencyKind.DEEP)
+        with self._optional_namespace_lock():
+            if self._encoded is _NOT_CACHED:
+                for node in self._uncached_nodes("_encoded"):
+                    node._encoded = node._encode()
+
+            return self._encoded
 
     def __str__(self) -> str:
         return str(self.json())
@@ -299,20 +882,85 @@ class ReactiveNode:
         else:
             return self
 
-    def pack_atomic(self, key: str, value: AtomicType):
-        child = ReactiveNode(key)
-        child.set_value(value)
-        self.add_child(child)
+    @staticmethod
+    def build_atomic(key: str, value: AtomicType) -> "ReactiveNode":
+        """
+        Builds a detached leaf node holding the given value.
+
+        :param key: The key of the node.
+        :param value: The value of the node.
+
+        :raises ValueError: If the value is not an atomic type.
+
+        :return: The new node.
+        """
+
+        if not isinstance(value, (int, float, str, bool, type(None))):
+            raise ValueError(f"Value {value} is not an atomic type")
+
+        node = ReactiveNode(key, validate_key=False)
+        node._value = value
+        return node
+
+    @staticmethod
+    def build(key: str, value: Any, validate_key: bool = True) -> "ReactiveNode":
+        """
+        Builds a detached subtree for the given value using the registered pack methods. No locks are taken and no changes are
+        emitted, as nobody can be watching the subtree yet. Attaching the result with add_child() emits a single change for the
+        whole subtree.
+
+        The registered pack methods receive keys that were already validated, so they may construct their nodes with
+        validate_key=False.
+
+        :param key: The key of the subtree root.
+        :param value: The value to build the subtree from. Nodes are copied by their JSON representation.
+        :param validate_key: Whether to validate the key. Defaults to True.
+
+        :raises ValueError: If the key is invalid or the value has an unsupported type.
+
+        :return: The root of the new subtree.
+        """
+
+        if validate_key and not is_key_valid(key):
+            raise ValueError(f"Key {key} is invalid")
+
+        pack_method = ReactiveNode.PACK_METHODS.get(type(value))
+        if pack_method is None:
+            if isinstance(value, ReactiveNode):
+                return ReactiveNode.build(key, value.json(), validate_key=False)
 
-    def pack(self, key: str, value: Any):
-        if type(value) not in ReactiveNode.PACK_METHODS:
             raise ValueError(f"Cannot pack item {key}={value} of unsupported type {type(value)}")
 
-        ReactiveNode.PACK_METHODS[type(value)](self, key, value)
+        return pack_method(key, value)
+
+    def pack(self, key: str, value: Any):
+        """
+        Builds a subtree for the given value and adds it as a child.
+
+        :param key: The key of the child.
+        :param value: The value to pack.
+        """
+
+        self.add_child(ReactiveNode.build(key, value))
+
+    def pack_atomic(self, key: str, value: AtomicType):
+        """
+        Adds a leaf holding the given value as a child. Kept for compatibility, use build_atomic() or pack() instead.
+
+        :param key: The key of the child.
+        :param value: The value of the child.
+
+        :raises ValueError: If the key is invalid or the value is not an atomic type.
+        """
+
+        if not is_key_valid(key):
+            raise ValueError(f"Key {key} is invalid")
+
+        self.add_child(ReactiveNode.build_atomic(key, value))
 
 
-ReactiveNode.PACK_METHODS[int] = ReactiveNode.pack_atomic
-ReactiveNode.PACK_METHODS[float] = ReactiveNode.pack_atomic
-ReactiveNode.PACK_METHODS[str] = ReactiveNode.pack_atomic
-ReactiveNode.PACK_METHODS[bool] = ReactiveNode.pack_atomic
-ReactiveNode.PACK_METHODS[type(None)] = ReactiveNode.pack_atomic
+ReactiveNode.PACK_METHODS[int] = ReactiveNode.build_atomic
+ReactiveNode.PACK_METHODS[float] = ReactiveNode.build_atomic
+ReactiveNode.PACK_METHODS[str] = ReactiveNode.build_atomic
+ReactiveNode.PACK_METHODS[bool] = ReactiveNode.build_atomic
+ReactiveNode.PACK_METHODS[type(None)] = ReactiveNode.build_atomic
@@ -0,0 +1,369 @@
+"""
+Provides conversion between change streams and JSON Patch (RFC 6902) documents.
+"""
+
+from contextlib import nullcontext
+from typing import Any, Iterable, Sequence
+from .changes import Change, AddChange, RemoveChange, UpdateChange, ListInsertChange, ListDeleteChange, ListMoveChange, ListReplaceChange, ListSpliceChange
+from .node import ReactiveNode
+from .dict_node import ReactiveDictNode
+from .list_node import ReactiveListNode
+from .array_node import ReactiveArrayNode
+from .watcher import Watcher
+from .keys import is_key_valid
+
+# nodes whose children are addressed by index
+_SEQUENCE_NODES = (ReactiveListNode, ReactiveArrayNode)
+
+
+class PatchError(ValueError):
+    """
+    Raised when a patch operation is malformed or cannot be applied.
+    """
+
+
+def escape_pointer_key(key: str) -> str:
+    """
+    Escapes a key for use in a JSON pointer.
+
+    :param key: The key to escape.
+    """
+
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def unescape_pointer_key(key: str) -> str:
+    """
+    Reverts escape_pointer_key().
+
+    :param key: The escaped key.
+    """
+
+    return key.replace("~1", "/").replace("~0", "~")
+
+
+def to_pointer(path: Sequence[str]) -> str:
+    """
+    Returns the JSON pointer for a path relative to the patched node.
+
+    :param path: The keys of the path.
+    """
+
+    return "".join("/" + escape_pointer_key(key) for key in path)
+
+
+def from_pointer(pointer: str) -> list[str]:
+    """
+    Returns the keys of a JSON pointer.
+
+    :param pointer: The pointer to parse.
+
+    :raises PatchError: If the pointer is not empty and does not start with a slash.
+    """
+
+    if not pointer:
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer {pointer!r}")
+
+    return [unescape_pointer_key(key) for key in pointer[1:].split("/")]
+
+
+def change_to_patch(change: Change, base_path: Sequence[str] = ()) -> list[dict]:
+    """
+    Converts a single change into JSON Patch operations.
+
+    :param change: The change to convert.
+    :param base_path: The path of the patched node. It is stripped from the paths of the operations.
+
+    :raises ValueError: If the change did not occur at or below the base path.
+
+    :return: The operations.
+    """
+
+    if tuple(change.path[: len(base_path)]) != tuple(base_path):
+        raise ValueError(f"Change at {change.path} is not below {base_path}")
+
+    pointer = to_pointer(change.path[len(base_path) :])
+
+    if isinstance(change, AddChange):
+        return [{"op": "add", "path": f"{pointer}/{escape_pointer_key(change.key)}", "value": change.value}]
+    elif isinstance(change, RemoveChange):
+        return [{"op": "remove", "path": f"{pointer}/{escape_pointer_key(change.key)}"}]
+    elif isinstance(change, UpdateChange):
+        return [{"op": "replace", "path": pointer, "value": change.value}]
+    elif isinstance(change, ListInsertChange):
+        return [{"op": "add", "path": f"{pointer}/{change.index + i}", "value": value} for i, value in enumerate(change.values)]
+    elif isinstance(change, ListDeleteChange):
+        return [{"op": "remove", "path": f"{pointer}/{change.index}"} for _ in range(change.count)]
+    elif isinstance(change, ListMoveChange):
+        return [{"op": "move", "from": f"{pointer}/{change.index}", "path": f"{pointer}/{change.target}"}]
+    elif isinstance(change, ListReplaceChange):
+        return [{"op": "replace", "path": f"{pointer}/{change.index + i}", "value": value} for i, value in enumerate(change.values)]
+    elif isinstance(change, ListSpliceChange):
+        removals = [{"op": "remove", "path": f"{pointer}/{change.index}"} for _ in range(change.count)]
+        return removals + [{"op": "add", "path": f"{pointer}/{change.index + i}", "value": value} for i, value in enumerate(change.values)]
+    else:
+        raise ValueError(f"Unsupported change type {type(change)}")
+
+
+def coalesce_patch(operations: Iterable[dict]) -> list[dict]:
+    """
+    Removes redundant operations from a patch:
+
+    - A removal directly followed by an addition at the same path becomes a replacement.
+    - An addition directly followed by a removal at the same path is dropped. Additions are assumed to create new members, as they do
+      in patches converted from changes.
+    - Replacements of the same path collapse into the earlier addition or replacement, as long as only replacements of unrelated
+      paths happened in between. Any other operation may change what a path refers to, and a replacement of an ancestor or
+      descendant has to stay ordered relative to it, so they stop the coalescing.
+
+    The given operations are not modified.
+
+    :param operations: The operations to coalesce.
+
+    :return: The coalesced operations.
+    """
+
+    result: list[dict] = []
+    values: dict[str, int] = {}
+
+    for operation in operations:
+        op = operation["op"]
+        path = operation["path"]
+        previous = result[-1] if result else None
+
+        if op == "replace":
+            # a later replacement of a related path must not move in front of this one
+            prefix = path + "/"
+            for related in [tracked for tracked in values if tracked.startswith(prefix) or path.startswith(tracked + "/")]:
+                del values[related]
+
+            index = values.get(path)
+            if index is not None:
+                result[index] = {**result[index], "value": operation["value"]}
+                continue
+
+            values[path] = len(result)
+            result.append(operation)
+            continue
+
+        values.clear()
+
+        if previous is not None and previous["path"] == path:
+            if op == "add" and previous["op"] == "remove":
+                result[-1] = {"op": "replace", "path": path, "value": operation["value"]}
+                values[path] = len(result) - 1
+                continue
+
+            if op == "remove" and previous["op"] == "add":
+                result.pop()
+                continue
+
+        if op == "add":
+            values[path] = len(result)
+        result.append(operation)
+
+    return result
+
+
+def changes_to_patch(changes: Iterable[Change], base_path: Sequence[str] = ()) -> list[dict]:
+    """
+    Converts a stream of changes into a coalesced JSON Patch.
+
+    :param changes: The changes to convert, in the order they occurred.
+    :param base_path: The path of the patched node. It is stripped from the paths of the operations.
+
+    :return: The operations.
+    """
+
+    return coalesce_patch(operation for change in changes for operation in change_to_patch(change, base_path))
+
+
+class PatchWatcher(Watcher):
+    """
+    Calls a handler with a coalesced JSON Patch for every change or batch of changes at or below a path. The paths of the operations
+    are relative to the watched node, so the patch can be applied to a replica of it.
+
+    :param path: The path of the watched node. It must not contain wildcards, as the operations are relative to a single node.
+    :param handler: The handler to call with the list of operations.
+
+    :raises ValueError: If the path contains a wildcard.
+    """
+
+    def __init__(self, path: list[str], handler: callable):
+        if "*" in path:
+            raise ValueError(f"Patch watchers cannot watch wildcard paths, got {'.'.join(path)}")
+
+        super().__init__(path, handler, batched=True)
+
+    def notify(self, change: Change):
+        self.notify_batch([change])
+
+    def notify_batch(self, changes: list[Change]):
+        # the namespace updates the path when the watched node moves within a list, so it is read on every call
+        operations = changes_to_patch(changes, tuple(self.path))
+        if operations:
+            self.handler(operations)
+
+
+def _list_index(node: ReactiveNode, key: str, allow_end: bool) -> int:
+    if allow_end and key == "-":
+        return len(node)
+    if not key.isdecimal() or str(int(key)) != key:
+        raise PatchError(f"Invalid list index {key!r}")
+
+    index = int(key)
+    if index > len(node) or (index == len(node) and not allow_end):
+        raise PatchError(f"List index {index} out of bounds")
+
+    return index
+
+
+def _resolve(node: ReactiveNode, keys: list[str]) -> ReactiveNode:
+    for key in keys:
+        child = node.get_child(key)
+        if child is None:
+            raise PatchError(f"Path /{'/'.join(keys)} does not exist")
+        node = child
+
+    return node
+
+
+def _resolve_json(node: ReactiveNode, keys: list[str]) -> Any:
+    # the items of array nodes are plain values without nodes of their own
+    if keys:
+        parent = _resolve(node, keys[:-1])
+        if isinstance(parent, ReactiveArrayNode):
+            return parent[_list_index(parent, keys[-1], allow_end=False)]
+
+    return _resolve(node, keys).json()
+
+
+def _set_child(parent: ReactiveNode, key: str, value: Any):
+    # dict nodes would treat dots as nested keys, so invalid keys are rejected up front
+    if not is_key_valid(key):
+        raise PatchError(f"Key {key!r} is invalid")
+
+    if isinstance(parent, ReactiveDictNode):
+        parent[key] = value
+        return
+
+    if parent.has_child(key):
+        parent.remove_child(key)
+    parent.pack(key, value)
+
+
+def _add(parent: ReactiveNode, key: str, value: Any):
+    if isinstance(parent, _SEQUENCE_NODES):
+        parent.insert(_list_index(parent, key, allow_end=True), value)
+    else:
+        _set_child(parent, key, value)
+
+
+def _remove(parent: ReactiveNode, key: str):
+    if isinstance(parent, _SEQUENCE_NODES):
+        del parent[_list_index(parent, key, allow_end=False)]
+    elif parent.has_child(key):
+        parent.remove_child(key)
+    else:
+        raise PatchError(f"Cannot remove missing key {key!r}")
+
+
+def _replace(parent: ReactiveNode, key: str, value: Any):
+    if isinstance(parent, _SEQUENCE_NODES):
+        parent[_list_index(parent, key, allow_end=False)] = value
+    elif parent.has_child(key):
+        _set_child(parent, key, value)
+    else:
+        raise PatchError(f"Cannot replace missing key {key!r}")
+
+
+def _replace_root(node: ReactiveNode, value: Any):
+    if isinstance(node, _SEQUENCE_NODES) and isinstance(value, list):
+        node[:] = value
+    elif isinstance(value, dict) and not isinstance(node, _SEQUENCE_NODES):
+        for key in [key for key in node.get_children() if key not in value]:
+            node.remove_child(key)
+        for key, item in value.items():
+            _set_child(node, key, item)
+    elif node.is_leaf() and not isinstance(value, (dict, list)):
+        node.set_value(value)
+    else:
+        raise PatchError("The patched node cannot be replaced by a value of a different type")
+
+
+def _apply_operation(node: ReactiveNode, operation: dict):
+    try:
+        op = operation["op"]
+        keys = from_pointer(operation["path"])
+    except KeyError as e:
+        raise PatchError(f"Operation {operation} is missing {e}") from e
+
+    if op in ("add", "replace", "test") and "value" not in operation:
+        raise PatchError(f"Operation {operation} is missing 'value'")
+    if op in ("move", "copy") and "from" not in operation:
+        raise PatchError(f"Operation {operation} is missing 'from'")
+
+    if op == "test":
+        if _resolve_json(node, keys) != operation["value"]:
+            raise PatchError(f"Test of {operation['path']} failed")
+        return
+
+    if op in ("move", "copy"):
+        source = from_pointer(operation["from"])
+        if op == "move" and keys[: len(source)] == source and len(keys) > len(source):
+            raise PatchError("Cannot move a value into one of its children")
+
+        if op == "move" and keys == source:
+            return
+
+        # moves within a list keep the node of the item, so that its watchers follow it
+        if op == "move" and source and keys and keys[:-1] == source[:-1]:
+            parent = _resolve(node, keys[:-1])
+            if isinstance(parent, ReactiveListNode):
+                parent.move_child(_list_index(parent, source[-1], allow_end=False), _list_index(parent, keys[-1], allow_end=False))
+                return
+
+        value = _resolve_json(node, source)
+        if op == "move":
+            _remove(_resolve(node, source[:-1]), source[-1])
+
+        op = "add"
+    else:
+        value = operation.get("value")
+
+    if not keys:
+        if op == "remove":
+            raise PatchError("Cannot remove the patched node itself")
+        _replace_root(node, value)
+        return
+
+    parent = _resolve(node, keys[:-1])
+    if op == "add":
+        _add(parent, keys[-1], value)
+    elif op == "remove":
+        _remove(parent, keys[-1])
+    elif op == "replace":
+        _replace(parent, keys[-1], value)
+    else:
+        raise PatchError(f"Unsupported operation {op!r}")
+
+
+def apply_patch(node: ReactiveNode, operations: Iterable[dict]):
+    """
+    Applies JSON Patch operations to a node. All operations are applied in a single batch while the namespace lock is held, so
+    watchers receive the resulting changes at once.
+
+    The operations are applied in order. If one of them fails, the earlier ones stay applied.
+
+    :param node: The node the paths of the operations are relative to.
+    :param operations: The operations to apply.
+
+    :raises PatchError: If an operation is malformed or cannot be applied.
+    """
+
+    namespace = node.get_namespace()
+    with namespace.batch() if namespace else nullcontext():
+        for operation in operations:
+            _apply_operation(node, operation)
@@ -0,0 +1,234 @@
+"""
+Provides an order-statistic index that finds the position of an item in a list node without rewriting the keys of all following
+items after every insertion or deletion.
+"""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .node import ReactiveNode
+
+
+class _Block:
+    """
+    A run of consecutive items. Every item refers to its block and stores its offset within it.
+    """
+
+    __slots__ = ("number", "size")
+
+    def __init__(self, number: int, size: int):
+        self.number = number
+        self.size = size
+
+
+class PositionIndex:
+    """
+    Tracks the positions of the items of a list.
+
+    The items are split into consecutive blocks of at most 2 * BLOCK_SIZE items and a Fenwick tree over the block sizes gives the
+    position of each block, so finding the position of an item takes O(log n). Inserting or deleting items only rewrites the offsets
+    in the affected blocks and updates the tree. A block that grows too large is split, and empty blocks are dropped.
+
+    The index does not hold the items itself. Every method that modifies it receives the list of items after the modification.
+    """
+
+    BLOCK_SIZE = 256
+
+    def __init__(self, items: list["ReactiveNode"]):
+        self._blocks: list[_Block] = []
+        self._tree: list[int] = [0]
+        self._length = 0
+
+        self.reset(items)
+
+    def reset(self, items: list["ReactiveNode"]):
+        """
+        Rebuilds the index from scratch.
+
+        :param items: The items of the list.
+        """
+
+        self._blocks = []
+        for start in range(0, len(items), self.BLOCK_SIZE):
+            block = _Block(len(self._blocks), min(self.BLOCK_SIZE, len(items) - start))
+            self._assign(items, block, start, start, start + block.size)
+            self._blocks.append(block)
+
+        self._length = len(items)
+        self._rebuild_tree()
+
+    @staticmethod
+    def _assign(items: list["ReactiveNode"], block: _Block, block_start: int, start: int, stop: int):
+        """
+        Stores the block and offset of the items in the given range, which must be part of the block.
+        """
+
+        for i in range(start, stop):
+            item = items[i]
+            item._block = block  # pylint: disable=protected-access
+            item._offset = i - block_start  # pylint: disable=protected-access
+
+    def _rebuild_tree(self):
+        """
+        Renumbers the blocks and rebuilds the Fenwick tree over their sizes in O(number of blocks).
+        """
+
+        tree = [0] * (len(self._blocks) + 1)
+        for number, block in enumerate(self._blocks):
+            block.number = number
+            slot = number + 1
+            tree[slot] += block.size
+            parent = slot + (slot & -slot)
+            if parent < len(tree):
+                tree[parent] += tree[slot]
+
+        self._tree = tree
+
+    def _add(self, number: int, delta: int):
+        slot = number + 1
+        while slot < len(self._tree):
+            self._tree[slot] += delta
+            slot += slot & -slot
+
+    def _start(self, number: int) -> int:
+        """
+        Returns the position of the first item of a block.
+        """
+
+        total = 0
+        slot = number
+        while slot > 0:
+            total += self._tree[slot]
+            slot -= slot & -slot
+
+        return total
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """
+        Returns the number of the block holding the item at a position, and the position of the first item of the block.
+        """
+
+        number = 0
+        start = 0
+        step = 1 << (len(self._blocks).bit_length() - 1)
+        while step:
+            slot = number + step
+            if slot < len(self._tree) and start + self._tree[slot] <= index:
+                number = slot
+                start += self._tree[slot]
+            step >>= 1
+
+        return number, start
+
+    def position(self, item: "ReactiveNode") -> int:
+        """
+        Returns the position of an item of the list.
+
+        :param item: The item.
+        """
+
+        return self._start(item._block.number) + item._offset  # pylint: disable=protected-access
+
+    def insert(self, items: list["ReactiveNode"], index: int, count: int):
+        """
+        Adds items that were inserted into the list.
+
+        :param items: The items of the list after the insertion.
+        :param index: The position of the first inserted item.
+        :param count: The number of inserted items.
+        """
+
+        if not self._blocks:
+            self.reset(items)
+            return
+
+        if index == self._length:
+            number = len(self._blocks) - 1
+            start = self._start(number)
+        else:
+            number, start = self._locate(index)
+
+        block = self._blocks[number]
+        block.size += count
+        self._length += count
+
+        if block.size > 2 * self.BLOCK_SIZE:
+            self._split(items, number, start)
+            return
+
+        self._add(number, count)
+        self._assign(items, block, start, index, start + block.size)
+
+    def _split(self, items: list["ReactiveNode"], number: int, start: int):
+        """
+        Splits an oversized block into blocks of BLOCK_SIZE items.
+        """
+
+        size = self._blocks[number].size
+        blocks = []
+        for offset in range(0, size, self.BLOCK_SIZE):
+            block = _Block(0, min(self.BLOCK_SIZE, size - offset))
+            self._assign(items, block, start + offset, start + offset, start + offset + block.size)
+            blocks.append(block)
+
+        self._blocks[number : number + 1] = blocks
+        self._rebuild_tree()
+
+    def delete(self, items: list["ReactiveNode"], index: int, removed: list["ReactiveNode"]):
+        """
+        Removes items that were deleted from the list.
+
+        :param items: The items of the list after the deletion.
+        :param index: The position of the first deleted item.
+        :param removed: The deleted items, which must have been consecutive.
+        """
+
+        if not removed:
+            return
+
+        # the removed items span a run of consecutive blocks, of which only the first and the last one can keep items
+        first = removed[0]._block  # pylint: disable=protected-access
+        last = removed[-1]._block  # pylint: disable=protected-access
+
+        counts: dict[int, int] = {}
+        for item in removed:
+            number = item._block.number  # pylint: disable=protected-access
+            counts[number] = counts.get(number, 0) + 1
+            item._block = None  # pylint: disable=protected-access
+
+        self._length -= len(removed)
+
+        emptied = False
+        for number, count in counts.items():
+            self._blocks[number].size -= count
+            emptied = emptied or not self._blocks[number].size
+
+        if emptied or len(self._blocks) > 4 * (self._length // self.BLOCK_SIZE + 1):
+            self._blocks = [block for block in self._blocks if block.size]
+            if len(self._blocks) > 4 * (self._length // self.BLOCK_SIZE + 1):
+                self.reset(items)
+                return
+            self._rebuild_tree()
+        else:
+            for number, count in counts.items():
+                self._add(number, -count)
+
+        # the items of the remaining parts of the first and last block follow each other from the deleted position on
+        for block in (first, last) if first is not last else (first,):
+            if block.size:
+                start = self._start(block.number)
+                self._assign(items, block, start, max(start, index), start + block.size)
+
+    def replace(self, index: int, removed: list["ReactiveNode"], added: list["ReactiveNode"]):
+        """
+        Swaps items of the list for the same number of new ones at the same positions.
+
+        :param index: The position of the first replaced item.
+        :param removed: The replaced items.
+        :param added: The new items.
+        """
+
+        for old, new in zip(removed, added):
+            new._block = old._block  # pylint: disable=protected-access
+            new._offset = old._offset  # pylint: disable=protected-access
+            old._block = None  # pylint: disable=protected-access
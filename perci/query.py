@@ -0,0 +1,242 @@
+"""
+Provides queries that read all values of a tree matching a dotted path pattern.
+
+A pattern consists of keys and two kinds of wildcards: "*" matches any single key and "**" matches any number of keys, including
+none. For example, "devices.*.status" matches the status of every device and "**.status" matches every status in the tree.
+
+A pattern is compiled once into a state machine whose states are the sets of pattern positions a path can have reached. The
+transitions of each state are built on first use and kept, so evaluating the query only looks up the next state for every key.
+States without wildcards look up their literal keys directly, so only the branches that can match are walked.
+"""
+
+import threading
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+from .node import ReactiveNode
+from .list_node import ReactiveListNode
+from .array_node import ReactiveArrayNode
+from .keys import is_key_valid, parse_path, index_key
+from .types import UnpackedType
+from .dependencies import DependencyKind
+
+WILDCARD = "*"
+RECURSIVE_WILDCARD = "**"
+
+# how the children of a node are walked
+_MAPPING, _SEQUENCE, _ARRAY = range(3)
+
+_node_kinds: dict[type, int] = {}
+
+
+def _node_kind(node: ReactiveNode) -> int:
+    cls = type(node)
+    kind = _node_kinds.get(cls)
+    if kind is None:
+        if isinstance(node, ReactiveArrayNode):
+            kind = _ARRAY
+        elif isinstance(node, ReactiveListNode):
+            kind = _SEQUENCE
+        else:
+            kind = _MAPPING
+        _node_kinds[cls] = kind
+
+    return kind
+
+
+class _State:
+    """
+    A state of the compiled pattern: the set of pattern positions a path can have reached, with its transitions.
+    """
+
+    __slots__ = ("positions", "is_match", "literals", "wildcard")
+
+    def __init__(self, positions: frozenset[int], is_match: bool):
+        self.positions = positions
+        self.is_match = is_match
+
+        # the next state for every literal key, and for all other keys. None if no key can lead to a match. Built on first use
+        self.literals: Optional[dict[str, "_State"]] = None
+        self.wildcard: Optional["_State"] = None
+
+
+class Query:
+    """
+    A compiled path pattern. Use compile_query() to share compiled patterns.
+
+    :param pattern: The dotted path pattern, e.g. "devices.*.status". An empty pattern matches only the queried node.
+
+    :raises ValueError: If a part of the pattern is neither a valid key nor a wildcard.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.keys: tuple[str, ...] = parse_path(pattern) if pattern else ()
+
+        for key in self.keys:
+            if key not in (WILDCARD, RECURSIVE_WILDCARD) and not is_key_valid(key):
+                raise ValueError(f"Pattern {pattern} contains the invalid key {key}")
+
+        self._states: dict[frozenset[int], _State] = {}
+        self._lock = threading.Lock()
+        self._initial = self._state({0})
+
+    def _state(self, positions: set[int]) -> Optional[_State]:
+        """
+        Returns the state for a set of positions, adding the positions after every recursive wildcard, as it may match no key at all.
+        """
+
+        if not positions:
+            return None
+
+        pending = list(positions)
+        while pending:
+            position = pending.pop()
+            if position < len(self.keys) and self.keys[position] == RECURSIVE_WILDCARD and position + 1 not in positions:
+                positions.add(position + 1)
+                pending.append(position + 1)
+
+        positions = frozenset(positions)
+        state = self._states.get(positions)
+        if state is None:
+            state = self._states[positions] = _State(positions, len(self.keys) in positions)
+
+        return state
+
+    def _expand(self, state: _State):
+        """
+        Builds the transitions of a state.
+        """
+
+        with self._lock:
+            if state.literals is not None:
+                return
+
+            # any key advances past single wildcards and stays on recursive ones
+            wildcard = set()
+            literals: dict[str, set[int]] = {}
+            for position in state.positions:
+                key = self.keys[position] if position < len(self.keys) else None
+                if key == WILDCARD:
+                    wildcard.add(position + 1)
+                elif key == RECURSIVE_WILDCARD:
+                    wildcard.add(position)
+                elif key is not None:
+                    literals.setdefault(key, set()).add(position + 1)
+
+            state.wildcard = self._state(set(wildcard))
+            state.literals = {key: self._state(positions | wildcard) for key, positions in literals.items()}
+
+    def iter(self, node: ReactiveNode) -> Iterator[tuple[str, UnpackedType]]:
+        """
+        Yields the matches below a node in depth-first order, each before its descendants. The tree is walked lazily and without
+        recursion, so the matches are never collected and the tree can be deeper than the recursion limit. The caller must not modify
+        the tree while iterating.
+
+        :param node: The node to query.
+
+        :return: A generator of the dotted paths of the matches relative to the node, and their unpacked values.
+        """
+
+        # pylint: disable=protected-access
+        stack: list[tuple[ReactiveNode, str, _State]] = [(node, "", self._initial)]
+        while stack:
+            current, path, state = stack.pop()
+
+            if state.is_match:
+                current._track_read(DependencyKind.VALUE)
+                yield path, current.unpack()
+
+            if state.literals is None:
+                self._expand(state)
+            literals, wildcard = state.literals, state.wildcard
+            if not literals and wildcard is None:
+                continue
+
+            kind = _node_kinds.get(type(current))
+            if kind is None:
+                kind = _node_kind(current)
+            elif kind == _MAPPING and not current._children:
+                continue
+
+            prefix = path + "." if path else ""
+            if kind == _ARRAY:
+                yield from self._iter_array(current, prefix, literals, wildcard)
+                continue
+
+            if wildcard is None:
+                children = []
+                for key, following in literals.items():
+                    child = current.get_child(key)
+                    if child is not None:
+                        children.append((child, prefix + key, following))
+            elif kind == _SEQUENCE:
+                current._track_read(DependencyKind.STRUCTURE)
+                children = []
+                for index, child in enumerate(current._items):
+                    key = index_key(index)
+                    following = literals.get(key, wildcard) if literals else wildcard
+                    if following is not None:
+                        children.append((child, prefix + key, following))
+            else:
+                current._track_read(DependencyKind.STRUCTURE)
+                if literals:
+                    children = [(child, prefix + key, following) for key, child in current._children.items() if (following := literals.get(key, wildcard)) is not None]
+                else:
+                    children = [(child, prefix + key, wildcard) for key, child in current._children.items()]
+
+            children.reverse()
+            stack.extend(children)
+
+    def _iter_array(self, node: ReactiveArrayNode, prefix: str, literals: dict[str, _State], wildcard: Optional[_State]) -> Iterator[tuple[str, Any]]:
+        """
+        Yields the matching items of an array node. The items have no nodes of their own, so the pattern cannot continue below them.
+        """
+
+        if wildcard is not None:
+            for index, value in enumerate(node):
+                key = index_key(index)
+                following = literals.get(key, wildcard)
+                if following is not None and following.is_match:
+                    yield prefix + key, value
+            return
+
+        length = len(node)
+        for key, following in literals.items():
+            if following is not None and following.is_match and key.isdecimal() and int(key) < length:
+                yield prefix + key, node[int(key)]
+
+    def __str__(self) -> str:
+        return f"Query({self.pattern!r})"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+@lru_cache(maxsize=1024)
+def compile_query(pattern: str) -> Query:
+    """
+    Compiles a path pattern. Results are cached, as the same patterns tend to be queried over and over.
+
+    :param pattern: The dotted path pattern, e.g. "devices.*.status" or "**.status".
+
+    :raises ValueError: If a part of the pattern is neither a valid key nor a wildcard.
+
+    :return: The compiled query.
+    """
+
+    return Query(pattern)
+
+
+def query(node: ReactiveNode, pattern: str) -> list[tuple[str, UnpackedType]]:
+    """
+    Returns the matches of a pattern below a node, read under the lock of the namespace so that they are consistent.
+
+    :param node: The node to query.
+    :param pattern: The dotted path pattern, e.g. "devices.*.status".
+
+    :return: The dotted paths of the matches relative to the node, and their unpacked values.
+    """
+
+    compiled = compile_query(pattern)
+    with node._optional_namespace_lock():  # pylint: disable=protected-access
+        return list(compiled.iter(node))
@@ -0,0 +1,28 @@
+"""
+Provides helpers for the immutable snapshots returned by ReactiveNode.snapshot().
+
+A snapshot of a dict node is a read-only mapping, a snapshot of a list node is a tuple and a snapshot of a leaf is its value. Each
+node caches its snapshot until the node or one of its descendants is modified, so unchanged subtrees are shared between successive
+snapshots and a snapshot of an unchanged tree is returned without copying anything.
+"""
+
+from types import MappingProxyType
+from typing import Any, Union
+from .types import AtomicType
+
+SnapshotType = Union[AtomicType, MappingProxyType, tuple]
+
+
+def snapshot_json(snapshot: SnapshotType) -> Any:
+    """
+    Returns a JSON-serializable copy of a snapshot.
+
+    :param snapshot: The snapshot to convert.
+    """
+
+    if isinstance(snapshot, MappingProxyType):
+        return {key: snapshot_json(value) for key, value in snapshot.items()}
+    elif isinstance(snapshot, tuple):
+        return [snapshot_json(value) for value in snapshot]
+    else:
+        return snapshot
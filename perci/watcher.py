@@ -1,5 +1,10 @@
+import asyncio
 import threading
-from .changes import Change
+from collections import deque
+from enum import Enum
+from typing import Optional
+from .changes import Change, UpdateChange
+from .keys import index_key
 
 
 def path_matches(pattern: list[str], path: list[str], allow_children: bool = False) -> bool:
@@ -30,14 +35,48 @@ def path_matches(pattern: list[str], path: list[str], allow_children: bool = Fal
 
 
 class Watcher:
-    def __init__(self, path: list[str], handler: callable = None):
+    """
+    Calls a handler for every change at or below a path pattern.
+
+    :param path: The path pattern to watch.
+    :param handler: The handler to call.
+    :param batched: Whether the handler receives a list of changes instead of a single change.
+    """
+
+    def __init__(self, path: list[str], handler: callable = None, batched: bool = False):
         self.path = path
         self.handler = handler
+        self.batched = batched
 
     def invoke(self, change: Change):
         if path_matches(self.path, change.path, allow_children=True):
+            self.notify(change)
+
+    def notify(self, change: Change):
+        """
+        Delivers a change to the handler without checking the path. The namespace calls this directly for watchers it already matched.
+
+        :param change: The change to deliver.
+        """
+
+        if self.batched:
+            self.handler([change])
+        else:
             self.handler(change)
 
+    def notify_batch(self, changes: list[Change]):
+        """
+        Delivers the changes of a batch. Batched handlers receive them in a single call.
+
+        :param changes: The changes to deliver, in the order they occurred.
+        """
+
+        if self.batched:
+            self.handler(changes)
+        else:
+            for change in changes:
+                self.handler(change)
+
     def __str__(self):
         return f"{self.__class__.__name__}(path={self.path})"
 
@@ -45,22 +84,455 @@ class Watcher:
         return str(self)
 
 
+class OverflowPolicy(str, Enum):
+    """
+    Determines what a bounded QueueWatcher does when a change arrives while it is full.
+    """
+
+    # drop the oldest queued change
+    DROP_OLDEST = "drop_oldest"
+
+    # drop the incoming change
+    DROP_NEWEST = "drop_newest"
+
+    # block the mutating thread until the consumer makes room, dropping the incoming change after the timeout
+    BLOCK = "block"
+
+    # keep only the latest queued update per path, dropping the oldest change if that is not enough
+    COALESCE = "coalesce"
+
+
 class QueueWatcher(Watcher):
-    def __init__(self, path_pattern: list[str]):
+    """
+    Stores changes in a thread-safe queue until they are polled with get_changes().
+
+    :param path_pattern: The path pattern to watch.
+    :param capacity: The maximum number of queued changes. Defaults to 0, meaning unbounded.
+    :param overflow: What to do when a change arrives while the queue is full. Defaults to dropping the oldest change.
+    :param timeout: How long to block the mutating thread with the BLOCK policy. Defaults to None, meaning forever.
+    """
+
+    def __init__(self, path_pattern: list[str], capacity: int = 0, overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST, timeout: Optional[float] = None):
         super().__init__(path_pattern, self._on_change)
 
-        self._changes: list[Change] = []
+        self.capacity = capacity
+        self.overflow = OverflowPolicy(overflow)
+        self.timeout = timeout
+
+        self._changes: deque[Change] = deque()
         self._lock = threading.RLock()
+        self._not_full = threading.Condition(self._lock)
+
+        # sequence number of the first queued change and the sequence numbers of the coalescable updates
+        self._head = 0
+        self._updates: dict[tuple[str, ...], int] = {}
+
+        self.dropped_count = 0
+        self.coalesced_count = 0
 
     def _on_change(self, change: Change):
+        coalescing = self.overflow == OverflowPolicy.COALESCE
+        if coalescing and self._coalesce(change):
+            return
+
+        if self.capacity and len(self._changes) >= self.capacity:
+            if self.overflow == OverflowPolicy.DROP_NEWEST:
+                self.dropped_count += 1
+                return
+
+            if self.overflow == OverflowPolicy.BLOCK:
+                if not self._not_full.wait_for(lambda: len(self._changes) < self.capacity, self.timeout):
+                    self.dropped_count += 1
+                    return
+            else:
+                self._changes.popleft()
+                self._head += 1
+                self.dropped_count += 1
+
         self._changes.append(change)
 
-    def invoke(self, change: Change):
+        if coalescing and isinstance(change, UpdateChange):
+            self._updates[change.path] = self._head + len(self._changes) - 1
+
+    def _coalesce(self, change: Change) -> bool:
+        """
+        Replaces a queued update of the same path with the given change.
+
+        Any other kind of change may alter what a path refers to, so queued updates are never coalesced across it.
+
+        :param change: The incoming change.
+
+        :return: Whether the change was coalesced.
+        """
+
+        if not isinstance(change, UpdateChange):
+            self._updates.clear()
+            return False
+
+        sequence = self._updates.get(change.path)
+        if sequence is not None and sequence >= self._head:
+            self._changes[sequence - self._head] = change
+            self.coalesced_count += 1
+            return True
+
+        return False
+
+    def notify(self, change: Change):
         with self._lock:
-            super().invoke(change)
+            super().notify(change)
 
-    def get_changes(self) -> list[Change]:
+    def notify_batch(self, changes: list[Change]):
         with self._lock:
-            changes = self._changes
-            self._changes = []
+            for change in changes:
+                self._on_change(change)
+
+    def get_changes(self, max_count: Optional[int] = None) -> list[Change]:
+        """
+        Returns and removes the queued changes.
+
+        :param max_count: The maximum number of changes to return. Defaults to all.
+        """
+
+        with self._lock:
+            count = len(self._changes) if max_count is None else min(max_count, len(self._changes))
+
+            if count == len(self._changes):
+                changes = list(self._changes)
+                self._changes.clear()
+                self._updates.clear()
+            else:
+                changes = [self._changes.popleft() for _ in range(count)]
+
+            self._head += count
+            self._not_full.notify_all()
+
             return changes
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+
+class AsyncQueueWatcher(QueueWatcher):
+    """
+    Queues changes for a consumer running in an asyncio event loop. The mutating thread only appends to the queue and wakes the loop
+    with call_soon_threadsafe at most once per batch, so it never waits on consumer code unless the BLOCK overflow policy is used.
+
+    :param path_pattern: The path pattern to watch.
+    :param loop: The event loop of the consumer. Defaults to the running loop.
+    :param capacity: The maximum number of queued changes. Defaults to 0, meaning unbounded.
+    :param overflow: What to do when a change arrives while the queue is full. Defaults to dropping the oldest change.
+    """
+
+    def __init__(self, path_pattern: list[str], loop: Optional[asyncio.AbstractEventLoop] = None, capacity: int = 0, overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST):
+        super().__init__(path_pattern, capacity, overflow)
+
+        self._loop = loop or asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._wakeup_pending = False
+        self._closed = False
+        self._pending: list[Change] = []
+
+    def notify(self, change: Change):
+        self.notify_batch([change])
+
+    def notify_batch(self, changes: list[Change]):
+        with self._lock:
+            if self._closed:
+                return
+
+            super().notify_batch(changes)
+
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+
+        self._loop.call_soon_threadsafe(self._wakeup)
+
+    def _wakeup(self):
+        with self._lock:
+            self._wakeup_pending = False
+
+        self._event.set()
+
+    def close(self):
+        """
+        Stops the watcher. Pending changes can still be consumed, after which iteration ends.
+        """
+
+        with self._lock:
+            self._closed = True
+
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait_for_changes(self, max_count: Optional[int] = None) -> list[Change]:
+        """
+        Waits until at least one change is queued, then returns and removes the queued changes.
+
+        :param max_count: The maximum number of changes to return. Defaults to all.
+
+        :return: The changes, or an empty list if the watcher was closed and no changes are left.
+        """
+
+        while True:
+            changes = self.get_changes(max_count)
+            if changes or self._closed:
+                return changes
+
+            self._event.clear()
+
+            # check again, as changes might have been queued before the event was cleared
+            if self._changes:
+                continue
+
+            await self._event.wait()
+
+    def __aiter__(self) -> "AsyncQueueWatcher":
+        return self
+
+    async def __anext__(self) -> Change:
+        if not self._pending:
+            self._pending = await self.wait_for_changes()
+            if not self._pending:
+                raise StopAsyncIteration
+
+            self._pending.reverse()
+
+        return self._pending.pop()
+
+
+class _WatcherTrieNode:
+    """
+    A single node of a watcher trie. Holds the watchers whose pattern ends at this node, keyed by their registration order.
+    """
+
+    __slots__ = ("children", "watchers")
+
+    def __init__(self):
+        self.children: dict[str, _WatcherTrieNode] = {}
+        self.watchers: dict[Watcher, int] = {}
+
+    def is_empty(self) -> bool:
+        return not self.children and not self.watchers
+
+
+class WatcherTrie:
+    """
+    Indexes watchers by their path pattern. Each trie node holds its literal children and a "*" wildcard child, so matching a
+    change only visits the watchers whose pattern is a prefix of the change path, regardless of how many other watchers exist.
+    """
+
+    def __init__(self):
+        self._root = _WatcherTrieNode()
+        self._order: dict[Watcher, int] = {}
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __contains__(self, watcher: Watcher) -> bool:
+        return watcher in self._order
+
+    def add(self, watcher: Watcher):
+        """
+        Adds a watcher to the trie.
+
+        :param watcher: The watcher to add.
+        """
+
+        node = self._root
+        for part in watcher.path:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _WatcherTrieNode()
+            node = child
+
+        node.watchers[watcher] = self._counter
+        self._order[watcher] = self._counter
+        self._counter += 1
+
+    def remove(self, watcher: Watcher):
+        """
+        Removes a watcher from the trie.
+
+        :param watcher: The watcher to remove.
+
+        :raises ValueError: If the watcher is not part of the trie.
+        """
+
+        if watcher not in self._order:
+            raise ValueError(f"{watcher} is not registered")
+
+        # walk down the pattern and remember the visited nodes so that empty branches can be pruned afterwards
+        trail = [self._root]
+        for part in watcher.path:
+            trail.append(trail[-1].children[part])
+
+        del trail[-1].watchers[watcher]
+        del self._order[watcher]
+
+        self._prune(trail, watcher.path)
+
+    def match(self, path: list[str]) -> list[Watcher]:
+        """
+        Returns all watchers whose pattern matches the given path or one of its ancestors, in registration order.
+
+        :param path: The path of the change.
+
+        :return: The matching watchers.
+        """
+
+        matches: list[tuple[int, Watcher]] = []
+        frontier = [self._root]
+
+        for part in path:
+            next_frontier = []
+            for node in frontier:
+                if node.watchers:
+                    matches.extend((order, watcher) for watcher, order in node.watchers.items())
+
+                literal = node.children.get(part)
+                if literal is not None:
+                    next_frontier.append(literal)
+
+                wildcard = node.children.get("*")
+                if wildcard is not None:
+                    next_frontier.append(wildcard)
+
+            frontier = next_frontier
+            if not frontier:
+                break
+
+        # patterns that are exactly as long as the path
+        for node in frontier:
+            matches.extend((order, watcher) for watcher, order in node.watchers.items())
+
+        if len(matches) > 1:
+            matches.sort(key=lambda item: item[0])
+
+        return [watcher for _, watcher in matches]
+
+    def remove_subtree(self, path: list[str]) -> list[Watcher]:
+        """
+        Removes all watchers registered at or below the given literal path. Wildcard patterns are kept, as they are not bound to the subtree.
+
+        :param path: The literal path of the subtree.
+
+        :return: The removed watchers.
+        """
+
+        # walk down the literal path, stopping early if there are no watchers below it
+        trail = [self._root]
+        for part in path:
+            child = trail[-1].children.get(part)
+            if child is None:
+                return []
+            trail.append(child)
+
+        # detach the whole branch and collect its watchers
+        removed = []
+        stack = [trail[-1]]
+        while stack:
+            node = stack.pop()
+            removed.extend(node.watchers)
+            stack.extend(node.children.values())
+
+        for watcher in removed:
+            del self._order[watcher]
+
+        if path:
+            del trail[-2].children[path[-1]]
+            self._prune(trail[:-1], path[:-1])
+        else:
+            self._root = _WatcherTrieNode()
+
+        return removed
+
+    def _find(self, path: list[str]) -> Optional[_WatcherTrieNode]:
+        node = self._root
+        for part in path:
+            node = node.children.get(part)
+            if node is None:
+                return None
+
+        return node
+
+    @staticmethod
+    def _rekey(branch: _WatcherTrieNode, depth: int, key: str):
+        """
+        Updates the patterns of all watchers in a branch that was moved to another key.
+        """
+
+        stack = [branch]
+        while stack:
+            node = stack.pop()
+            for watcher in node.watchers:
+                watcher.path[depth] = key
+            stack.extend(node.children.values())
+
+    def shift(self, path: list[str], start: int, offset: int, stop: Optional[int] = None):
+        """
+        Moves the watchers registered below the items of a list, so that they keep following their items when the list is reindexed.
+
+        :param path: The literal path of the list.
+        :param start: The first index that is shifted.
+        :param offset: The amount to shift the indices by.
+        :param stop: The index after the last one that is shifted. Defaults to shifting all following indices.
+        """
+
+        node = self._find(path)
+        if node is None:
+            return
+
+        moved = [(int(key), child) for key, child in node.children.items() if key.isdigit() and int(key) >= start and (stop is None or int(key) < stop)]
+        if not moved:
+            return
+
+        for index, _ in moved:
+            del node.children[str(index)]
+
+        depth = len(path)
+        for index, child in moved:
+            key = index_key(index + offset)
+            node.children[key] = child
+            self._rekey(child, depth, key)
+
+    def move(self, path: list[str], index: int, target: int):
+        """
+        Moves the watchers registered below a list item to the item's new position, shifting the watchers of the items in between.
+
+        :param path: The literal path of the list.
+        :param index: The position of the item before the move.
+        :param target: The position of the item after the move.
+        """
+
+        node = self._find(path)
+        if node is None or index == target:
+            return
+
+        branch = node.children.pop(index_key(index), None)
+
+        if index < target:
+            self.shift(path, index + 1, -1, target + 1)
+        else:
+            self.shift(path, target, 1, index)
+
+        if branch is not None:
+            key = index_key(target)
+            node.children[key] = branch
+            self._rekey(branch, len(path), key)
+
+    def _prune(self, trail: list[_WatcherTrieNode], path: list[str]):
+        """
+        Removes empty nodes at the end of a trail of trie nodes.
+
+        :param trail: The visited trie nodes, starting at the root.
+        :param path: The parts connecting the nodes of the trail.
+        """
+
+        for parent, part, node in zip(reversed(trail[:-1]), reversed(path), reversed(trail[1:])):
+            if not node.is_empty():
+                break
+            del parent.children[part]
@@ -0,0 +1,191 @@
+# pylint: skip-file
+
+import array
+import pytest
+from perci import reactive, watch, compact, ReactiveArrayNode, ReactiveListNode, apply_patch, create_patch_watcher
+from perci.changes import ListInsertChange, ListDeleteChange, ListReplaceChange, UpdateChange
+
+SIZE = 512
+
+
+def test_compact_selects_array():
+    state = reactive(
+        {
+            "plain": list(range(SIZE)),
+            "ints": compact(range(SIZE)),
+            "floats": compact(i * 0.5 for i in range(SIZE)),
+            "small": compact([1, 2, 3]),
+            "mixed": compact([1, 2.5] * SIZE),
+            "bools": compact([True] * SIZE),
+        }
+    )
+
+    # plain lists keep one node per item, however long they are
+    assert isinstance(state["plain"], ReactiveListNode)
+    assert state["plain"].get_child("5").get_value() == 5
+
+    assert isinstance(state["ints"], ReactiveArrayNode)
+    assert state["ints"].get_typecode() == "q"
+    assert isinstance(state["floats"], ReactiveArrayNode)
+    assert state["floats"].get_typecode() == "d"
+    assert isinstance(state["small"], ReactiveArrayNode)
+    assert isinstance(state["mixed"], ReactiveListNode)
+    assert isinstance(state["bools"], ReactiveListNode)
+
+    state["typed"] = array.array("f", [1.5, 2.5])
+    assert isinstance(state["typed"], ReactiveArrayNode)
+    assert state.json()["typed"] == [1.5, 2.5]
+    assert state.json()["ints"] == list(range(SIZE))
+
+
+def test_range_changes():
+    state = reactive({"series": compact([0.0] * SIZE)})
+    series = state["series"]
+
+    changes = []
+    watch(state, changes.append)
+
+    series[10:20] = [1.0] * 10
+    series.append(2.0)
+    series.extend([3.0, 4.0])
+    series.insert(0, -1.0)
+    del series[5:8]
+    series[3] = 7.5
+    series[0:2] = [9.0]
+
+    path = ("root", "series")
+    assert changes == [
+        ListReplaceChange(path=path, index=10, values=[1.0] * 10),
+        ListInsertChange(path=path, index=SIZE, values=[2.0]),
+        ListInsertChange(path=path, index=SIZE + 1, values=[3.0, 4.0]),
+        ListInsertChange(path=path, index=0, values=[-1.0]),
+        ListDeleteChange(path=path, index=5, count=3),
+        ListReplaceChange(path=path, index=3, values=[7.5]),
+        ListReplaceChange(path=path, index=0, values=[9.0]),
+        ListDeleteChange(path=path, index=1, count=1),
+    ]
+
+    expected = [-1.0] + [0.0] * SIZE + [2.0, 3.0, 4.0]
+    expected[10 + 1 : 20 + 1] = [1.0] * 10
+    del expected[5:8]
+    expected[3] = 7.5
+    expected[0:2] = [9.0]
+    assert state.json()["series"] == expected
+    assert list(series) == expected
+    assert series.pop() == 4.0
+
+    # typed arrays convert new values to their type
+    state["typed"] = array.array("d", [1.0])
+    state["typed"].append(2)
+    assert state.json()["typed"] == [1.0, 2.0]
+
+    with pytest.raises(ValueError):
+        state["typed"].append("text")
+
+
+def test_fallback_to_list():
+    state = reactive({"ints": compact(range(SIZE)), "floats": compact([0.5] * SIZE), "nested": [compact(range(SIZE))]})
+
+    changes = []
+    watch(state, changes.append)
+
+    # values of other types replace the array with a list node and emit a single change
+    for value in ("s", 1.5, None, {"a": 1}):
+        state["ints"].append(value)
+        assert isinstance(state["ints"], ReactiveListNode)
+        assert state["ints"][-1] == value
+        del state["ints"][-1]
+        state["ints"] = compact(range(SIZE))
+        assert isinstance(state["ints"], ReactiveArrayNode)
+
+    changes.clear()
+    watched = []
+    watch(state, watched.append, "ints")
+    state["ints"].insert(0, True)
+    assert changes == [UpdateChange(path=("root", "ints"), value=[True] + list(range(SIZE)))]
+    assert watched == changes
+    assert state["ints"].get_child("5").get_value() == 4
+
+    # integers are not turned into floats
+    state["floats"].append(1)
+    assert isinstance(state["floats"], ReactiveListNode)
+    assert state.json()["floats"][-1] == 1
+    assert type(state.json()["floats"][-1]) is int
+
+    # arrays in lists are replaced in place
+    changes.clear()
+    state["nested"][0][3] = "x"
+    assert isinstance(state["nested"][0], ReactiveListNode)
+    assert changes == [ListReplaceChange(path=("root", "nested"), index=0, values=[[0, 1, 2, "x"] + list(range(4, SIZE))])]
+
+    # out of bounds indices still raise without changing anything
+    changes.clear()
+    state["ints"] = compact(range(SIZE))
+    changes.clear()
+    with pytest.raises(IndexError):
+        state["ints"][SIZE] = "x"
+    assert isinstance(state["ints"], ReactiveArrayNode)
+    assert changes == []
+
+
+def test_update_from_changes_one_range():
+    values = list(range(SIZE))
+    state = reactive({"series": compact(values)})
+
+    changes = []
+    watch(state, changes.append)
+
+    updated = values[:]
+    updated[100:103] = [-1, -2, -3]
+    state["series"] = updated
+    assert changes == [ListReplaceChange(path=("root", "series"), index=100, values=[-1, -2, -3])]
+    assert isinstance(state["series"], ReactiveArrayNode)
+
+    changes.clear()
+    state["series"] = updated[:50] + updated[60:]
+    assert changes == [ListDeleteChange(path=("root", "series"), index=50, count=10)]
+
+    # values that do not fit the array replace it
+    state["series"] = ["a"]
+    assert isinstance(state["series"], ReactiveListNode)
+
+
+def test_views():
+    state = reactive({"series": compact(range(SIZE))})
+    series = state["series"]
+
+    view = series.view()
+    assert view.readonly
+    assert view[5] == 5
+
+    series[5] = 50
+    assert view[5] == 50
+
+    # the viewed buffer cannot be resized, so the node continues on a copy
+    series.append(SIZE)
+    assert len(view) == SIZE
+    assert len(series) == SIZE + 1
+    assert series[5] == 50
+
+
+def test_nested_keys():
+    state = reactive({"data": {"series": compact(range(SIZE))}})
+
+    assert state["data.series.3"] == 3
+    assert "data.series.3" in state
+    assert f"data.series.{SIZE}" not in state
+
+    state["data.series.3"] = 30
+    assert state["data"]["series"][3] == 30
+
+
+def test_patch_replica():
+    state = reactive({"series": compact([0.0] * SIZE)})
+    replica = reactive(state.json())
+    create_patch_watcher(state, lambda operations: apply_patch(replica, operations))
+
+    state["series"][2:4] = [1.0, 2.0]
+    state["series"].insert(1, 5.0)
+    del state["series"][0]
+
+    assert replica.json() == state.json()
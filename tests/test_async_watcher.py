@@ -0,0 +1,60 @@
+# pylint: skip-file
+
+import asyncio
+import threading
+from perci import reactive, create_async_watcher
+from perci.changes import UpdateChange
+
+
+def test_async_iteration():
+    async def main():
+        state = reactive({"value": 0})
+        watcher = create_async_watcher(state)
+
+        def produce():
+            for i in range(1, 101):
+                state["value"] = i
+            watcher.close()
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+
+        values = [change.value async for change in watcher]
+        thread.join()
+
+        return values
+
+    assert asyncio.run(main()) == list(range(1, 101))
+
+
+def test_async_batches():
+    async def main():
+        state = reactive({"a": 0, "b": 0})
+        watcher = create_async_watcher(state)
+
+        state["a"] = 1
+        state["b"] = 2
+
+        return await watcher.wait_for_changes()
+
+    assert asyncio.run(main()) == [
+        UpdateChange(path=["root", "a"], value=1),
+        UpdateChange(path=["root", "b"], value=2),
+    ]
+
+
+def test_async_backpressure():
+    async def main():
+        state = reactive({"value": 0})
+        watcher = create_async_watcher(state, capacity=10)
+
+        for i in range(1, 101):
+            state["value"] = i
+
+        changes = await watcher.wait_for_changes()
+        return watcher.dropped_count, [change.value for change in changes]
+
+    dropped, values = asyncio.run(main())
+
+    assert dropped == 90
+    assert values == list(range(91, 101))
@@ -0,0 +1,95 @@
+# pylint: skip-file
+
+from unittest.mock import Mock, call
+from perci import reactive, watch, transaction, create_queue_watcher
+from perci.changes import AddChange, RemoveChange, UpdateChange, ListDeleteChange
+
+
+def test_batch_dispatches_once():
+    state = reactive({"a": 1, "b": 2})
+
+    handler = Mock()
+    watch(state, handler, batched=True)
+
+    with state.get_namespace().batch():
+        state["a"] = 3
+        state["b"] = 4
+        handler.assert_not_called()
+
+    handler.assert_called_once_with(
+        [
+            UpdateChange(path=["root", "a"], value=3),
+            UpdateChange(path=["root", "b"], value=4),
+        ]
+    )
+
+
+def test_last_write_wins():
+    state = reactive({"a": 1, "b": 2})
+
+    handler = Mock()
+    watch(state, handler)
+
+    with transaction(state):
+        state["a"] = 3
+        state["b"] = 4
+        state["a"] = 5
+
+    handler.assert_has_calls(
+        [
+            call(UpdateChange(path=["root", "b"], value=4)),
+            call(UpdateChange(path=["root", "a"], value=5)),
+        ]
+    )
+    assert handler.call_count == 2
+
+
+def test_add_then_remove_is_dropped():
+    state = reactive({"a": 1})
+
+    watcher = create_queue_watcher(state)
+
+    with transaction(state):
+        state["tmp"] = {"x": 1}
+        state["tmp"]["x"] = 2
+        del state["tmp"]
+        del state["a"]
+
+    assert watcher.get_changes() == [RemoveChange(path=["root"], key="a")]
+
+
+def test_list_changes_are_not_coalesced():
+    state = reactive({"l": [1, 2, 3]})
+
+    watcher = create_queue_watcher(state)
+
+    with transaction(state):
+        state["l"][1] = 4
+        del state["l"][0]
+        state["l"][1] = 5
+
+    assert watcher.get_changes() == [
+        UpdateChange(path=["root", "l", "1"], value=4),
+        ListDeleteChange(path=["root", "l"], index=0),
+        UpdateChange(path=["root", "l", "1"], value=5),
+    ]
+
+
+def test_nested_batches():
+    state = reactive({"a": 1})
+
+    handler = Mock()
+    watch(state, handler, batched=True)
+
+    with transaction(state):
+        with transaction(state):
+            state["a"] = 2
+        handler.assert_not_called()
+        state["b"] = 3
+
+    handler.assert_called_once_with(
+        [
+            UpdateChange(path=["root", "a"], value=2),
+            AddChange(path=["root"], key="b", repr="value", value=3),
+        ]
+    )
@@ -0,0 +1,89 @@
+# pylint: skip-file
+
+import pytest
+from perci import reactive, create_queue_watcher
+from perci.binary import ChangeEncoder, ChangeDecoder
+from perci.changes import AddChange, RemoveChange, UpdateChange, ListInsertChange, ListDeleteChange, ListMoveChange, ListReplaceChange, ListSpliceChange
+
+
+CHANGES = [
+    AddChange(path=("root",), key="user", repr="dict", value={"name": "Alice", "age": 25, "tags": ["a", "b"], "extra": None}),
+    UpdateChange(path=("root", "user", "age"), value=26),
+    UpdateChange(path=("root", "user", "age"), value=-(2**70)),
+    UpdateChange(path=("root", "user", "name"), value="Bób"),
+    UpdateChange(path=("root", "user", "score"), value=1.25),
+    UpdateChange(path=("root", "user", "flag"), value=False),
+    ListInsertChange(path=("root", "user", "tags"), index=1, values=[True, {"x": 0.5}]),
+    ListDeleteChange(path=("root", "user", "tags"), index=0, count=2),
+    ListMoveChange(path=("root", "user", "tags"), index=3, target=0),
+    ListReplaceChange(path=("root", "samples"), index=2, values=[0.5, -1.25, 3.0]),
+    ListSpliceChange(path=("root", "samples"), index=1, count=3, values=["x"]),
+    RemoveChange(path=("root",), key="user"),
+    UpdateChange(path=(), value=None),
+]
+
+
+def test_binary_round_trip():
+    data = ChangeEncoder().encode_all(CHANGES)
+    assert ChangeDecoder().decode(data) == CHANGES
+
+
+def test_binary_keys_and_paths_are_shared():
+    encoder = ChangeEncoder()
+    first = encoder.encode(UpdateChange(path=("root", "sensors", "temperature"), value=1))
+    second = encoder.encode(UpdateChange(path=("root", "sensors", "temperature"), value=2))
+    third = encoder.encode(UpdateChange(path=("root", "sensors", "humidity"), value=3))
+
+    assert len(second) == 6
+    assert len(third) < len(first)
+
+
+def test_binary_key_dictionary_limit():
+    changes = [UpdateChange(path=("root", f"key{i}"), value=i) for i in range(10)] * 2
+
+    data = ChangeEncoder(max_keys=4).encode_all(changes)
+    assert ChangeDecoder().decode(data) == changes
+
+
+def test_binary_failed_encoding():
+    encoder = ChangeEncoder()
+    out = bytearray()
+    encoder.encode_into(UpdateChange(path=("root", "a"), value=1), out)
+
+    with pytest.raises(ValueError):
+        encoder.encode_into(UpdateChange(path=("root", "newkey", "x"), value={"y": {1, 2}}), out)
+
+    # the failed change left neither its path nor its keys behind
+    changes = [UpdateChange(path=("root", "b"), value=2), UpdateChange(path=("root", "newkey", "y"), value=3)]
+    for change in changes:
+        encoder.encode_into(change, out)
+
+    assert ChangeDecoder().decode(out) == [UpdateChange(path=("root", "a"), value=1)] + changes
+
+
+def test_binary_streaming():
+    data = ChangeEncoder().encode_all(CHANGES)
+    decoder = ChangeDecoder()
+
+    # feed the stream in small chunks that split records
+    changes = []
+    for i in range(0, len(data), 7):
+        changes += decoder.feed(memoryview(data)[i : i + 7])
+
+    assert changes == CHANGES
+
+    with pytest.raises(ValueError):
+        ChangeDecoder().decode(data[:-1])
+
+
+def test_binary_watcher_stream():
+    state = reactive({"items": [], "value": 0})
+    watcher = create_queue_watcher(state)
+
+    state["items"].extend([1, 2, 3])
+    state["value"] = 1.5
+    del state["items"][0]
+    state["nested"] = {"a": {"b": [None]}}
+
+    changes = watcher.get_changes()
+    assert ChangeDecoder().decode(ChangeEncoder().encode_all(changes)) == changes
@@ -0,0 +1,164 @@
+# pylint: skip-file
+
+import os
+import pytest
+from perci import reactive, restore, create_change_log, transaction, StripedLock
+from perci.changelog import read_segment, restore_tree
+from perci.changes import UpdateChange
+
+
+def modify(root):
+    root["count"] = 1
+    root["items"] = [1, 2, 3]
+    root["items"].append({"name": "a"})
+    root["items"].insert(0, "first")
+    del root["items"][1]
+    root["nested"] = {"x": {"y": None}}
+    root["nested"]["x"]["y"] = 2.5
+    root.remove_child("count")
+    root["ordered"] = ["a", "b", "c"]
+    root["ordered"].move_child(0, 2)
+
+    with transaction(root):
+        root["batched"] = True
+        root["items"][0] = "changed"
+
+
+def test_restore(tmp_path):
+    root = reactive({"initial": "value"})
+    create_change_log(root, str(tmp_path))
+    modify(root)
+    root.get_namespace().detach_change_log()
+
+    restored = restore(str(tmp_path))
+    assert restored.json() == root.json()
+    assert restored.get_namespace() is not None
+
+
+def test_restore_with_checkpoints(tmp_path):
+    root = reactive({"values": []})
+    create_change_log(root, str(tmp_path), checkpoint_interval=10, flush_interval=0.001)
+
+    for i in range(100):
+        root["values"].append(i)
+        root["last"] = i
+    root.get_namespace().detach_change_log()
+
+    # only the latest checkpoint and its segment are kept
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 2
+    assert files[0].startswith("checkpoint-") and files[1].startswith("segment-")
+
+    assert restore_tree(str(tmp_path)).json() == root.json()
+
+
+def test_flush_without_close(tmp_path):
+    root = reactive()
+    change_log = create_change_log(root, str(tmp_path), flush_interval=60)
+
+    root["a"] = {"b": [1, 2]}
+    change_log.flush()
+
+    assert restore_tree(str(tmp_path)).json() == {"a": {"b": [1, 2]}}
+
+    root.get_namespace().detach_change_log()
+
+
+def test_incomplete_record_is_ignored(tmp_path):
+    root = reactive({"a": 0})
+    create_change_log(root, str(tmp_path))
+    root["a"] = 1
+    root["a"] = 2
+    root.get_namespace().detach_change_log()
+
+    segment = os.path.join(tmp_path, next(name for name in os.listdir(tmp_path) if name.startswith("segment-")))
+    assert list(read_segment(segment)) == [UpdateChange(path=("root", "a"), value=1), UpdateChange(path=("root", "a"), value=2)]
+
+    with open(segment, "r+b") as file:
+        file.truncate(os.path.getsize(segment) - 1)
+
+    assert restore_tree(str(tmp_path)).json() == {"a": 1}
+
+
+def test_continue_restored_log(tmp_path):
+    root = reactive({"a": 1})
+    create_change_log(root, str(tmp_path))
+    root["b"] = 2
+    root.get_namespace().detach_change_log()
+
+    restored = restore(str(tmp_path))
+    create_change_log(restored, str(tmp_path))
+    restored["c"] = 3
+    restored.get_namespace().detach_change_log()
+
+    assert restore(str(tmp_path)).json() == {"a": 1, "b": 2, "c": 3}
+
+
+def test_striped_lock(tmp_path):
+    root = reactive({"a": {}, "b": {}}, lock=StripedLock())
+    create_change_log(root, str(tmp_path), checkpoint_interval=5, flush_interval=0.001)
+
+    for i in range(50):
+        root["a"][f"k{i}"] = i
+        root["b"][f"k{i}"] = -i
+    root.get_namespace().detach_change_log()
+
+    assert restore_tree(str(tmp_path)).json() == root.json()
+
+
+def test_attach_twice(tmp_path):
+    root = reactive()
+    create_change_log(root, str(tmp_path / "first"))
+
+    with pytest.raises(ValueError):
+        create_change_log(root, str(tmp_path / "second"))
+
+    root.get_namespace().detach_change_log()
+
+
+def test_missing_checkpoint(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        restore(str(tmp_path))
+
+
+class FailingFile:
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data):
+        raise OSError("disk full")
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def test_failed_write_keeps_changes(tmp_path):
+    root = reactive()
+    change_log = create_change_log(root, str(tmp_path), flush_interval=60)
+
+    root["a"] = 1
+    file = change_log._file
+    change_log._file = FailingFile(file)
+    with pytest.raises(OSError):
+        change_log.flush()
+
+    # the failed write is retried along with the changes made since
+    root["b"] = [1, 2]
+    change_log._file = file
+    change_log.flush()
+
+    assert restore_tree(str(tmp_path)).json() == {"a": 1, "b": [1, 2]}
+    root.get_namespace().detach_change_log()
+
+
+def test_unencodable_change_is_logged(tmp_path, caplog):
+    root = reactive({"a": 0})
+    change_log = create_change_log(root, str(tmp_path), flush_interval=60)
+
+    change_log.append(UpdateChange(path=("root", "new", "a"), value={1, 2}))
+    assert "Cannot log change" in caplog.text
+
+    root["a"] = 1
+    root.get_namespace().detach_change_log()
+
+    assert restore_tree(str(tmp_path)).json() == {"a": 1}
@@ -0,0 +1,33 @@
+# pylint: skip-file
+
+import dataclasses
+import pytest
+from perci import reactive, create_queue_watcher
+from perci.changes import ChangeType, UpdateChange, AddChange
+
+
+def test_changes_are_immutable():
+    change = UpdateChange(path=["root", "a"], value=1)
+
+    assert change.path == ("root", "a")
+    assert change.change_type == ChangeType.UPDATE
+    assert change.change_type == "update"
+    assert not hasattr(change, "__dict__")
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        change.value = 2
+
+
+def test_changes_do_not_alias_paths():
+    state = reactive({"a": {"b": 1}})
+    watcher = create_queue_watcher(state)
+
+    state["a"]["b"] = 2
+    state["a"]["c"] = 3
+
+    changes = watcher.get_changes()
+    assert changes == [
+        UpdateChange(path=["root", "a", "b"], value=2),
+        AddChange(path=["root", "a"], key="c", repr="value", value=3),
+    ]
+    assert all(isinstance(change.path, tuple) for change in changes)
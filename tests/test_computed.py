@@ -0,0 +1,158 @@
+# pylint: skip-file
+
+import pytest
+from perci import reactive, computed, watch, transaction, CyclicComputationError, ReactiveComputedNode
+from perci.changes import UpdateChange
+
+
+def counted(function):
+    calls = []
+
+    def wrapper():
+        calls.append(None)
+        return function()
+
+    return computed(wrapper), calls
+
+
+def test_cached_until_dependency_changes():
+    state = reactive({"prices": {"a": 1, "b": 2}, "other": {"x": 0}})
+    total, calls = counted(lambda: sum(state["prices"].values()))
+
+    assert total() == 3
+    assert total() == 3
+    assert len(calls) == 1
+
+    state["other"]["x"] = 1
+    state["other"]["y"] = 2
+    assert total.is_valid()
+
+    state["prices"]["a"] = 10
+    assert not total.is_valid()
+    assert total() == 12
+
+    state["prices"]["c"] = 1
+    assert total() == 13
+
+    del state["prices"]["b"]
+    assert total() == 11
+    assert len(calls) == 4
+
+
+def test_leaf_dependencies():
+    state = reactive({"user": {"name": "a", "age": 1}})
+    name, calls = counted(lambda: state["user.name"].upper())
+
+    assert name() == "A"
+
+    # the structure of the parent does not matter to a computed value that only read one of its leaves
+    state["user"]["age"] = 2
+    state["user"]["email"] = "a@b"
+    assert name.is_valid()
+
+    state["user"] = {"name": "b"}
+    assert name() == "B"
+
+    state.remove_child("user")
+    with pytest.raises(KeyError):
+        name()
+
+    state["user"] = {"name": "c"}
+    assert name() == "C"
+
+
+def test_list_positions():
+    state = reactive({"items": [{"n": 1}, {"n": 2}, {"n": 3}]})
+    first = computed(lambda: state["items"][0]["n"])
+    count = computed(lambda: len(state["items"]))
+
+    assert first() == 1 and count() == 3
+
+    state["items"].append({"n": 4})
+    assert first.is_valid()
+    assert not count.is_valid()
+    assert count() == 4
+
+    state["items"][2]["n"] = 30
+    assert first.is_valid() and count.is_valid()
+
+    state["items"].insert(0, {"n": 0})
+    assert first() == 0
+
+
+def test_deep_dependencies():
+    state = reactive({"config": {"a": {"b": 1}}, "other": 1})
+    encoded = computed(lambda: state["config"].json())
+
+    assert encoded() == {"a": {"b": 1}}
+
+    state["other"] = 2
+    assert encoded.is_valid()
+
+    state["config"]["a"]["b"] = 2
+    assert encoded() == {"a": {"b": 2}}
+
+
+def test_nested_computed():
+    state = reactive({"values": {"a": 1, "b": 2}})
+    total = computed(lambda: sum(state["values"].values()))
+    double = computed(lambda: total() * 2)
+
+    assert double() == 6
+
+    state["values"]["a"] = 5
+    assert not double.is_valid()
+    assert double() == 14
+
+
+def test_computed_node_is_watchable():
+    state = reactive({"prices": {"a": 1, "b": 2}})
+    state["total"] = computed(lambda: sum(state["prices"].values()))
+
+    assert isinstance(state.get_child("total"), ReactiveComputedNode)
+    assert state["total"] == 3
+    assert state.json() == {"prices": {"a": 1, "b": 2}, "total": 3}
+
+    changes = []
+    watch(state, changes.append, "total")
+
+    state["prices"]["a"] = 5
+    assert changes == [UpdateChange(path=("root", "total"), value=7)]
+    assert state.json()["total"] == 7
+
+    # a batch emits a single update once it is complete
+    changes.clear()
+    with transaction(state):
+        state["prices"]["a"] = 1
+        state["prices"]["b"] = 1
+    assert changes == [UpdateChange(path=("root", "total"), value=2)]
+
+    # changes that do not change the value are not emitted
+    changes.clear()
+    with transaction(state):
+        state["prices"]["a"] = 2
+        state["prices"]["b"] = 0
+    assert changes == []
+
+    with pytest.raises(ValueError):
+        state.get_child("total").set_value(1)
+
+
+def test_computed_node_lazy_without_watchers():
+    state = reactive({"value": 1})
+    double, calls = counted(lambda: state["value"] * 2)
+    state["double"] = double
+    assert len(calls) == 1
+
+    for i in range(10):
+        state["value"] = i
+    assert len(calls) == 1
+
+    assert state["double"] == 18
+    assert len(calls) == 2
+
+
+def test_cycle():
+    loop = computed(lambda: loop() + 1)
+    with pytest.raises(CyclicComputationError):
+        loop()
@@ -1,7 +1,9 @@
 # pylint: skip-file
 
-from perci import create_dict_node
+import pytest
+from perci import create_dict_node, reactive, watch
 from perci.dict_node import ReactiveDictNode
+from perci.list_node import ReactiveListNode
 
 
 def test_empty_node():
@@ -165,3 +167,19 @@ def test_add_multiple_nested_children():
     assert nested_child2.is_leaf()
     assert not nested_child2.is_root()
     assert nested_child2.get_value() == 43
+
+
+def test_pack_wrappers():
+    state = reactive({})
+    changes = []
+    watch(state, changes.append)
+
+    state.pack_atomic("x", 1)
+    ReactiveDictNode.pack_dict(state, "d", {"a": [1]})
+    ReactiveListNode.pack_list(state, "l", [1, {"b": 2}])
+
+    assert state.json() == {"x": 1, "d": {"a": [1]}, "l": [1, {"b": 2}]}
+    assert len(changes) == 3
+
+    with pytest.raises(ValueError):
+        state.pack_atomic("a.b", 1)
@@ -1,5 +1,6 @@
 # pylint: skip-file
 
+import pytest
 from perci import create_dict_node
 from perci.dict_node import ReactiveDictNode
 
@@ -208,3 +209,56 @@ def test_setdefault():
     assert parent.setdefault("child1", 44) == 42
     assert parent.setdefault("child3", 45) == 45
     assert parent.items() == [("child1", 42), ("child2", 43), ("child3", 45)]
+
+
+def test_nested_keys():
+    parent = create_dict_node({"a": {"b": {"c": 1}}, "items": [{"name": "x"}, {"name": "y"}]}, "parent")
+
+    assert parent["a.b.c"] == 1
+    assert parent["items.1.name"] == "y"
+    assert "a.b.c" in parent
+    assert "a.b.missing" not in parent
+    assert "items.5.name" not in parent
+
+    parent["a.b.c"] = 2
+    parent["a.b.d"] = 3
+    parent["items.0.name"] = "z"
+    parent["items.1"] = {"name": "w"}
+    assert parent.json() == {"a": {"b": {"c": 2, "d": 3}}, "items": [{"name": "z"}, {"name": "w"}]}
+
+    del parent["a.b.c"]
+    del parent["items.0"]
+    assert parent.json() == {"a": {"b": {"d": 3}}, "items": [{"name": "w"}]}
+
+    with pytest.raises(KeyError):
+        parent["a.missing.c"]
+    with pytest.raises(KeyError):
+        parent["items.3.name"] = 1
+    with pytest.raises(KeyError):
+        del parent["a.b.c"]
+
+
+def test_nested_keys_follow_structural_changes():
+    parent = create_dict_node({"items": [{"name": "x"}, {"name": "y"}]}, "parent")
+
+    # the index entry of the first lookup is outdated once the items shift
+    assert parent["items.1.name"] == "y"
+    parent["items"].insert(0, {"name": "w"})
+    assert parent["items.1.name"] == "x"
+
+    parent["items"][1] = {"name": "v"}
+    assert parent["items.1.name"] == "v"
+
+    parent.remove_child("items")
+    assert "items.1.name" not in parent
+
+    parent["items"] = [{"name": "u"}]
+    assert parent["items.0.name"] == "u"
+
+
+def test_nested_keys_detached():
+    node = ReactiveDictNode.build_dict("detached", {"a": [{"b": 1}]})
+
+    assert node["a.0.b"] == 1
+    node["a.0.b"] = 2
+    assert node.json() == {"a": [{"b": 2}]}
@@ -0,0 +1,124 @@
+# pylint: skip-file
+
+import copy
+import random
+from perci import reactive, watch, diff
+from perci.changes import UpdateChange, ListInsertChange
+
+
+def random_value(rng: random.Random, depth: int = 0):
+    kind = rng.randrange(6 if depth < 3 else 4)
+    if kind == 0:
+        return rng.randrange(5)
+    elif kind == 1:
+        return rng.choice(["a", "b", "c"])
+    elif kind == 2:
+        return rng.choice([None, True, False])
+    elif kind == 3:
+        return rng.random()
+    elif kind == 4:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(6))]
+    else:
+        return {rng.choice("abcdef"): random_value(rng, depth + 1) for _ in range(rng.randrange(5))}
+
+
+def mutate(rng: random.Random, value):
+    if isinstance(value, list):
+        value = list(value)
+        for _ in range(rng.randrange(4)):
+            action = rng.randrange(4)
+            if action == 0 or not value:
+                value.insert(rng.randrange(len(value) + 1), random_value(rng, 2))
+            elif action == 1:
+                del value[rng.randrange(len(value))]
+            elif action == 2:
+                value.insert(rng.randrange(len(value) + 1), value.pop(rng.randrange(len(value))))
+            else:
+                i = rng.randrange(len(value))
+                value[i] = mutate(rng, value[i])
+        return value
+    elif isinstance(value, dict):
+        value = dict(value)
+        for key in list(value):
+            if rng.random() < 0.5:
+                value[key] = mutate(rng, value[key])
+            elif rng.random() < 0.2:
+                del value[key]
+        if rng.random() < 0.3:
+            value[rng.choice("abcdef")] = random_value(rng, 2)
+        return value
+    else:
+        return random_value(rng, 2) if rng.random() < 0.5 else value
+
+
+def test_diff_round_trip():
+    rng = random.Random(42)
+    for _ in range(300):
+        old = {"root": random_value(rng)}
+        new = mutate(rng, old)
+
+        state = reactive(copy.deepcopy(old))
+        state.apply_patch(diff(old, new))
+        assert state.json() == new
+
+        state = reactive(copy.deepcopy(old))
+        state.update_from(new)
+        assert state.json() == new
+
+
+def test_diff_is_minimal():
+    old = {"items": [{"id": i, "value": i} for i in range(1000)], "config": {"a": 1, "b": [1, 2, 3]}}
+    new = copy.deepcopy(old)
+    new["items"][500]["value"] = -1
+    new["config"]["b"].insert(1, 5)
+
+    assert diff(old, new) == [
+        {"op": "replace", "path": "/items/500/value", "value": -1},
+        {"op": "add", "path": "/config/b/1", "value": 5},
+    ]
+
+    assert diff([1, 2, 3, 4], [1, 3, 4, 2]) == [{"op": "move", "from": "/1", "path": "/3"}]
+    assert diff({"a": [1]}, {"a": {"x": 1}}) == [{"op": "replace", "path": "/a", "value": {"x": 1}}]
+    assert diff({"a": 1}, {"a": True}) == [{"op": "replace", "path": "/a", "value": True}]
+    assert diff(old, copy.deepcopy(old)) == []
+
+
+def test_update_from_changes():
+    state = reactive({"sensors": [{"id": i, "value": 0} for i in range(100)], "name": "config"})
+    changes = []
+    watch(state, changes.append)
+
+    data = state.json()
+    data = {"sensors": [dict(sensor) for sensor in data["sensors"]], "name": "config"}
+    data["sensors"][10]["value"] = 1
+    data["sensors"].append({"id": 100, "value": 0})
+    state.update_from(data)
+
+    assert changes == [
+        ListInsertChange(path=["root", "sensors"], index=100, values=[{"id": 100, "value": 0}]),
+        UpdateChange(path=["root", "sensors", "10", "value"], value=1),
+    ]
+    assert state.json() == data
+
+
+def test_sparse_setitem_uses_diff():
+    state = reactive({"config": {"name": "a", "values": list(range(50))}})
+    changes = []
+    watch(state, changes.append)
+
+    state["config"] = {"name": "b", "values": list(range(1, 50))}
+
+    assert len(changes) == 2
+    assert state.json() == {"config": {"name": "b", "values": list(range(1, 50))}}
+
+
+def test_update_from_type_changes():
+    state = reactive({"value": 1})
+    changes = []
+    watch(state, changes.append)
+
+    for value in (True, 1.0, 1, 1):
+        state.update_from({"value": value})
+
+    assert [change.value for change in changes] == [True, 1.0, 1]
+    assert type(state["value"]) is int
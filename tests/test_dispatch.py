@@ -0,0 +1,115 @@
+# pylint: skip-file
+
+import threading
+import time
+from perci import reactive, watch, transaction, ThreadDispatcher, ExecutorDispatcher
+from perci.changes import UpdateChange
+
+
+def test_thread_dispatcher_order():
+    dispatcher = ThreadDispatcher()
+    state = reactive({"value": 0}, dispatcher=dispatcher)
+
+    received = []
+    watch(state, lambda change: received.append(change.value))
+
+    for i in range(1, 101):
+        state["value"] = i
+
+    assert dispatcher.flush(timeout=5)
+    assert received == list(range(1, 101))
+
+    dispatcher.close()
+
+
+def test_slow_handler_does_not_block_mutations():
+    dispatcher = ThreadDispatcher()
+    state = reactive({"value": 0}, dispatcher=dispatcher)
+
+    release = threading.Event()
+    received = []
+
+    def handler(change):
+        release.wait()
+        received.append(change.value)
+
+    watch(state, handler)
+
+    # the handler is stuck, but mutations from another thread still go through
+    state["value"] = 1
+    writer = threading.Thread(target=lambda: state.__setitem__("value", 2))
+    writer.start()
+    writer.join(timeout=1)
+
+    assert not writer.is_alive()
+    assert state["value"] == 2
+    assert received == []
+
+    release.set()
+    assert dispatcher.flush(timeout=5)
+    assert received == [1, 2]
+
+    dispatcher.close()
+
+
+def test_executor_dispatcher_per_watcher_order():
+    dispatcher = ExecutorDispatcher(max_workers=4)
+    state = reactive({"a": 0, "b": 0}, dispatcher=dispatcher)
+
+    received = {"a": [], "b": []}
+
+    def make_handler(key):
+        def handler(change):
+            time.sleep(0.0005)
+            received[key].append(change.value)
+
+        return handler
+
+    watch(state, make_handler("a"), "a")
+    watch(state, make_handler("b"), "b")
+
+    for i in range(1, 51):
+        state["a"] = i
+        state["b"] = -i
+
+    dispatcher.close()
+
+    assert received["a"] == list(range(1, 51))
+    assert received["b"] == [-i for i in range(1, 51)]
+
+
+def test_dispatcher_batch():
+    dispatcher = ThreadDispatcher()
+    state = reactive({"a": 0, "b": 0}, dispatcher=dispatcher)
+
+    received = []
+    watch(state, received.append, batched=True)
+
+    with transaction(state):
+        state["a"] = 1
+        state["b"] = 2
+        state["a"] = 3
+
+    dispatcher.close()
+
+    assert received == [[UpdateChange(path=["root", "b"], value=2), UpdateChange(path=["root", "a"], value=3)]]
+
+
+def test_dispatcher_handler_error():
+    dispatcher = ThreadDispatcher()
+    state = reactive({"value": 0}, dispatcher=dispatcher)
+
+    received = []
+
+    def failing_handler(change):
+        raise RuntimeError("handler failed")
+
+    watch(state, failing_handler)
+    watch(state, lambda change: received.append(change.value))
+
+    state["value"] = 1
+    state["value"] = 2
+
+    dispatcher.close()
+
+    assert received == [1, 2]
@@ -0,0 +1,159 @@
+# pylint: skip-file
+
+import pytest
+from perci import reactive, transaction, compact, ReactiveNode
+
+
+def test_dict_field_index():
+    state = reactive({"devices": {"a": {"status": "on"}, "b": {"status": "off"}, "c": {"power": 1}}})
+    devices = state["devices"]
+    devices.create_index("status")
+    assert devices.has_index("status")
+
+    assert devices.find("on", "status") == ["a"]
+    assert devices.find("off", field="status") == ["b"]
+    assert devices.find("idle", "status") == []
+
+    devices["c"]["status"] = "on"
+    assert sorted(devices.find("on", "status")) == ["a", "c"]
+
+    devices["a"] = {"status": "off"}
+    state["devices.c.status"] = "idle"
+    del devices["b"]
+    assert devices.find("on", "status") == []
+    assert devices.find("off", "status") == ["a"]
+    assert devices.find("idle", "status") == ["c"]
+
+    # removing the field or replacing it with a container drops the child from the index
+    devices["c"]["status"] = {"code": 1}
+    del devices["a"]["status"]
+    assert devices.find("idle", "status") == []
+    assert devices.find("off", "status") == []
+
+    with transaction(state):
+        devices["d"] = {"status": "on"}
+        devices["d"]["status"] = "off"
+    assert devices.find("off", "status") == ["d"]
+
+    devices.drop_index("status")
+    assert not devices.has_index("status")
+    assert devices.find("off", "status") == ["d"]
+
+    with pytest.raises(KeyError):
+        devices.drop_index("status")
+    with pytest.raises(ValueError):
+        devices.create_index("a..b")
+
+
+def test_nested_field_index():
+    state = reactive({"users": {"a": {"address": {"city": "x"}}, "b": {"address": {"city": "y"}}}})
+    users = state["users"]
+    users.create_index("address.city")
+
+    assert users.find("x", "address.city") == ["a"]
+
+    users["b"]["address"]["city"] = "x"
+    users["a"]["address"] = {"city": "z"}
+    assert users.find("x", "address.city") == ["b"]
+    assert users.find("z", "address.city") == ["a"]
+
+
+def test_list_value_index():
+    state = reactive({"items": [1, 2, 3, 2, "x", {"status": "on"}, []]})
+    items = state["items"]
+    items.create_index()
+
+    assert 2 in items and "x" in items
+    assert 5 not in items and {"status": "on"} not in items and [] not in items
+    assert items.index(2) == 1
+    assert items.index(2, 2) == 3
+    assert items.count(2) == 2
+    assert items.find(2) == [1, 3]
+    with pytest.raises(ValueError):
+        items.index(2, 4)
+
+    # values that compare equal are found together, like with a plain list
+    assert 1.0 in items and True in items
+    assert items.count(1.0) == 1
+
+    items.insert(0, 2)
+    assert items.find(2) == [0, 2, 4]
+
+    items.remove(2)
+    items[1] = 7
+    assert items.find(2) == [3]
+    assert items.find(7) == [1]
+
+    items.move_child(3, 0)
+    assert items.find(2) == [0]
+
+    items.clear()
+    assert 2 not in items
+    items.extend([2, 2])
+    assert items.count(2) == 2
+
+    with pytest.raises(TypeError):
+        reactive({"series": compact(range(10))})["series"].create_index()
+
+
+def test_list_field_index():
+    state = reactive({"tasks": [{"id": i, "done": i % 3 == 0} for i in range(10)]})
+    tasks = state["tasks"]
+    tasks.create_index("done")
+    tasks.create_index("id")
+
+    assert tasks.find(True, "done") == [0, 3, 6, 9]
+
+    del tasks[0]
+    tasks[0]["done"] = True
+    assert tasks.find(True, "done") == [0, 2, 5, 8]
+    assert tasks.find(5, "id") == [4]
+
+    tasks.reconcile([{"id": 5, "done": False}, {"id": 1, "done": True}], key_function=lambda task: task["id"])
+    assert tasks.find(True, "done") == [1]
+    assert tasks.find(5, "id") == [0]
+    assert tasks.find(False, "done") == [0]
+
+
+def test_indexed_ancestors_per_tree():
+    indexed = reactive({"users": {"a": {"status": "on"}}})
+    other = reactive({"users": {"a": {"status": "on"}}})
+    users = indexed["users"]
+    users.create_index("status")
+
+    assert users["a"].get_child("status")._has_indexed_ancestor()
+    assert not other["users"]["a"].get_child("status")._has_indexed_ancestor()
+    assert not users._has_indexed_ancestor()
+
+    # a subtree moved into the indexed container follows it
+    moved = ReactiveNode.build("b", {"status": "off"})
+    assert not moved.get_child("status")._has_indexed_ancestor()
+    users.add_child(moved)
+    moved.get_child("status").set_value("on")
+    assert sorted(users.find("on", "status")) == ["a", "b"]
+
+    users.drop_index("status")
+    assert not users["a"].get_child("status")._has_indexed_ancestor()
+
+
+def test_detached_index():
+    node = ReactiveNode.build("root", {"a": {"status": "on"}})
+    node.create_index("status")
+
+    node.get_child("a").get_child("status").set_value("off")
+    assert node.find("off", "status") == ["a"]
+
+
+def test_matches_scan():
+    data = {f"key_{i}": {"group": i % 7, "value": i} for i in range(100)}
+    indexed = reactive({"data": data})["data"]
+    indexed.create_index("group")
+    scanned = reactive({"data": data})["data"]
+
+    for node in (indexed, scanned):
+        for i in range(0, 100, 3):
+            node[f"key_{i}"]["group"] = i % 5
+        del node["key_1"]
+
+    for group in range(7):
+        assert sorted(indexed.find(group, "group")) == sorted(scanned.find(group, "group"))
@@ -1,7 +1,11 @@
+import random
 import pytest
 from perci import reactive
 from perci.node import ReactiveNode
 from perci.list_node import ReactiveListNode
+from perci.positions import PositionIndex
+from perci.watcher import Watcher
+from perci.changes import ListInsertChange, ListDeleteChange, ListReplaceChange, ListSpliceChange, UpdateChange
 
 
 def test_getitem():
@@ -120,3 +124,207 @@ def test_contains():
     assert "a" in state["test2"]
     assert "b" in state["test2"]
     assert "c" not in state["test2"]
+
+
+def test_positional_changes():
+    state = reactive(
+        {
+            "test": [42, 43, 44],
+        }
+    )
+
+    changes = []
+    state.get_namespace().add_watcher(Watcher(["root"], changes.append))
+
+    del state["test"][0]
+    state["test"].insert(1, 45)
+
+    assert changes == [
+        ListDeleteChange(path=["root", "test"], index=0),
+        ListInsertChange(path=["root", "test"], index=1, values=[45]),
+    ]
+    assert list(state["test"]) == [43, 45, 44]
+
+
+def test_shifted_paths():
+    state = reactive(
+        {
+            "test": [{"a": 1}, {"a": 2}, {"a": 3}],
+        }
+    )
+
+    last = state["test"][2]
+    leaf = last.get_child("a")
+    assert leaf.get_path() == ["root", "test", "2", "a"]
+
+    del state["test"][0]
+
+    assert last.get_key() == "1"
+    assert leaf.get_path() == ["root", "test", "1", "a"]
+
+    state["test"].insert(0, 0)
+
+    assert leaf.get_path() == ["root", "test", "2", "a"]
+    assert state["test"].get_child("2") is last
+
+
+def test_shifted_keys_random(monkeypatch):
+    # small blocks make the position index split and drop blocks often
+    monkeypatch.setattr(PositionIndex, "BLOCK_SIZE", 4)
+    rng = random.Random(0)
+
+    for _ in range(50):
+        x = reactive({"test": [{"a": i} for i in range(rng.randrange(30))]})["test"]
+        x.get_path()
+
+        for _ in range(40):
+            n = len(x)
+            operation = rng.randrange(5)
+            if operation == 0:
+                x.insert(rng.randrange(n + 1), {"a": -1})
+            elif operation == 1 and n:
+                start = rng.randrange(n)
+                del x[start : rng.randrange(start, n + 1)]
+            elif operation == 2:
+                start = rng.randrange(n + 1)
+                x[start:start] = [{"a": k} for k in range(rng.randrange(12))]
+            elif operation == 3 and n > 1:
+                x.move_child(rng.randrange(n), rng.randrange(n))
+            else:
+                x.extend([{"a": 0}] * rng.randrange(10))
+
+            assert [child.get_key() for child in x.get_children().values()] == [str(i) for i in range(len(x))]
+
+
+def test_watchers_follow_items():
+    state = reactive(
+        {
+            "test": [{"a": 1}, {"a": 2}],
+        }
+    )
+
+    changes = []
+    state.get_namespace().add_watcher(Watcher(["root", "test", "1", "a"], changes.append))
+
+    del state["test"][0]
+    state["test"][0]["a"] = 3
+
+    assert changes == [UpdateChange(path=["root", "test", "0", "a"], value=3)]
+
+
+def test_bulk_operations():
+    state = reactive(
+        {
+            "test": [1, 2, 3],
+        }
+    )
+
+    changes = []
+    state.get_namespace().add_watcher(Watcher(["root"], changes.append))
+
+    x = state["test"]
+    x.extend([4, {"a": 5}])
+    x += [6]
+    assert x.pop() == 6
+    x.remove(2)
+
+    assert x.json() == [1, 3, 4, {"a": 5}]
+    assert changes == [
+        ListInsertChange(path=["root", "test"], index=3, values=[4, {"a": 5}]),
+        ListInsertChange(path=["root", "test"], index=5, values=[6]),
+        ListDeleteChange(path=["root", "test"], index=5),
+        ListDeleteChange(path=["root", "test"], index=1),
+    ]
+
+    changes.clear()
+    x.clear()
+
+    assert len(x) == 0
+    assert changes == [ListDeleteChange(path=["root", "test"], index=0, count=4)]
+
+    with pytest.raises(ValueError):
+        x.remove(1)
+
+
+def test_slices():
+    state = reactive(
+        {
+            "test": [0, 1, 2, 3, 4, 5],
+        }
+    )
+
+    changes = []
+    state.get_namespace().add_watcher(Watcher(["root"], changes.append))
+
+    x = state["test"]
+    x[1:3] = ["a", "b", "c"]
+    assert x[:] == [0, "a", "b", "c", 3, 4, 5]
+    assert changes == [ListSpliceChange(path=["root", "test"], index=1, count=2, values=["a", "b", "c"])]
+
+    changes.clear()
+    x[0:2] = [{"v": 1}, 9]
+    x[2] = [1]
+    assert x.json() == [{"v": 1}, 9, [1], "c", 3, 4, 5]
+    assert changes == [
+        ListReplaceChange(path=["root", "test"], index=0, values=[{"v": 1}, 9]),
+        ListReplaceChange(path=["root", "test"], index=2, values=[[1]]),
+    ]
+
+    del x[::2]
+    assert x[:] == [9, "c", 4]
+
+    x[::2] = [7, 8]
+    assert x[:] == [7, "c", 8]
+
+    with pytest.raises(ValueError):
+        x[::2] = [1]
+
+    del x[1:]
+    assert x[:] == [7]
+
+
+def test_extended_slice_changes():
+    state = reactive({"test": list(range(8))})
+    x = state["test"]
+
+    deliveries = []
+    state.get_namespace().add_watcher(Watcher(["root"], deliveries.append, batched=True))
+
+    x[::2] = ["a", "b", "c", "d"]
+    assert x[:] == ["a", 1, "b", 3, "c", 5, "d", 7]
+    assert len(deliveries) == 1
+    assert len(deliveries[0]) == 4
+
+    deliveries.clear()
+    del x[1::2]
+    assert x[:] == ["a", "b", "c", "d"]
+    assert len(deliveries) == 1
+    assert deliveries[0] == [ListDeleteChange(path=["root", "test"], index=i) for i in (7, 5, 3, 1)]
+
+    # reversed slices are contiguous and emit a single positional change
+    deliveries.clear()
+    x[::-1] = [1, 2, 3, 4]
+    del x[2:0:-1]
+    assert x[:] == [4, 1]
+    assert deliveries == [
+        [ListReplaceChange(path=["root", "test"], index=0, values=[4, 3, 2, 1])],
+        [ListDeleteChange(path=["root", "test"], index=1, count=2)],
+    ]
+
+
+def test_slice_watchers():
+    state = reactive({"test": [{"a": i} for i in range(6)]})
+    x = state["test"]
+
+    received = {}
+    for i in range(6):
+        state.get_namespace().add_watcher(Watcher(["root", "test", str(i), "a"], lambda change, i=i: received.setdefault(i, []).append(change.value)))
+
+    x[1:3] = [{"a": "x"}]
+    assert x[:] == [{"a": 0}, {"a": "x"}, {"a": 3}, {"a": 4}, {"a": 5}]
+
+    # the watchers of the replaced items are gone and the ones of the following items followed them
+    for item in x.get_children().values():
+        item["a"] = str(item["a"]) + "!"
+    assert received == {0: ["0!"], 3: ["3!"], 4: ["4!"], 5: ["5!"]}
+    assert [child.get_key() for child in x.get_children().values()] == ["0", "1", "2", "3", "4"]
@@ -0,0 +1,102 @@
+# pylint: skip-file
+
+import random
+import pytest
+from perci import reactive, watch, create_patch_watcher
+from perci.changes import UpdateChange, ListInsertChange, ListDeleteChange, ListMoveChange
+
+
+def records(*ids):
+    return [{"id": i, "name": f"item{i}"} for i in ids]
+
+
+def test_move_child():
+    state = reactive({"items": [0, 1, 2, 3]})
+    items = state["items"]
+    changes = []
+    watch(state, changes.append)
+    item_changes = []
+    watch(items.get_child("3"), item_changes.append)
+
+    items.move_child(3, 1)
+    assert list(items) == [0, 3, 1, 2]
+    assert changes == [ListMoveChange(path=["root", "items"], index=3, target=1)]
+
+    items[1] = 5
+    assert item_changes == [UpdateChange(path=["root", "items", "1"], value=5)]
+
+
+def test_reconcile_preserves_nodes():
+    state = reactive({"items": records(1, 2, 3, 4, 5)})
+    items = state["items"]
+    items.set_key_function(lambda item: item["id"])
+
+    nodes = {child.json()["id"]: child for child in items.get_children().values()}
+    item_changes = []
+    watch(nodes[5], item_changes.append)
+
+    changes = []
+    watch(state, changes.append)
+
+    # reorder, delete 2, insert 6 and rename 3
+    new = records(5, 1, 3, 6, 4)
+    new[2]["name"] = "renamed"
+    state["items"] = new
+
+    assert state.json()["items"] == new
+    assert state["items"] is items
+    assert items.get_child("0") is nodes[5]
+    assert items.get_child("1") is nodes[1]
+    assert items.get_child("4") is nodes[4]
+
+    assert changes == [
+        ListDeleteChange(path=["root", "items"], index=1, count=1),
+        ListMoveChange(path=["root", "items"], index=3, target=0),
+        ListInsertChange(path=["root", "items"], index=3, values=[{"id": 6, "name": "item6"}]),
+        UpdateChange(path=["root", "items", "2", "name"], value="renamed"),
+    ]
+
+    # the watcher followed its item to the front
+    items[0]["name"] = "first"
+    assert item_changes == [UpdateChange(path=["root", "items", "0", "name"], value="first")]
+
+
+def test_reconcile_reverse():
+    ids = list(range(200))
+    state = reactive({"items": records(*ids)})
+    items = state["items"]
+    items.set_key_function(lambda item: item["id"])
+
+    changes = []
+    watch(state, changes.append)
+    items[:] = records(*reversed(ids))
+
+    assert state.json()["items"] == records(*reversed(ids))
+    assert len(changes) == 199
+    assert all(isinstance(change, ListMoveChange) for change in changes)
+
+
+def test_reconcile_random():
+    rng = random.Random(7)
+    for _ in range(100):
+        old = rng.sample(range(30), rng.randrange(15))
+        new = rng.sample(range(30), rng.randrange(15))
+
+        source = reactive({"items": records(*old)})
+        source["items"].set_key_function(lambda item: item["id"])
+        replica = reactive({"items": records(*old)})
+        create_patch_watcher(source, replica.apply_patch)
+
+        source["items"] = records(*new)
+        assert source.json() == {"items": records(*new)}
+        assert replica.json() == source.json()
+
+
+def test_reconcile_errors():
+    state = reactive({"items": records(1, 2)})
+
+    with pytest.raises(ValueError):
+        state["items"].reconcile(records(1))
+
+    with pytest.raises(ValueError):
+        state["items"].reconcile(records(1, 1), key_function=lambda item: item["id"])
@@ -0,0 +1,153 @@
+# pylint: skip-file
+
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from perci import reactive, watch, transaction, StripedLock, LockOrderError
+from perci.changes import UpdateChange, ListInsertChange
+
+
+def test_striped_lock_mutations():
+    state = reactive({"a": {"value": 0}, "items": [1, 2, 3]}, lock=StripedLock(stripes=4, depth=3))
+
+    changes = []
+    watch(state, changes.append)
+
+    state["a"]["value"] = 1
+    state["items"].insert(0, 0)
+    state["items"][1] = 5
+    state["b"] = {"value": 2}
+    del state["a"]
+
+    with transaction(state):
+        state["b"]["value"] = 3
+
+    assert state.json() == {"items": [0, 5, 2, 3], "b": {"value": 3}}
+    assert changes[:3] == [
+        UpdateChange(path=["root", "a", "value"], value=1),
+        ListInsertChange(path=["root", "items"], index=0, values=[0]),
+        UpdateChange(path=["root", "items", "1"], value=5),
+    ]
+    assert changes[-1] == UpdateChange(path=["root", "b", "value"], value=3)
+
+
+def test_striped_lock_parallel_writers():
+    lock = StripedLock(stripes=64)
+    keys = [f"k{i}" for i in range(64)]
+
+    # pick two subtrees that map to different stripes
+    first = keys[0]
+    second = next(key for key in keys if lock._stripes_for(("root", key)) != lock._stripes_for(("root", first)))
+
+    state = reactive({first: 0, second: 0}, lock=lock)
+
+    # both handlers run under the lock of their subtree, so they can only meet at the barrier if the writers run in parallel
+    barrier = threading.Barrier(2, timeout=5)
+    watch(state, lambda change: barrier.wait())
+
+    writers = [threading.Thread(target=state.__setitem__, args=(key, 1)) for key in (first, second)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert not barrier.broken
+    assert state.json() == {first: 1, second: 1}
+
+
+def test_single_lock_serializes_writers():
+    state = reactive({"a": 0, "b": 0})
+
+    barrier = threading.Barrier(2, timeout=0.2)
+    errors = []
+
+    def handler(change):
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            errors.append(change)
+
+    watch(state, handler)
+
+    writers = [threading.Thread(target=state.__setitem__, args=(key, 1)) for key in ("a", "b")]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert barrier.broken
+    assert len(errors) == 2
+
+
+def test_striped_lock_order():
+    lock = StripedLock(stripes=2)
+    key = next(f"k{i}" for i in range(100) if lock._stripes_for(("root", f"k{i}")) == (1,))
+    state = reactive({key: 0}, lock=lock)
+
+    # adding a child to the root takes all stripes, which a handler running under stripe 1 may only do while stripe 0 is free
+    watch(state, lambda change: state.__setitem__("other", 1), key)
+
+    state[key] = 1
+    assert state.json() == {key: 1, "other": 1}
+    assert lock._held() == [0, 0, 0]
+
+    # another thread holds stripe 0, so waiting for it could deadlock
+    taken = threading.Event()
+    done = threading.Event()
+
+    def hold():
+        with lock._locks[0]:
+            taken.set()
+            done.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    taken.wait(5)
+
+    try:
+        with pytest.raises(LockOrderError):
+            state[key] = 2
+    finally:
+        done.set()
+        holder.join()
+
+    # the failed acquisition released everything it took
+    assert lock._held() == [0, 0, 0]
+
+
+SEED_SCRIPT = """
+from perci import reactive, watch, StripedLock
+
+state = reactive({"a": {"x": 0}, "b": {"y": 0}}, lock=StripedLock())
+watch(state, lambda change: state["b"].__setitem__("y", 1), "a")
+state["a"]["x"] = 1
+assert state.json() == {"a": {"x": 1}, "b": {"y": 1}}
+"""
+
+
+def test_striped_lock_hash_seeds():
+    # a handler writing to another subtree must not depend on the string hash of the process
+    for seed in ("0", "1", "2", "3", "42"):
+        result = subprocess.run([sys.executable, "-c", SEED_SCRIPT], env={**os.environ, "PYTHONHASHSEED": seed}, capture_output=True, text=True, check=False)
+        assert result.returncode == 0, result.stderr
+
+
+def test_striped_lock_change_count():
+    lock = StripedLock(stripes=8)
+    keys = [f"k{i}" for i in range(8)]
+    state = reactive({key: 0 for key in keys}, lock=lock)
+    watch(state, lambda change: None)
+
+    def write(key):
+        for i in range(1, 501):
+            state[key] = i
+
+    writers = [threading.Thread(target=write, args=(key,)) for key in keys]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert state._namespace.change_count == 8 * 500
@@ -1,8 +1,11 @@
 # pylint: skip-file
 
+import pytest
 from perci import create_root_node
 from perci.node import ReactiveNode
 from perci.namespace import ReactiveNamespace
+from perci.watcher import Watcher
+from perci.changes import AddChange
 
 
 def test_empty_node():
@@ -162,3 +165,106 @@ def test_remove_nested_children():
     assert isinstance(parent.get_namespace(), ReactiveNamespace)
     assert child1.get_namespace() is None
     assert child2.get_namespace() is None
+
+
+def test_detached_children():
+    # detached nodes can be populated without a namespace, as nobody can be watching them yet
+    parent = ReactiveNode("parent")
+    parent.add_child(ReactiveNode("a"))
+    parent.add_child(ReactiveNode("b"))
+    parent.remove_child("a")
+
+    assert parent.get_namespace() is None
+    assert list(parent.get_children()) == ["b"]
+
+    root = create_root_node()
+    changes = []
+    root.get_namespace().add_watcher(Watcher(["root"], changes.append))
+
+    root.add_child(parent)
+    assert changes == [AddChange(path=("root",), key="parent", repr="node", value={"b": None})]
+
+
+def test_move_subtree():
+    parent = create_root_node("parent")
+
+    child1 = ReactiveNode("child1")
+    parent.add_child(child1)
+
+    child2 = ReactiveNode("child2")
+    child1.add_child(child2)
+
+    grandchild = ReactiveNode("grandchild")
+    child2.add_child(grandchild)
+
+    assert grandchild.get_path() == ["parent", "child1", "child2", "grandchild"]
+
+    child1.remove_child("child2")
+
+    assert grandchild.get_path() == ["child2", "grandchild"]
+    assert grandchild.get_namespace() is None
+
+    parent.add_child(child2)
+
+    assert grandchild.get_path() == ["parent", "child2", "grandchild"]
+    assert grandchild.get_path_repr() == "parent.child2.grandchild"
+    assert grandchild.get_namespace() is parent.get_namespace()
+
+
+def test_caches_are_per_tree():
+    first = create_root_node("first")
+    second = create_root_node("second")
+
+    leaf = ReactiveNode("leaf")
+    first.add_child(leaf)
+    assert leaf.get_path() == ["first", "leaf"]
+    generation = leaf._path_generation
+
+    # structural changes in another tree keep the cached path
+    for i in range(10):
+        second.add_child(ReactiveNode(f"n{i}"))
+        second.remove_child(f"n{i}")
+
+    assert leaf.get_path() == ["first", "leaf"]
+    assert leaf._path_generation == generation
+
+    # a subtree built detached follows the tree it is attached to
+    subtree = ReactiveNode.build("sub", {"a": {"b": 1}})
+    b = subtree.get_child("a").get_child("b")
+    assert b.get_path() == ["sub", "a", "b"]
+    assert b.get_namespace() is None
+
+    second.add_child(subtree)
+    assert b.get_path() == ["second", "sub", "a", "b"]
+    assert b.get_namespace() is second.get_namespace()
+
+
+def test_deep_path():
+    parent = create_root_node("parent")
+
+    node = parent
+    for i in range(2000):
+        child = ReactiveNode(f"n{i}")
+        node.add_child(child)
+        node = child
+
+    assert len(node.get_path()) == 2001
+    assert node.get_namespace() is parent.get_namespace()
+
+
+def test_key_validation():
+    assert ReactiveNode.is_key_valid("valid_key-1")
+    assert not ReactiveNode.is_key_valid("invalid.key")
+
+    with pytest.raises(ValueError):
+        ReactiveNode("invalid.key")
+
+    # trusted keys skip the validation
+    assert ReactiveNode("0", validate_key=False).get_key() == "0"
+
+
+def test_shared_keys():
+    a = ReactiveNode.build("a", [1, 2, 3])
+    b = ReactiveNode.build("b", [4, 5, 6])
+
+    assert a.get_child("2").get_key() is b.get_child("2").get_key()
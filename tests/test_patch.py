@@ -0,0 +1,176 @@
+# pylint: skip-file
+
+import copy
+import pytest
+from perci import reactive, watch, create_patch_watcher, transaction, PatchError
+from perci.changes import AddChange, RemoveChange, UpdateChange, ListInsertChange, ListDeleteChange, ListSpliceChange
+from perci.patch import change_to_patch, changes_to_patch, coalesce_patch
+
+
+def test_change_to_patch():
+    base = ("root", "state")
+
+    assert change_to_patch(AddChange(path=base, key="a", repr="value", value=1), base) == [{"op": "add", "path": "/a", "value": 1}]
+    assert change_to_patch(RemoveChange(path=base + ("a",), key="b"), base) == [{"op": "remove", "path": "/a/b"}]
+    assert change_to_patch(UpdateChange(path=base + ("a",), value=2), base) == [{"op": "replace", "path": "/a", "value": 2}]
+    assert change_to_patch(ListInsertChange(path=base, index=1, values=[1, 2]), base) == [
+        {"op": "add", "path": "/1", "value": 1},
+        {"op": "add", "path": "/2", "value": 2},
+    ]
+    assert change_to_patch(ListDeleteChange(path=base, index=1, count=2), base) == [
+        {"op": "remove", "path": "/1"},
+        {"op": "remove", "path": "/1"},
+    ]
+    assert change_to_patch(ListSpliceChange(path=base, index=1, count=2, values=["a"]), base) == [
+        {"op": "remove", "path": "/1"},
+        {"op": "remove", "path": "/1"},
+        {"op": "add", "path": "/1", "value": "a"},
+    ]
+
+    with pytest.raises(ValueError):
+        change_to_patch(UpdateChange(path=("root", "other"), value=1), base)
+
+
+def test_coalesce_patch():
+    assert coalesce_patch(
+        [
+            {"op": "replace", "path": "/a", "value": 1},
+            {"op": "replace", "path": "/b", "value": 1},
+            {"op": "replace", "path": "/a", "value": 2},
+        ]
+    ) == [{"op": "replace", "path": "/a", "value": 2}, {"op": "replace", "path": "/b", "value": 1}]
+
+    assert coalesce_patch([{"op": "remove", "path": "/a"}, {"op": "add", "path": "/a", "value": {"x": 1}}]) == [{"op": "replace", "path": "/a", "value": {"x": 1}}]
+    assert coalesce_patch([{"op": "add", "path": "/a", "value": 1}, {"op": "replace", "path": "/a", "value": 2}]) == [{"op": "add", "path": "/a", "value": 2}]
+    assert coalesce_patch([{"op": "add", "path": "/a", "value": 1}, {"op": "remove", "path": "/a"}]) == []
+
+    # updates are never coalesced across structural operations
+    operations = [
+        {"op": "replace", "path": "/l/1", "value": 1},
+        {"op": "remove", "path": "/l/0"},
+        {"op": "replace", "path": "/l/1", "value": 2},
+    ]
+    assert coalesce_patch(operations) == operations
+
+    # nor across replacements of ancestors or descendants
+    operations = [
+        {"op": "replace", "path": "/l/1", "value": {"k": 2}},
+        {"op": "replace", "path": "/l/1/k", "value": 5},
+        {"op": "replace", "path": "/l/1", "value": {"k": 7}},
+        {"op": "replace", "path": "/l/1/k", "value": 8},
+    ]
+    assert coalesce_patch(operations) == operations
+
+    state = reactive({"l": [0, {"k": 1}]})
+    patches = []
+    create_patch_watcher(state, patches.append)
+    with transaction(state):
+        state["l"][1] = {"k": 2}
+        state["l"][1]["k"] = 5
+        state["l"][1] = {"k": 7}
+
+    replica = reactive({"l": [0, {"k": 1}]})
+    replica.apply_patch(patches[0])
+    assert replica.json() == state.json() == {"l": [0, {"k": 7}]}
+
+
+def test_patch_watcher():
+    state = reactive({"a": {"value": 0}, "items": []})
+    patches = []
+    create_patch_watcher(state, patches.append, "a")
+    create_patch_watcher(state, patches.append)
+
+    state["a"]["value"] = 1
+    state["items"].extend([1, 2])
+    state["a"] = {"other": True}
+
+    assert patches == [
+        [{"op": "replace", "path": "/value", "value": 1}],
+        [{"op": "replace", "path": "/a/value", "value": 1}],
+        [{"op": "add", "path": "/items/0", "value": 1}, {"op": "add", "path": "/items/1", "value": 2}],
+        [{"op": "remove", "path": "/a"}],
+        [{"op": "add", "path": "/a", "value": {"other": True}}],
+    ]
+
+    patches.clear()
+    with transaction(state):
+        for i in range(10):
+            state["items"][0] = i
+        state["a"] = 5
+
+    assert patches == [[{"op": "replace", "path": "/items/0", "value": 9}, {"op": "replace", "path": "/a", "value": 5}]]
+
+
+def test_patch_watcher_follows_shifted_item():
+    state = reactive({"l": [{"v": 0}, {"v": 1}]})
+    patches = []
+    create_patch_watcher(state, patches.append, "l.1")
+
+    state["l"].insert(0, {"v": -1})
+    state["l"][2]["v"] = 2
+
+    assert patches == [[{"op": "replace", "path": "/v", "value": 2}]]
+
+
+def test_patch_watcher_rejects_wildcards():
+    state = reactive({"users": {"a": {"name": "A"}}})
+    patches = []
+
+    with pytest.raises(ValueError):
+        create_patch_watcher(state, patches.append, "users.*")
+
+    # the rejected watcher was never registered, so changes still go through
+    state["users"]["a"]["name"] = "B"
+    assert state.json() == {"users": {"a": {"name": "B"}}}
+    assert patches == []
+
+
+def test_apply_patch():
+    state = reactive({"a": {"value": 0}, "items": [1, 2, 3]})
+
+    changes = []
+    watch(state, changes.append, batched=True)
+
+    state.apply_patch(
+        [
+            {"op": "test", "path": "/a/value", "value": 0},
+            {"op": "replace", "path": "/a/value", "value": 1},
+            {"op": "add", "path": "/items/-", "value": 4},
+            {"op": "add", "path": "/items/0", "value": 0},
+            {"op": "remove", "path": "/items/1"},
+            {"op": "add", "path": "/b", "value": {"x": [1]}},
+            {"op": "copy", "from": "/b/x", "path": "/c"},
+            {"op": "move", "from": "/items/0", "path": "/b/x/-"},
+        ]
+    )
+
+    assert state.json() == {"a": {"value": 1}, "items": [2, 3, 4], "b": {"x": [1, 0]}, "c": [1]}
+    assert len(changes) == 1
+
+    with pytest.raises(PatchError):
+        state.apply_patch([{"op": "test", "path": "/a/value", "value": 2}])
+    with pytest.raises(PatchError):
+        state.apply_patch([{"op": "remove", "path": "/missing"}])
+    with pytest.raises(PatchError):
+        state.apply_patch([{"op": "add", "path": "/items/9", "value": 1}])
+    with pytest.raises(PatchError):
+        state.apply_patch([{"op": "move", "from": "/b", "path": "/b/x/0"}])
+
+
+def test_replication():
+    source = reactive({"users": {}, "log": []})
+    replica = reactive(copy.deepcopy(source.json()))
+    create_patch_watcher(source, replica.apply_patch)
+
+    source["users"]["alice"] = {"age": 25, "tags": ["a"]}
+    source["users"]["alice"]["tags"].insert(0, "b")
+    source["log"].extend(range(5))
+    del source["log"][1:3]
+    source["log"][0] = {"nested": True}
+    source["users"]["alice"] = {"age": 26}
+    with transaction(source):
+        source["users"]["bob"] = {"age": 30}
+        source["users"]["bob"]["age"] = 31
+        del source["users"]["alice"]
+
+    assert replica.json() == source.json()
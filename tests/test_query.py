@@ -0,0 +1,108 @@
+# pylint: skip-file
+
+import pytest
+from perci import reactive, computed, compact, compile_query, ReactiveDictNode
+
+SIZE = 256
+
+
+def devices():
+    return reactive(
+        {
+            "devices": {
+                "lamp": {"status": "on", "power": 5},
+                "fan": {"status": "off", "power": 20, "fault": {"status": "ok"}},
+                "heater": {"power": 100},
+            },
+            "status": "ready",
+            "rooms": [{"name": "kitchen", "status": 1}, {"name": "hall"}],
+        }
+    )
+
+
+def test_single_wildcard():
+    state = devices()
+
+    assert state.query("devices.*.status") == [("devices.lamp.status", "on"), ("devices.fan.status", "off")]
+    assert state.query("devices.lamp.power") == [("devices.lamp.power", 5)]
+    assert state.query("devices.missing.power") == []
+    assert state.query("rooms.*.name") == [("rooms.0.name", "kitchen"), ("rooms.1.name", "hall")]
+    assert state.query("*.1.name") == [("rooms.1.name", "hall")]
+
+    (path, value), = state.query("devices.*.fault")
+    assert path == "devices.fan.fault"
+    assert isinstance(value, ReactiveDictNode)
+
+    # queries are relative to the queried node
+    assert state["devices"].query("*.power") == [("lamp.power", 5), ("fan.power", 20), ("heater.power", 100)]
+    assert state.query("") == [("", state)]
+
+
+def test_recursive_wildcard():
+    state = devices()
+
+    assert state.query("**.status") == [
+        ("devices.lamp.status", "on"),
+        ("devices.fan.status", "off"),
+        ("devices.fan.fault.status", "ok"),
+        ("status", "ready"),
+        ("rooms.0.status", 1),
+    ]
+    assert state.query("devices.**.status") == [("devices.lamp.status", "on"), ("devices.fan.status", "off"), ("devices.fan.fault.status", "ok")]
+    assert state.query("devices.fan.**") == [
+        ("devices.fan", state["devices.fan"]),
+        ("devices.fan.status", "off"),
+        ("devices.fan.power", 20),
+        ("devices.fan.fault", state["devices.fan.fault"]),
+        ("devices.fan.fault.status", "ok"),
+    ]
+
+    # overlapping wildcards do not yield a match twice
+    assert state.query("**.**.status") == state.query("**.status")
+    assert state.query("devices.**.*.status") == [("devices.lamp.status", "on"), ("devices.fan.status", "off"), ("devices.fan.fault.status", "ok")]
+
+
+def test_query_iter_is_lazy():
+    state = reactive({"items": {f"item_{i}": {"value": i} for i in range(1000)}})
+
+    matches = state.query_iter("items.*.value")
+    assert next(matches) == ("items.item_0.value", 0)
+    assert next(matches) == ("items.item_1.value", 1)
+    assert sum(value for _, value in matches) == sum(range(2, 1000))
+
+
+def test_arrays():
+    state = reactive({"series": {"a": compact(range(SIZE)), "b": compact([0.5] * SIZE)}})
+
+    assert state.query("series.a.3") == [("series.a.3", 3)]
+    assert state.query(f"series.a.{SIZE}") == []
+    assert state.query("series.*.1") == [("series.a.1", 1), ("series.b.1", 0.5)]
+    assert len(state.query("series.a.*")) == SIZE
+    assert state.query("**.255") == [("series.a.255", 255), ("series.b.255", 0.5)]
+
+
+def test_invalid_pattern():
+    state = devices()
+
+    with pytest.raises(ValueError):
+        state.query("devices..status")
+    with pytest.raises(ValueError):
+        state.query("devices.a b")
+
+    assert compile_query("devices.*.status") is compile_query("devices.*.status")
+
+
+def test_computed_query():
+    state = devices()
+    on = computed(lambda: sorted(path for path, status in state.query_iter("devices.*.status") if status == "on"))
+
+    assert on() == ["devices.lamp.status"]
+
+    state["devices"]["heater"]["power"] = 50
+    assert on.is_valid()
+
+    state["devices"]["fan"]["status"] = "on"
+    assert on() == ["devices.fan.status", "devices.lamp.status"]
+
+    state["devices"]["heater"]["status"] = "on"
+    assert on() == ["devices.fan.status", "devices.heater.status", "devices.lamp.status"]
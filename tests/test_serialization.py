@@ -0,0 +1,79 @@
+# pylint: skip-file
+
+import json
+from perci import reactive, watch
+
+
+def test_json_cache():
+    state = reactive({"a": {"value": 1}, "b": {"value": 2}, "items": [1, 2]})
+    first = state._get_json()
+
+    assert state._get_json() is first
+
+    state["a"]["value"] = 3
+    second = state._get_json()
+
+    assert second == {"a": {"value": 3}, "b": {"value": 2}, "items": [1, 2]}
+    assert first == {"a": {"value": 1}, "b": {"value": 2}, "items": [1, 2]}
+    assert second["b"] is first["b"]
+    assert second["items"] is first["items"]
+
+    state["items"].append(3)
+    del state["b"]
+
+    assert state.json() == {"a": {"value": 3}, "items": [1, 2, 3]}
+    assert state._get_json()["a"] is second["a"]
+
+
+def test_json_is_private():
+    state = reactive({"a": {"b": [1, 2]}, "c": 1})
+    changes = []
+    watch(state, changes.append)
+
+    result = state.json()
+    result["a"]["b"].append(3)
+    result["c"] = 2
+
+    assert state.json() == {"a": {"b": [1, 2]}, "c": 1}
+    assert state.dumps() == json.dumps({"a": {"b": [1, 2]}, "c": 1})
+
+    # the diff must not run against a modified cache
+    state.update_from({"a": {"b": [1, 2, 3]}, "c": 1})
+    assert state.json() == {"a": {"b": [1, 2, 3]}, "c": 1}
+
+    # change records do not share state with the tree
+    changes.clear()
+    state["d"] = {"e": [1]}
+    state["a"]["b"].insert(0, {"f": 1})
+    changes[0].value["e"].append(2)
+    changes[1].values[0]["f"] = 2
+
+    assert state.json() == {"a": {"b": [{"f": 1}, 1, 2, 3]}, "c": 1, "d": {"e": [1]}}
+
+
+def test_dumps():
+    data = {"text": 'quote " and ü', "number": 1.5, "int": -3, "flag": True, "none": None, "items": [[], {}, [1, {"x": 2}]], "empty": {}}
+    state = reactive(data)
+
+    assert state.dumps() == json.dumps(data)
+
+    state["items"][2][1]["x"] = "changed"
+    state["empty"]["key"] = 0.1
+    del state["text"]
+
+    assert state.dumps() == json.dumps(state.json())
+    assert json.loads(state.dumps()) == state.json()
+
+
+def test_dumps_deep_tree():
+    state = reactive({})
+    node = state
+    for i in range(2000):
+        node["child"] = {}
+        node = node["child"]
+
+    node["value"] = 1
+    assert state.dumps().count("child") == 2000
+
+    node["value"] = 2
+    assert state.dumps().endswith('{"value": 2}' + "}" * 2000)
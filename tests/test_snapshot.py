@@ -0,0 +1,93 @@
+# pylint: skip-file
+
+import threading
+import pytest
+from perci import reactive, transaction, snapshot_json
+
+
+def test_snapshot_values():
+    state = reactive({"name": "Alice", "tags": ["a", "b"], "address": {"city": "Berlin", "zip": None}})
+    snapshot = state.snapshot()
+
+    assert snapshot == {"name": "Alice", "tags": ("a", "b"), "address": {"city": "Berlin", "zip": None}}
+    assert snapshot_json(snapshot) == state.json()
+    assert state.get_child("name").snapshot() == "Alice"
+
+    with pytest.raises(TypeError):
+        snapshot["name"] = "Bob"
+    with pytest.raises(TypeError):
+        snapshot["tags"][0] = "c"
+
+
+def test_snapshot_is_isolated():
+    state = reactive({"a": {"value": 1}, "items": [1, 2]})
+    snapshot = state.snapshot()
+
+    state["a"]["value"] = 2
+    state["items"].append(3)
+    state["b"] = 5
+    del state["items"][0]
+
+    assert snapshot_json(snapshot) == {"a": {"value": 1}, "items": [1, 2]}
+    assert snapshot_json(state.snapshot()) == state.json()
+
+
+def test_snapshot_structural_sharing():
+    state = reactive({"a": {"value": 1}, "b": {"value": 2}, "items": [{"x": 1}, {"x": 2}]})
+    first = state.snapshot()
+
+    # repeated snapshots of an unchanged tree are the same object
+    assert state.snapshot() is first
+
+    state["a"]["value"] = 3
+    second = state.snapshot()
+
+    assert second is not first
+    assert second["a"] is not first["a"]
+    assert second["b"] is first["b"]
+    assert second["items"] is first["items"]
+
+    state["items"].insert(0, {"x": 0})
+    third = state.snapshot()
+
+    assert third["items"][1] is first["items"][0]
+    assert third["a"] is second["a"]
+
+
+def test_snapshot_deep_tree():
+    state = reactive({})
+    node = state
+    for i in range(2000):
+        node["child"] = {}
+        node = node["child"]
+    node["value"] = 1
+
+    snapshot = state.snapshot()
+    for i in range(2000):
+        snapshot = snapshot["child"]
+
+    assert snapshot == {"value": 1}
+
+
+def test_snapshot_consistency():
+    state = reactive({"a": 0, "b": 0})
+    stop = threading.Event()
+
+    # the writer keeps both values equal at the end of every transaction
+    def writer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            with transaction(state):
+                state["a"] = i
+                state["b"] = i
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(1000):
+            snapshot = state.snapshot()
+            assert snapshot["a"] == snapshot["b"]
+    finally:
+        stop.set()
+        thread.join()
@@ -1,8 +1,9 @@
 # pylint: skip-file
 
+import threading
 import time
 from unittest.mock import Mock, call
-from perci import reactive, watch, create_queue_watcher
+from perci import reactive, watch, create_queue_watcher, OverflowPolicy
 from perci.changes import AddChange, RemoveChange, UpdateChange
 
 
@@ -25,13 +26,7 @@ def test_add_keys():
         "city": "New York",
         "state": "NY",
     }
-    handler.assert_has_calls(
-        [
-            call(AddChange(path=["root"], key="address", repr="dict", value=None)),
-            call(AddChange(path=["root", "address"], key="city", repr="value", value="New York")),
-            call(AddChange(path=["root", "address"], key="state", repr="value", value="NY")),
-        ]
-    )
+    handler.assert_called_once_with(AddChange(path=["root"], key="address", repr="dict", value={"city": "New York", "state": "NY"}))
     handler.reset_mock()
 
 
@@ -53,9 +48,7 @@ def test_update_keys():
     handler.assert_has_calls(
         [
             call(RemoveChange(path=["root"], key="age")),
-            call(AddChange(path=["root"], key="age", repr="dict", value=None)),
-            call(AddChange(path=["root", "age"], key="years", repr="value", value=25)),
-            call(AddChange(path=["root", "age"], key="months", repr="value", value=6)),
+            call(AddChange(path=["root"], key="age", repr="dict", value={"years": 25, "months": 6})),
         ]
     )
     handler.reset_mock()
@@ -192,7 +185,7 @@ def test_queue_watcher():
 
     assert changes == [
         RemoveChange(path=["root"], key="name"),
-        AddChange(path=["root"], key="name", repr="dict", value=None),
+        AddChange(path=["root"], key="name", repr="dict", value={}),
         AddChange(path=["root", "name"], key="first", repr="value", value="Bob"),
         AddChange(path=["root", "name"], key="last", repr="value", value="Johnson"),
     ]
@@ -208,3 +201,131 @@ def test_queue_watcher():
     assert len(changes) == 2
     assert UpdateChange(path=["root", "name", "first"], value="Alice") in changes
     assert UpdateChange(path=["root", "name", "last"], value="Smith") in changes
+
+
+def test_wildcard_watcher():
+    state = reactive(
+        {
+            "users": {
+                "alice": {"age": 25},
+                "bob": {"age": 30},
+            },
+        }
+    )
+
+    age_handler = Mock()
+    alice_handler = Mock()
+    watch(state, age_handler, "users.*.age")
+    watch(state, alice_handler, "users.alice")
+
+    state["users"]["bob"]["age"] = 31
+    age_handler.assert_called_once_with(UpdateChange(path=["root", "users", "bob", "age"], value=31))
+    alice_handler.assert_not_called()
+    age_handler.reset_mock()
+
+    state["users"]["alice"]["age"] = 26
+    age_handler.assert_called_once_with(UpdateChange(path=["root", "users", "alice", "age"], value=26))
+    alice_handler.assert_called_once_with(UpdateChange(path=["root", "users", "alice", "age"], value=26))
+
+
+def test_watcher_order():
+    state = reactive({"a": {"b": 1}})
+
+    calls = []
+    watch(state, lambda change: calls.append("b"), "a.b")
+    watch(state, lambda change: calls.append("root"))
+    watch(state, lambda change: calls.append("*"), "*")
+
+    state["a"]["b"] = 2
+
+    # handlers are invoked in registration order, not in path order
+    assert calls == ["b", "root", "*"]
+
+
+def test_watcher_remove_keeps_wildcards():
+    state = reactive({"users": {"alice": {"age": 25}, "bob": {"age": 30}}})
+
+    alice_handler = Mock()
+    wildcard_handler = Mock()
+    watch(state["users"].get_child("alice").get_child("age"), alice_handler)
+    watch(state, wildcard_handler, "users.*")
+
+    del state["users"]["alice"]
+
+    # only the watcher bound to the removed subtree is dropped
+    assert [watcher.handler for watcher in state.get_namespace().get_watchers()] == [wildcard_handler]
+
+    state["users"]["bob"]["age"] = 31
+    wildcard_handler.assert_called_with(UpdateChange(path=["root", "users", "bob", "age"], value=31))
+
+
+def test_queue_watcher_drop_oldest():
+    state = reactive({"value": 0})
+    watcher = create_queue_watcher(state, capacity=3)
+
+    for i in range(1, 6):
+        state["value"] = i
+
+    assert [change.value for change in watcher.get_changes()] == [3, 4, 5]
+    assert watcher.dropped_count == 2
+
+
+def test_queue_watcher_drop_newest():
+    state = reactive({"value": 0})
+    watcher = create_queue_watcher(state, capacity=3, overflow=OverflowPolicy.DROP_NEWEST)
+
+    for i in range(1, 6):
+        state["value"] = i
+
+    assert [change.value for change in watcher.get_changes(max_count=2)] == [1, 2]
+    assert watcher.dropped_count == 2
+
+    state["value"] = 6
+    assert [change.value for change in watcher.get_changes()] == [3, 6]
+
+
+def test_queue_watcher_block():
+    state = reactive({"value": 0})
+    watcher = create_queue_watcher(state, capacity=1, overflow=OverflowPolicy.BLOCK, timeout=0.05)
+
+    state["value"] = 1
+    state["value"] = 2
+    assert watcher.dropped_count == 1
+
+    # a consumer making room unblocks the mutating thread
+    consumed = []
+    consumer = threading.Timer(0.05, lambda: consumed.extend(watcher.get_changes()))
+    watcher.timeout = None
+    consumer.start()
+    state["value"] = 3
+    consumer.join()
+
+    assert [change.value for change in consumed] == [1]
+    assert [change.value for change in watcher.get_changes()] == [3]
+    assert watcher.dropped_count == 1
+
+
+def test_queue_watcher_coalesce():
+    state = reactive({"a": 0, "b": 0})
+    watcher = create_queue_watcher(state, capacity=3, overflow=OverflowPolicy.COALESCE)
+
+    for i in range(1, 100):
+        state["a"] = i
+        state["b"] = -i
+
+    assert watcher.get_changes() == [
+        UpdateChange(path=["root", "a"], value=99),
+        UpdateChange(path=["root", "b"], value=-99),
+    ]
+    assert watcher.coalesced_count == 196
+    assert watcher.dropped_count == 0
+
+    # updates are never coalesced across structural changes
+    state["a"] = 1
+    state["c"] = 0
+    state["a"] = 2
+    assert watcher.get_changes() == [
+        UpdateChange(path=["root", "a"], value=1),
+        AddChange(path=["root"], key="c", repr="value", value=0),
+        UpdateChange(path=["root", "a"], value=2),
+    ]